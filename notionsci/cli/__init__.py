@@ -3,12 +3,15 @@ import logging
 import click
 
 from notionsci.cli import config, notion, sync
+from notionsci.config import select_profile
 
 
 @click.group()
 @click.option("-v", "--verbose", count=True)
-def cli(verbose):
+@click.option("--profile", required=False, default=None, help="Config profile to use (defaults to $PROFILE or default)")
+def cli(verbose, profile):
     logging.basicConfig(level=logging.DEBUG if verbose > 0 else logging.INFO)
+    select_profile(profile)
 
 
 cli.add_command(sync.sync)
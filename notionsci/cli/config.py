@@ -1,6 +1,6 @@
 import click
 
-from notionsci.config import config as conf
+from notionsci.config import get_config
 
 
 @click.command()
@@ -9,6 +9,7 @@ def config(file):
     """
     Prints current config file as is
     """
+    conf = get_config()
     if file:
         with open(file, 'w') as f:
             f.write(conf.dumps_yaml())
@@ -0,0 +1,14 @@
+"""
+Option callbacks which import the notion connection only once an argument is actually parsed,
+keeping it out of the cli startup
+"""
+
+
+def parse_uuid_callback(ctx, param, value):
+    from notionsci.connections.notion import parse_uuid_callback
+    return parse_uuid_callback(ctx, param, value)
+
+
+def parse_uuid_or_str_callback(ctx, param, value):
+    from notionsci.connections.notion import parse_uuid_or_str_callback
+    return parse_uuid_or_str_callback(ctx, param, value)
@@ -1,12 +1,15 @@
 import os
 import time
 
+from typing import TYPE_CHECKING
+
 import click
-import inquirer
 
-from notionsci.config import config
-from notionsci.connections.notion import parse_uuid_callback, ID, is_uuid, parse_uuid_or_str_callback
-from notionsci.utils import sanitize_filename, MarkdownContext
+from notionsci.cli.helpers import parse_uuid_callback, parse_uuid_or_str_callback
+from notionsci.config import get_config
+
+if TYPE_CHECKING:
+    from notionsci.connections.notion import ID
 
 
 @click.group()
@@ -22,7 +25,7 @@ def notion():
 @click.argument('parent', callback=parse_uuid_callback)
 @click.option('--target_id', callback=parse_uuid_callback, required=False, default=None,
               help='Unique ID for the resulting page')
-def duplicate(source: ID, parent: ID, target_id: ID):
+def duplicate(source: 'ID', parent: 'ID', target_id: 'ID'):
     """
     Duplicates given SOURCE page into a PARENT page as a child page.
 
@@ -31,7 +34,7 @@ def duplicate(source: ID, parent: ID, target_id: ID):
 
     Requires unofficial notion api
     """
-    unotion = config.connections.notion_unofficial.client()
+    unotion = get_config().connections.notion_unofficial.client()
 
     source_block = unotion.get_block(source)
     if not source_block:
@@ -55,7 +58,10 @@ def clear_trash(workspace):
 
     Requires unofficial notion api
     """
-    unotion = config.connections.notion_unofficial.client()
+    import inquirer
+    from notionsci.connections.notion import is_uuid
+
+    unotion = get_config().connections.notion_unofficial.client()
 
     # Select a space
     space = None
@@ -96,7 +102,9 @@ def clear_trash(workspace):
 @notion.command()
 @click.argument('page', callback=parse_uuid_callback)
 @click.option('-o', '--output', required=False, default='.', help='Output directory or file')
-def download_md(page: ID, output: str):
+@click.option('--cached', is_flag=True, default=False,
+              help='Serve blocks from the local cache, edits of blocks whose parent was not edited may be missed')
+def download_md(page: 'ID', output: str, cached: bool):
     """
     Downloads given PAGE as a markdown file as given output file or folder
 
@@ -106,24 +114,28 @@ def download_md(page: ID, output: str):
     :param output:
     :return:
     """
-    notion = config.connections.notion.client()
+    from notionsci.utils import sanitize_filename, render_markdown
+
+    notion = get_config().connections.notion.client()
 
     page = notion.page_get(page)
-    notion.load_children(page, recursive=True, databases=True)
+    notion.load_children(page, recursive=True, databases=True, allow_stale=cached)
 
     path = os.path.join(output, f'{sanitize_filename(page.get_title())}.md') if os.path.isdir(output) else output
-    content = page.to_markdown(MarkdownContext())
 
     click.echo(f'Writing file {path}')
     with open(path, 'w') as f:
-        f.write(content)
+        render_markdown(page, f)
+    click.echo(f'Notion: {notion.request_stats()}')
+    if cached and notion.cache:
+        click.echo(f'Block cache: {notion.cache.stats}')
 
 
 
 @notion.command()
 @click.argument('parent', callback=parse_uuid_callback)
 @click.argument('file')
-def upload_md(parent: ID, file: str):
+def upload_md(parent: 'ID', file: str):
     """
     Uploads given markdown FILE as a child page of the given PARENT
 
@@ -131,9 +143,21 @@ def upload_md(parent: ID, file: str):
     :param file:
     :return:
     """
-    notion = config.connections.notion.client()
+    from notionsci.connections.notion import Page, Parent, Property, parse_markdown_page
+
+    notion = get_config().connections.notion.client()
 
     click.echo(f'Reading file {file}')
     with open(file, 'r') as f:
         content = f.read()
 
+    title, blocks = parse_markdown_page(content)
+    page = notion.page_create(Page(
+        parent=Parent.page(parent),
+        properties={'title': Property.as_title(title or os.path.splitext(os.path.basename(file))[0])}
+    ))
+
+    click.echo(f'Uploading {len(blocks)} blocks to {page.url}')
+    notion.append_blocks(page.id, blocks)
+    click.echo(f'Notion: {notion.request_stats()}')
+
@@ -0,0 +1,24 @@
+from typing import TYPE_CHECKING
+
+from notionsci.config import cache_path, state_path
+
+if TYPE_CHECKING:
+    from notionsci.connections.notion import ID
+    from notionsci.sync import DatabaseSnapshot, SqliteSyncState, SyncJournal
+
+STATE_DB = 'state.db'
+
+
+def database_snapshot(database_id: 'ID') -> 'DatabaseSnapshot':
+    from notionsci.sync import DatabaseSnapshot
+    return DatabaseSnapshot.load(cache_path('snapshots', f'{database_id}.json'), database_id)
+
+
+def sync_state(namespace: str) -> 'SqliteSyncState':
+    from notionsci.sync import SqliteSyncState
+    return SqliteSyncState(state_path(STATE_DB), namespace)
+
+
+def sync_journal(namespace: str) -> 'SyncJournal':
+    from notionsci.sync import SyncJournal, payload_hash
+    return SyncJournal(state_path('journals', f'{payload_hash(namespace)}.jsonl'))
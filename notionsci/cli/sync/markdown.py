@@ -1,8 +1,14 @@
+import os
+from typing import TYPE_CHECKING
+
 import click
 
-from notionsci.config import config
-from notionsci.connections.notion import parse_uuid_callback, ID
-from notionsci.sync.markdown import MarkdownPagesSync
+from notionsci.cli.helpers import parse_uuid_callback
+from notionsci.cli.sync.common import sync_state, sync_journal
+from notionsci.config import get_config
+
+if TYPE_CHECKING:
+    from notionsci.connections.notion import ID
 
 
 @click.group()
@@ -18,13 +24,25 @@ def markdown():
 @click.argument('dir', required=True)
 @click.option('--force', is_flag=True, default=False,
               help='Ensures up to date items are also pushed to Zotero')
-def pages(collection: ID, dir: str, force: bool):
+@click.option('--pipelined', is_flag=True, default=False,
+              help='Starts writing pages while Notion pages are still being loaded')
+def pages(collection: 'ID', dir: str, force: bool, pipelined: bool):
     """
     Starts a sync of a collection to a folder of markdown files
 
     COLLECTION: Database ID or url
     DIR: Directory path to sync to
     """
-    notion = config.connections.notion.client()
+    from notionsci.sync.markdown import MarkdownPagesSync, MarkdownManifest
+
+    notion = get_config().connections.notion.client()
 
-    MarkdownPagesSync(notion, collection, dir).sync()
\ No newline at end of file
+    namespace = f'markdown-pages:{collection}:{os.path.abspath(dir)}'
+    MarkdownPagesSync(
+        notion, collection, dir,
+        state=sync_state(namespace),
+        journal=sync_journal(namespace),
+        manifest=MarkdownManifest.for_directory(dir),
+        pipelined=pipelined
+    ).sync()
+    click.echo(f'Notion: {notion.request_stats()}')
@@ -1,13 +1,15 @@
 import uuid
+from typing import TYPE_CHECKING
 
 import click
 
+from notionsci.cli.helpers import parse_uuid_callback
 from notionsci.cli.notion import duplicate
-from notionsci.config import config
-from notionsci.connections.notion import parse_uuid, parse_uuid_callback, BlockType, block_type_filter
-from notionsci.connections.zotero import ID
-from notionsci.sync.zotero import RefsSync, CollectionsSync
-from notionsci.utils import take_1
+from notionsci.cli.sync.common import database_snapshot, sync_state, sync_journal
+from notionsci.config import get_config, cache_path
+
+if TYPE_CHECKING:
+    from notionsci.connections.zotero import ID, ZoteroClient
 
 
 @click.group()
@@ -22,12 +24,17 @@ def zotero():
 @zotero.command()
 @click.argument('parent', callback=parse_uuid_callback, required=True)
 @click.pass_context
-def template(ctx: click.Context, parent: ID):
+def template(ctx: click.Context, parent: 'ID'):
     """
     Duplicates the standard Zotero Library template page to your workspace under the given parent page
 
     PARENT: Destination parent page ID or url
     """
+    from notionsci.connections.notion import parse_uuid
+    from notionsci.utils import take_1
+
+    config = get_config()
+
     # Duplicate the block
     source = parse_uuid_callback(None, None, config.templates.zotero_template)
     target_id = str(uuid.uuid4())
@@ -48,7 +55,22 @@ def template(ctx: click.Context, parent: ID):
         click.echo(f'Found references database ({parse_uuid(refs_db.id)})')
 
 
+def zotero_client() -> 'ZoteroClient':
+    from notionsci.connections.zotero import LibraryCache, LibraryMirror
+
+    zotero_config = get_config().connections.zotero
+    zotero = zotero_config.client()
+    name = f'{zotero_config.library_type}_{zotero_config.library_id}'
+    if zotero_config.mirror:
+        zotero.cache = LibraryMirror(cache_path('libraries', f'{name}.db'))
+    else:
+        zotero.cache = LibraryCache.load(cache_path('libraries', f'{name}.json'))
+    return zotero
+
+
 def child_database_filter(title: str):
+    from notionsci.connections.notion import BlockType, block_type_filter
+
     type_filter = block_type_filter(BlockType.child_database)
     return lambda b: type_filter(b) and b.child_database.title == title
 
@@ -56,15 +78,19 @@ def child_database_filter(title: str):
 @zotero.command()
 @click.argument('template', callback=parse_uuid_callback, required=True)
 @click.option('--force', is_flag=True, default=False,
-              help='Ensures up to date items are also pushed to Zotero')
-def refs(template: ID, force: bool):
+              help='Ensures up to date items are also pushed to Zotero and refetches all Notion items')
+def refs(template: 'ID', force: bool):
     """
     Starts a one way Zotero references sync to Notion
 
     TEMPLATE: Template page ID or url
     """
+    from notionsci.sync.zotero import RefsSync
+    from notionsci.utils import take_1
+
+    config = get_config()
     notion = config.connections.notion.client()
-    zotero = config.connections.zotero.client()
+    zotero = zotero_client()
     sync_config = config.sync.zotero.get('refs', {})
 
     template_page = notion.page_get(template, with_children=True)
@@ -80,24 +106,37 @@ def refs(template: ID, force: bool):
         references.id,
         collections_id=collections.id,
         force=force,
+        snapshot=database_snapshot(references.id),
+        state=sync_state(f'zotero-refs:{references.id}'),
+        journal=sync_journal(f'zotero-refs:{references.id}'),
         **sync_config
     ).sync()
+    click.echo(f'Notion: {notion.request_stats()}')
 
 
 @zotero.command()
 @click.argument('template', callback=parse_uuid_callback, required=True)
 @click.option('--force', is_flag=True, default=False,
-              help='Ensures up to date items are also pushed to Zotero')
-def collections(template: ID, force: bool):
+              help='Ensures up to date items are also pushed to Zotero and refetches all Notion items')
+def collections(template: 'ID', force: bool):
     """
     Starts a one way Zotero references sync to Notion
 
     TEMPLATE: Template page ID or url
     """
-    notion = config.connections.notion.client()
-    zotero = config.connections.zotero.client()
+    from notionsci.sync.zotero import CollectionsSync
+
+    notion = get_config().connections.notion.client()
+    zotero = zotero_client()
 
     template_page = notion.page_get(template, with_children=True)
     collections = next(iter(template_page.get_children(child_database_filter('Zotero Collections'))), None)
 
-    CollectionsSync(notion, zotero, collections.id, force=force).sync()
+    CollectionsSync(
+        notion, zotero, collections.id,
+        force=force,
+        snapshot=database_snapshot(collections.id),
+        state=sync_state(f'zotero-collections:{collections.id}'),
+        journal=sync_journal(f'zotero-collections:{collections.id}'),
+    ).sync()
+    click.echo(f'Notion: {notion.request_stats()}')
@@ -1,24 +1,26 @@
 import logging
 import os
-import sys
+from typing import Optional, TYPE_CHECKING
 
-import yaml
-from platformdirs import user_config_dir
+from platformdirs import user_config_dir, user_cache_dir
 
 from notionsci.config.constants import CONFIG_VERSION, APP_NAME, OVERRIDE_CONFIG_NAME, DEFAULT_PROFLE
-from notionsci.config.migrations import migrate
-from notionsci.config.structure import Config
 
+if TYPE_CHECKING:
+    from notionsci.config.structure import Config
+
+_profile: Optional[str] = None
+_loaded: Optional[tuple] = None
 
-def load_config() -> (Config, str):
-    logging.basicConfig(level=logging.INFO)
 
-    profile_arg = next(filter(lambda x: x.startswith("--profile="), sys.argv), None)
-    if profile_arg:
-        sys.argv.remove(profile_arg)
-        profile_arg = profile_arg.replace("--profile=", "")
+def load_config(profile: Optional[str] = None) -> ('Config', str):
+    import yaml
+    from notionsci.config.migrations import migrate
+    from notionsci.config.structure import Config
+
+    logging.basicConfig(level=logging.INFO)
 
-    profile = profile_arg or os.getenv("PROFILE", None) or DEFAULT_PROFLE
+    profile = profile or os.getenv("PROFILE", None) or DEFAULT_PROFLE
     config_name = f"{profile}.yml"
 
     # Determine correct config location
@@ -60,11 +62,48 @@ def load_config() -> (Config, str):
     return config, config_path
 
 
-c, cp = load_config()
-config: Config = c
-config_path: str = cp
+def select_profile(profile: Optional[str]):
+    """
+    Sets the profile to load the config from. Must be called before the config is first accessed.
+    """
+    global _profile
+    if _loaded is not None:
+        raise Exception('Config is already loaded, profile can not be changed anymore')
+    _profile = profile
+
+
+def get_config() -> 'Config':
+    """
+    Config of the selected profile, loaded on first access
+    """
+    global _loaded
+    if _loaded is None:
+        _loaded = load_config(_profile)
+    return _loaded[0]
+
 
+def get_config_path() -> str:
+    get_config()
+    return _loaded[1]
 
-def write_config(config: Config):
-    with open(config_path, 'w') as f:
+
+def __getattr__(name: str):
+    # Keeps `from notionsci.config import config` working without loading the config at import time
+    if name == 'config':
+        return get_config()
+    if name == 'config_path':
+        return get_config_path()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def write_config(config: 'Config'):
+    with open(get_config_path(), 'w') as f:
         config.dump_yaml(f)
+
+
+def cache_path(*parts: str) -> str:
+    return os.path.join(user_cache_dir(APP_NAME), *parts)
+
+
+def state_path(*parts: str) -> str:
+    return os.path.join(user_config_dir(APP_NAME), *parts)
@@ -1,13 +1,16 @@
+import os
 from dataclasses import dataclass, field
+from typing import Optional, TYPE_CHECKING
 
-from notion_client import Client
+from platformdirs import user_cache_dir
 from simple_parsing import Serializable
 
-from notionsci.config.constants import CONFIG_VERSION, TEMPLATE_ZOTERO, DEV_TESTS_PAGE
-from notionsci.connections import zotero
-from notionsci.connections.notion import NotionClient
-from notionsci.connections.notion_unofficial import NotionUnofficialClient
-from notionsci.connections.zotero import ZoteroClient
+from notionsci.config.constants import CONFIG_VERSION, TEMPLATE_ZOTERO, DEV_TESTS_PAGE, APP_NAME
+
+if TYPE_CHECKING:
+    from notionsci.connections.notion import NotionClient, AsyncNotionClient, RateLimiter, BlockCache
+    from notionsci.connections.notion_unofficial import NotionUnofficialClient
+    from notionsci.connections.zotero import ZoteroClient
 
 ERROR_CONNECTION = 'This command requires access to {} api\nConfigure it first at connections.{}'
 
@@ -16,22 +19,71 @@ ERROR_CONNECTION = 'This command requires access to {} api\nConfigure it first a
 class NotionUnofficialConfig(Serializable):
     token_v2: str = "<notion unofficial token_v2>"
 
-    def client(self) -> NotionUnofficialClient:
+    def client(self) -> 'NotionUnofficialClient':
         if not self.token_v2 or 'notion unofficial token_v2' in self.token_v2:
             raise Exception(ERROR_CONNECTION.format('Notion Unofficial', 'notion_unofficial'))
 
+        # Connection libraries are imported on use to keep the cli startup fast
+        from notionsci.connections.notion_unofficial import NotionUnofficialClient
+
         return NotionUnofficialClient(token_v2=self.token_v2)
 
 
 @dataclass
 class NotionConfig(Serializable):
     token: str = "<notion token>"
+    max_in_flight: int = 4
+    requests_per_second: float = 3.0
+    burst: int = 3
+    max_retries: int = 5
+    # Size of the on-disk block cache in megabytes, 0 disables it
+    cache_size_mb: int = 256
+
+    def limiter(self) -> 'RateLimiter':
+        # Shared between all clients created from this config
+        if not hasattr(self, '_limiter'):
+            from notionsci.connections.notion import RateLimiter
+            self._limiter = RateLimiter(
+                requests_per_second=self.requests_per_second,
+                burst=self.burst,
+                max_retries=self.max_retries
+            )
+        return self._limiter
+
+    def cache(self) -> Optional['BlockCache']:
+        if self.cache_size_mb <= 0:
+            return None
+        if not hasattr(self, '_cache'):
+            from notionsci.connections.notion import BlockCache
+            self._cache = BlockCache(
+                os.path.join(user_cache_dir(APP_NAME), 'blocks.db'),
+                max_size=self.cache_size_mb * 1024 * 1024
+            )
+        return self._cache
+
+    def client(self) -> 'NotionClient':
+        if not self.token or 'notion token' in self.token:
+            raise Exception(ERROR_CONNECTION.format('Notion Official', 'notion'))
 
-    def client(self) -> NotionClient:
+        from notionsci.connections.notion import NotionClient, RateLimitedClient
+
+        return NotionClient(
+            client=RateLimitedClient(auth=self.token, limiter=self.limiter()),
+            cache=self.cache(),
+            max_in_flight=self.max_in_flight
+        )
+
+    def async_client(self) -> 'AsyncNotionClient':
         if not self.token or 'notion token' in self.token:
             raise Exception(ERROR_CONNECTION.format('Notion Official', 'notion'))
 
-        return NotionClient(client=Client(auth=self.token))
+        from notionsci.connections.notion import AsyncNotionClient, PersistentAsyncClient
+
+        return AsyncNotionClient(
+            client=PersistentAsyncClient(auth=self.token, limiter=self.limiter()),
+            cache=self.cache(),
+            max_in_flight=self.max_in_flight
+        )
 
 
 @dataclass
@@ -39,12 +91,21 @@ class ZoteroConfig(Serializable):
     token: str = "<zotero token>"
     library_type: str = "user"
     library_id: str = "123456"
+    # Number of result pages fetched concurrently
+    max_in_flight: int = 4
+    # Keeps the library in a local SQLite database instead of a json file
+    mirror: bool = False
 
-    def client(self) -> ZoteroClient:
+    def client(self) -> 'ZoteroClient':
         if not self.token or 'zotero token' in self.token:
             raise Exception(ERROR_CONNECTION.format('Zotero', 'zotero'))
 
-        return ZoteroClient(client=zotero.Zotero(self.library_id, self.library_type, self.token))
+        from pyzotero.zotero import Zotero
+        from notionsci.connections.zotero import ZoteroClient
+        return ZoteroClient(
+            client=Zotero(self.library_id, self.library_type, self.token),
+            max_in_flight=self.max_in_flight
+        )
 
 
 @dataclass
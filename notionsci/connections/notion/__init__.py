@@ -1,3 +1,7 @@
 from .helpers import *
 from .structures import *
+from .ratelimit import *
+from .cache import *
 from .client import *
+from .markdown import *
+from .async_client import *
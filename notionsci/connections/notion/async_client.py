@@ -0,0 +1,263 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Callable, Any, Union, AsyncIterator, Awaitable
+
+from notion_client import AsyncClient
+
+from notionsci.connections.notion.client import NotionApiMixin, strip_readonly_props, block_payload, \
+    pending_children, nested_children, MAX_APPEND_BLOCKS
+from notionsci.connections.notion.ratelimit import RateLimiter, parse_response, is_idempotent
+from notionsci.connections.notion.structures import Database, SortObject, QueryFilter, format_query_args, \
+    PropertyDef, Page, ID, QueryResult, Block, BlockType
+from notionsci.utils import filter_none_dict, chunks
+
+
+class PersistentAsyncClient(AsyncClient):
+    """
+    AsyncClient which keeps its http connection pool open between requests.
+    The upstream client closes the underlying httpx client after every request, which makes it unusable
+    for more than a single call. Call `aclose` once done.
+    Requests are paced and retried by the limiter if one is given.
+    """
+
+    def __init__(self, *args, limiter: Optional[RateLimiter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter
+
+    async def _send(
+            self,
+            path: str,
+            method: str,
+            query: Optional[Dict[Any, Any]] = None,
+            body: Optional[Dict[Any, Any]] = None,
+            auth: Optional[str] = None,
+    ) -> Any:
+        request = self._build_request(method, path, query, body, auth)
+        response = await self.client.send(request)
+        return parse_response(self, response)
+
+    async def request(
+            self,
+            path: str,
+            method: str,
+            query: Optional[Dict[Any, Any]] = None,
+            body: Optional[Dict[Any, Any]] = None,
+            auth: Optional[str] = None,
+    ) -> Any:
+        if self.limiter:
+            return await self.limiter.acall(
+                lambda: self._send(path, method, query, body, auth), idempotent=is_idempotent(method, path)
+            )
+        return await self._send(path, method, query, body, auth)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+async def async_traverse_pagination(
+        args: dict,
+        query_fn: Callable[..., Awaitable[QueryResult]]
+) -> AsyncIterator[Any]:
+    done = False
+    while not done:
+        result = await query_fn(**args)
+        done = not result.has_more
+        args['start_cursor'] = result.next_cursor
+        for item in result.results:
+            yield item
+
+
+async def async_list(items: AsyncIterator[Any]) -> List[Any]:
+    return [item async for item in items]
+
+
+@dataclass
+class AsyncNotionClient(NotionApiMixin):
+    client: Optional[AsyncClient] = None
+    max_in_flight: int = 4
+
+    async def aclose(self):
+        if isinstance(self.client, PersistentAsyncClient):
+            await self.client.aclose()
+
+    async def page_get(self, id: ID, with_children=False) -> Page:
+        result = await self._client().pages.retrieve(id)
+        page = Page.from_dict(result)
+        if with_children:
+            await self.load_children(page)
+        return page
+
+    async def page_update(self, page: Page) -> Page:
+        args = strip_readonly_props(page).to_dict()
+        result = await self._client().pages.update(page.id, **args)
+        return Page.from_dict(result)
+
+    async def page_create(self, page: Page) -> Page:
+        args = strip_readonly_props(page).to_dict()
+        result = await self._client().pages.create(**args)
+        return Page.from_dict(result)
+
+    async def page_upsert(self, page: Page) -> Page:
+        return await (self.page_update(page) if page.id else self.page_create(page))
+
+    async def database_get(self, id: ID) -> Database:
+        result = await self._client().databases.retrieve(id)
+        return Database.from_dict(result)
+
+    async def database_update(self, database: Database) -> Database:
+        args = strip_readonly_props(database).to_dict()
+        result = await self._client().databases.update(database.id, **args)
+        return Database.from_dict(result)
+
+    async def database_create(self, database: Database) -> Database:
+        args = strip_readonly_props(database).to_dict()
+        result = await self._client().databases.create(**args)
+        return Database.from_dict(result)
+
+    async def database_query(
+            self,
+            id: ID,
+            filter: Optional[QueryFilter] = None,
+            sorts: Optional[List[SortObject]] = None,
+            start_cursor: str = None,
+            page_size: int = None
+    ) -> QueryResult:
+        args = format_query_args(filter=filter, sorts=sorts, start_cursor=start_cursor, page_size=page_size)
+        result_raw = await self._client().databases.query(id, **args)
+        return QueryResult.from_dict(result_raw)
+
+    def database_query_all(
+            self,
+            id: ID,
+            filter: Optional[QueryFilter] = None,
+            sorts: Optional[List[SortObject]] = None
+    ) -> AsyncIterator[Page]:
+        return async_traverse_pagination(
+            args=dict(filter=filter if filter else None, sorts=sorts, page_size=100),
+            query_fn=lambda **args: self.database_query(id, **args)
+        )
+
+    async def search(
+            self,
+            query: str = None,
+            filter: Optional[QueryFilter] = None,
+            sorts: Optional[List[SortObject]] = None,
+            start_cursor: str = None,
+            page_size: int = None
+    ) -> QueryResult:
+        args = format_query_args(
+            query=query, filter=filter, sorts=sorts, start_cursor=start_cursor, page_size=page_size
+        )
+        result_raw = await self._client().search(**args)
+        return QueryResult.from_dict(result_raw)
+
+    def search_all(
+            self,
+            query: str = None,
+            filter: Optional[QueryFilter] = None,
+            sorts: Optional[List[SortObject]] = None
+    ) -> AsyncIterator[Union[Page, Database]]:
+        return async_traverse_pagination(
+            args=dict(query=query, filter=filter if filter else None, sorts=sorts, page_size=100),
+            query_fn=lambda **args: self.search(**args)
+        )
+
+    async def block_retrieve_children(
+            self,
+            block_id: ID,
+            start_cursor: str = None,
+            page_size: int = None
+    ) -> QueryResult:
+        args = filter_none_dict(dict(
+            block_id=block_id, start_cursor=start_cursor, page_size=page_size
+        ))
+        result_raw = await self._client().blocks.children.list(**args)
+        return QueryResult.from_dict(result_raw)
+
+    def block_retrieve_all_children(
+            self,
+            block_id: ID,
+    ) -> AsyncIterator[Block]:
+        return async_traverse_pagination(
+            args=dict(block_id=block_id, page_size=100),
+            query_fn=lambda **args: self.block_retrieve_children(**args)
+        )
+
+    async def block_append_children(self, block_id: ID, children: List[Block]) -> Optional[List[Block]]:
+        result_raw = await self._client().blocks.children.append(
+            block_id, children=[block_payload(b) for b in children]
+        )
+        return QueryResult.from_dict(result_raw).results if result_raw.get('object') == 'list' else None
+
+    async def block_delete(self, block_id: ID):
+        await self._client().request(path=f'blocks/{block_id}', method='DELETE')
+
+    async def append_blocks(self, parent_id: ID, blocks: List[Block], max_in_flight: Optional[int] = None):
+        semaphore = asyncio.Semaphore(max_in_flight or self.max_in_flight)
+
+        async def append(parent: ID, children: List[Block]):
+            created = []
+            for batch in chunks(children, MAX_APPEND_BLOCKS):
+                async with semaphore:
+                    result = await self.block_append_children(parent, batch)
+                created = created + result if result is not None and created is not None else None
+
+            if not any(pending_children(b) for b in children):
+                return
+            if created is None:
+                async with semaphore:
+                    created = (await async_list(self.block_retrieve_all_children(parent)))[-len(children):]
+
+            await asyncio.gather(*[append(id, nested) for id, nested in nested_children(children, created)])
+
+        await append(parent_id, blocks)
+
+    async def load_children(
+            self,
+            item: Union[Page, Block],
+            recursive=False,
+            databases=False,
+            max_in_flight: Optional[int] = None,
+            allow_stale: bool = False
+    ):
+        semaphore = asyncio.Semaphore(max_in_flight or self.max_in_flight)
+
+        async def bounded(items: AsyncIterator[Any]):
+            async with semaphore:
+                return await async_list(items)
+
+        async def load_database(child: Block):
+            async with semaphore:
+                database = await self.database_get(child.id)
+            child.child_database.database = database
+            child.child_database.children = await bounded(self.database_query_all(child.id))  # eager load
+
+        async def load(parent: Union[Page, Block]):
+            children = self.cached_children(parent, allow_stale)
+            if children is None:
+                children = await bounded(self.block_retrieve_all_children(parent.id))
+                self.cache_children(parent, children, allow_stale)
+            parent.set_children(children)
+            if not recursive:
+                return
+
+            tasks = []
+            for child in children:
+                if child.has_children and child.get_children() is None:
+                    tasks.append(load(child))
+                elif databases and child.type == BlockType.child_database:
+                    tasks.append(load_database(child))
+            await asyncio.gather(*tasks)
+
+        await load(item)
+
+    async def ensure_database_schema(self, schema: Dict[str, PropertyDef], db: Database) -> Database:
+        new_props = {
+            prop_name: prop for prop_name, prop in schema.items()
+            if not db.has_property(prop_name)
+        }
+        if len(new_props) > 0:
+            db.extend_properties(new_props)
+            db = await self.database_update(db)
+
+        return db
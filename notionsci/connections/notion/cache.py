@@ -0,0 +1,115 @@
+import datetime as dt
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, List
+
+from notionsci.connections.notion.structures import Block, ID
+from notionsci.utils import strip_none
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS block_children (
+    id TEXT PRIMARY KEY,
+    last_edited_time TEXT NOT NULL,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+)
+'''
+INDEX = 'CREATE INDEX IF NOT EXISTS block_children_accessed_at ON block_children (accessed_at)'
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def __str__(self):
+        return f'{self.hits} hits, {self.misses} misses, {self.evictions} evicted'
+
+
+class BlockCache:
+    """
+    On-disk cache of the children of pages and blocks, keyed by the parent id and its last_edited_time.
+    Edits of child blocks do not change the last_edited_time of their parent, hence cached children may be stale.
+    Clients only use the cache for loads which explicitly allow that (see `NotionApiMixin.cached_children`).
+    Least recently used entries are evicted once the cache grows over `max_size` bytes.
+
+    Notion rounds edit times to the minute, therefore children of recently edited parents are not cached
+    as further edits within the same minute would go unnoticed.
+    """
+
+    def __init__(self, path: str, max_size: int = 256 * 1024 * 1024, min_age: dt.timedelta = dt.timedelta(minutes=1)):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.max_size = max_size
+        self.min_age = min_age
+        self.stats = CacheStats()
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(SCHEMA)
+        self.connection.execute(INDEX)
+        self.size = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM block_children').fetchone()[0]
+
+    def get(self, id: ID, last_edited_time: dt.datetime) -> Optional[List[Block]]:
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT data FROM block_children WHERE id = ? AND last_edited_time = ?',
+                (id, last_edited_time.isoformat())
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+
+            self.stats.hits += 1
+            self.connection.execute('UPDATE block_children SET accessed_at = ? WHERE id = ?', (time.time(), id))
+
+        return [Block.from_dict(raw) for raw in json.loads(row[0])]
+
+    def put(self, id: ID, last_edited_time: dt.datetime, children: List[Block]):
+        if dt.datetime.now(dt.timezone.utc) - last_edited_time < self.min_age:
+            return
+
+        data = json.dumps([strip_none(child.to_dict()) for child in children], default=str)
+        with self.lock:
+            previous = self.connection.execute('SELECT size FROM block_children WHERE id = ?', (id,)).fetchone()
+            self.connection.execute(
+                'INSERT OR REPLACE INTO block_children (id, last_edited_time, data, size, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (id, last_edited_time.isoformat(), data, len(data), time.time())
+            )
+            self.size += len(data) - (previous[0] if previous else 0)
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_size:
+            rows = self.connection.execute(
+                'SELECT id, size FROM block_children ORDER BY accessed_at LIMIT 100'
+            ).fetchall()
+            if not rows:
+                break
+
+            evicted = []
+            for id, size in rows:
+                if self.size <= self.max_size:
+                    break
+                evicted.append((id,))
+                self.size -= size
+
+            self.connection.executemany('DELETE FROM block_children WHERE id = ?', evicted)
+            self.stats.evictions += len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute('DELETE FROM block_children')
+            self.size = 0
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -1,12 +1,19 @@
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional, List, Iterator, Dict, Callable, Any, Union
+from typing import Optional, List, Iterator, Dict, Callable, Any, Union, Tuple
 
 from notion_client import Client
 
 from notionsci.connections.notion import BlockType, PropertyDef
+from notionsci.connections.notion.cache import BlockCache
 from notionsci.connections.notion.structures import Database, SortObject, QueryFilter, format_query_args, ContentObject, \
-    PropertyType, Page, ID, QueryResult, Block
-from notionsci.utils import filter_none_dict
+    PropertyType, Page, ID, QueryResult, Block, ChildrenMixin
+from notionsci.connections.notion.ratelimit import RequestStats
+from notionsci.utils import filter_none_dict, chunks, strip_none
+
+# Maximal number of blocks appended by a single request
+MAX_APPEND_BLOCKS = 100
 
 
 class NotionNotAttachedException(Exception):
@@ -16,6 +23,7 @@ class NotionNotAttachedException(Exception):
 @dataclass
 class NotionApiMixin:
     client: Optional[Client] = None
+    cache: Optional[BlockCache] = None
 
     def attached(self) -> bool:
         return self.client is not None
@@ -32,6 +40,24 @@ class NotionApiMixin:
 
         return self.client
 
+    def request_stats(self) -> Optional[RequestStats]:
+        limiter = getattr(self.client, 'limiter', None)
+        return limiter.stats if limiter else None
+
+    def cached_children(self, item: Union[Page, Block], allow_stale: bool = False) -> Optional[List[Block]]:
+        """
+        Children of given item as cached under its last_edited_time. Edits of child blocks do not change the
+        last_edited_time of their parent, therefore cached children may be stale and are only served if
+        `allow_stale` is set.
+        """
+        if not allow_stale or self.cache is None or item.last_edited_time is None:
+            return None
+        return self.cache.get(item.id, item.last_edited_time)
+
+    def cache_children(self, item: Union[Page, Block], children: List[Block], allow_stale: bool = False):
+        if allow_stale and self.cache is not None and item.last_edited_time is not None:
+            self.cache.put(item.id, item.last_edited_time, children)
+
 
 def traverse_pagination(args: dict, query_fn: Callable[[Dict], Any]) -> Iterator[Any]:
     done = False
@@ -55,8 +81,42 @@ def strip_readonly_props(obj: ContentObject):
     return obj
 
 
+def block_payload(block: Block) -> dict:
+    """
+    Request payload for creating given block, without its children
+    """
+    part = block.get_part()
+    if isinstance(part, ChildrenMixin):
+        part = dataclasses.replace(part, children=None)
+    part = part.to_dict()
+    part.pop('children', None)
+    return {
+        'object': 'block',
+        'type': block.type.value,
+        block.type.value: strip_none(part),
+    }
+
+
+def pending_children(block: Block) -> Optional[List[Block]]:
+    part = block.get_part()
+    return part.get_children() if isinstance(part, ChildrenMixin) else None
+
+
+def nested_children(blocks: List[Block], created: List[Block]) -> List[Tuple[ID, List[Block]]]:
+    """
+    Pairs the ids of created blocks with the children still to be appended to them
+    """
+    return [
+        (block.id, pending_children(source))
+        for block, source in zip(created, blocks)
+        if pending_children(source)
+    ]
+
+
 @dataclass
 class NotionClient(NotionApiMixin):
+    max_in_flight: int = 4
+
     def page_get(self, id: ID, with_children=False) -> Page:
         result = self.client.pages.retrieve(id)
         page = Page.from_dict(result)
@@ -160,16 +220,101 @@ class NotionClient(NotionApiMixin):
             query_fn=lambda **args: self.block_retrieve_children(**args)
         )
 
-    def load_children(self, item: Union[Page, Block], recursive=False, databases=False):
-        children: List[Block] = list(self.block_retrieve_all_children(item.id))
-        item.set_children(children)
-        if recursive:
-            for child in children:
-                if child.has_children and child.get_children() is None:
-                    self.load_children(child, recursive)
-                elif databases and child.type == BlockType.child_database:
-                    child.child_database.database = self.database_get(child.id)
-                    child.child_database.children = list(self.database_query_all(child.id))  # eager load (mayby dont?)
+    def block_append_children(self, block_id: ID, children: List[Block]) -> Optional[List[Block]]:
+        """
+        Appends given blocks without their children. Returns the created blocks if the API version reports them.
+        """
+        result_raw = self.client.blocks.children.append(block_id, children=[block_payload(b) for b in children])
+        return QueryResult.from_dict(result_raw).results if result_raw.get('object') == 'list' else None
+
+    def block_delete(self, block_id: ID):
+        self.client.request(path=f'blocks/{block_id}', method='DELETE')
+
+    def append_blocks(self, parent_id: ID, blocks: List[Block], max_in_flight: Optional[int] = None):
+        """
+        Appends given block trees. Every parent receives its children in batches of up to 100 blocks,
+        while the children of all blocks on the same level are appended concurrently.
+        """
+        with ThreadPoolExecutor(max_workers=max_in_flight or self.max_in_flight) as pool:
+            level = [(parent_id, blocks)]
+            while len(level) > 0:
+                futures = [pool.submit(self._append_level, parent, children) for parent, children in level]
+                level = [nested for future in futures for nested in future.result()]
+
+    def _append_level(self, parent_id: ID, blocks: List[Block]) -> List[Tuple[ID, List[Block]]]:
+        created = []
+        for batch in chunks(blocks, MAX_APPEND_BLOCKS):
+            result = self.block_append_children(parent_id, batch)
+            created = created + result if result is not None and created is not None else None
+
+        if not any(pending_children(b) for b in blocks):
+            return []
+        if created is None:
+            # Older API versions return the parent, so the ids of new blocks have to be listed
+            created = list(self.block_retrieve_all_children(parent_id))[-len(blocks):]
+        return nested_children(blocks, created)
+
+    def load_children(
+            self,
+            item: Union[Page, Block],
+            recursive=False,
+            databases=False,
+            max_in_flight: Optional[int] = None,
+            pool: Optional[ThreadPoolExecutor] = None,
+            allow_stale: bool = False
+    ):
+        """
+        Loads the children of given item, the whole block tree if recursive. Concurrent loads of multiple trees
+        can share their requests in flight by passing the same `pool`.
+        With `allow_stale` the block cache is used, which misses edits of blocks whose parent was not edited since.
+        """
+        if not recursive:
+            item.set_children(self._retrieve_children(item, allow_stale))
+            return
+
+        if pool is not None:
+            self._load_children_bfs(pool, item, databases, allow_stale)
+            return
+        with ThreadPoolExecutor(max_workers=max_in_flight or self.max_in_flight) as pool:
+            self._load_children_bfs(pool, item, databases, allow_stale)
+
+    def _retrieve_children(self, item: Union[Page, Block], allow_stale: bool = False) -> List[Block]:
+        children = self.cached_children(item, allow_stale)
+        if children is None:
+            children = list(self.block_retrieve_all_children(item.id))
+            self.cache_children(item, children, allow_stale)
+        return children
+
+    def _load_children_bfs(
+            self, pool: ThreadPoolExecutor, item: Union[Page, Block], databases=False, allow_stale: bool = False
+    ):
+        """
+        Loads the block tree level by level. Children of all blocks on a single level are fetched concurrently
+        and attached to their parents in the original order once the whole level is done.
+        """
+        level = [item]
+        while len(level) > 0:
+            children_futures = [pool.submit(self._retrieve_children, parent, allow_stale) for parent in level]
+
+            next_level, database_futures = [], []
+            for parent, future in zip(level, children_futures):
+                children: List[Block] = future.result()
+                parent.set_children(children)
+                for child in children:
+                    if child.has_children and child.get_children() is None:
+                        next_level.append(child)
+                    elif databases and child.type == BlockType.child_database:
+                        database_futures.append((
+                            child,
+                            pool.submit(self.database_get, child.id),
+                            pool.submit(lambda x: list(self.database_query_all(x)), child.id)  # eager load
+                        ))
+
+            for child, database, pages in database_futures:
+                child.child_database.database = database.result()
+                child.child_database.children = pages.result()
+
+            level = next_level
 
     def ensure_database_schema(self, schema: Dict[str, PropertyDef], db: Database):
         new_props = {
@@ -0,0 +1,226 @@
+from typing import List, Optional, Tuple, Iterable
+
+from mistletoe import Document, block_token, span_token
+
+from notionsci.connections.notion.structures import Block, BlockType, RichText, RichTextType, TextObject, \
+    Annotation, ParagraphBlock, Heading1Block, Heading2Block, Heading3Block, BulletedListBlock, NumberedListBlock, \
+    TodoBlock, CodeBlock, EquationBlock, DividerBlock, ImageBlock, FileType, FileTypeObject
+
+MAX_TEXT_LENGTH = 2000
+
+CODE_LANGUAGES = {
+    'abap', 'arduino', 'bash', 'basic', 'c', 'clojure', 'coffeescript', 'c++', 'c#', 'css', 'dart', 'diff', 'docker',
+    'elixir', 'elm', 'erlang', 'flow', 'fortran', 'f#', 'gherkin', 'glsl', 'go', 'graphql', 'groovy', 'haskell',
+    'html', 'java', 'javascript', 'json', 'julia', 'kotlin', 'latex', 'less', 'lisp', 'livescript', 'lua',
+    'makefile', 'markdown', 'markup', 'matlab', 'mermaid', 'nix', 'objective-c', 'ocaml', 'pascal', 'perl', 'php',
+    'plain text', 'powershell', 'prolog', 'protobuf', 'python', 'r', 'reason', 'ruby', 'rust', 'sass', 'scala',
+    'scheme', 'scss', 'shell', 'sql', 'swift', 'typescript', 'vb.net', 'verilog', 'vhdl', 'visual basic',
+    'webassembly', 'xml', 'yaml',
+}
+CODE_LANGUAGE_ALIASES = {
+    'py': 'python', 'js': 'javascript', 'ts': 'typescript', 'sh': 'shell', 'yml': 'yaml', 'tex': 'latex',
+    'cpp': 'c++', 'csharp': 'c#', 'md': 'markdown', 'text': 'plain text', 'txt': 'plain text', 'dockerfile': 'docker',
+}
+
+
+def code_language(language: Optional[str]) -> str:
+    language = (language or '').strip().lower()
+    language = CODE_LANGUAGE_ALIASES.get(language, language)
+    return language if language in CODE_LANGUAGES else 'plain text'
+
+
+def text_objects(content: str, annotations: Optional[Annotation] = None, href: Optional[str] = None) -> List[RichText]:
+    """
+    Rich text objects holding given content, split up to respect the maximal text length
+    """
+    return [
+        RichText(
+            type=RichTextType.text,
+            text=TextObject(
+                content=content[i:i + MAX_TEXT_LENGTH],
+                link={'url': href} if href else None
+            ),
+            annotations=annotations,
+        )
+        for i in range(0, len(content), MAX_TEXT_LENGTH)
+    ]
+
+
+def annotation(bold=False, italic=False, strikethrough=False, code=False) -> Optional[Annotation]:
+    if not (bold or italic or strikethrough or code):
+        return None
+    return Annotation(
+        bold=bold, italic=italic, strikethrough=strikethrough, underline=False, code=code, color='default'
+    )
+
+
+def spans_to_rich_text(tokens: Iterable[span_token.SpanToken], href: Optional[str] = None, **style) -> List[RichText]:
+    result = []
+    for token in tokens:
+        if isinstance(token, span_token.RawText):
+            result.extend(text_objects(token.content, annotation(**style), href))
+        elif isinstance(token, span_token.Strong):
+            result.extend(spans_to_rich_text(token.children, href, **{**style, 'bold': True}))
+        elif isinstance(token, span_token.Emphasis):
+            result.extend(spans_to_rich_text(token.children, href, **{**style, 'italic': True}))
+        elif isinstance(token, span_token.Strikethrough):
+            result.extend(spans_to_rich_text(token.children, href, **{**style, 'strikethrough': True}))
+        elif isinstance(token, span_token.InlineCode):
+            result.extend(spans_to_rich_text(token.children, href, **{**style, 'code': True}))
+        elif isinstance(token, (span_token.Link, span_token.AutoLink)):
+            result.extend(spans_to_rich_text(token.children, token.target, **style))
+        elif isinstance(token, span_token.Image):
+            result.extend(spans_to_rich_text(token.children, token.src, **style))
+        elif isinstance(token, span_token.LineBreak):
+            result.extend(text_objects(' ' if token.soft else '\n', annotation(**style), href))
+        elif getattr(token, 'children', None):
+            result.extend(spans_to_rich_text(token.children, href, **style))
+        elif getattr(token, 'content', None):
+            result.extend(text_objects(token.content, annotation(**style), href))
+
+    return merge_rich_text(result)
+
+
+def merge_rich_text(texts: List[RichText]) -> List[RichText]:
+    """
+    Joins neighbouring rich text objects with the same style to keep payloads small
+    """
+    result = []
+    for text in texts:
+        prev = result[-1] if result else None
+        if prev and prev.annotations == text.annotations and prev.text.link == text.text.link \
+                and len(prev.text.content) + len(text.text.content) <= MAX_TEXT_LENGTH:
+            prev.text.content += text.text.content
+        else:
+            result.append(text)
+    return result
+
+
+def raw_text(token) -> str:
+    if isinstance(token, span_token.LineBreak):
+        return '\n'
+    if getattr(token, 'children', None):
+        return ''.join(raw_text(child) for child in token.children)
+    return getattr(token, 'content', '')
+
+
+def make_block(type: BlockType, part, children: List[Block] = None) -> Block:
+    if children:
+        part.set_children(children)
+    return Block(type=type, has_children=bool(children), **{type.value: part})
+
+
+def heading_block(level: int, text: List[RichText]) -> Block:
+    # Inverse of the export which renders page title as h1 and the notion headings one level lower
+    if level <= 2:
+        return make_block(BlockType.heading_1, Heading1Block(text=text))
+    elif level == 3:
+        return make_block(BlockType.heading_2, Heading2Block(text=text))
+    return make_block(BlockType.heading_3, Heading3Block(text=text))
+
+
+def paragraph_block(token: block_token.Paragraph) -> Block:
+    content = raw_text(token).strip()
+    if content.startswith('$$') and content.endswith('$$') and len(content) > 4:
+        return make_block(BlockType.equation, EquationBlock(expression=content[2:-2].strip()))
+
+    if len(token.children) == 1 and isinstance(token.children[0], span_token.Image) \
+            and token.children[0].src.startswith('http'):
+        image = token.children[0]
+        return make_block(BlockType.image, ImageBlock(
+            type=FileType.external,
+            external=FileTypeObject(url=image.src),
+            caption=spans_to_rich_text(image.children),
+        ))
+
+    return make_block(BlockType.paragraph, ParagraphBlock(text=spans_to_rich_text(token.children)))
+
+
+def list_item_blocks(token: block_token.List) -> List[Block]:
+    result = []
+    for item in token.children:
+        first, rest = (item.children[0], item.children[1:]) \
+            if item.children and isinstance(item.children[0], block_token.Paragraph) else (None, item.children)
+        text = spans_to_rich_text(first.children) if first else []
+        children = tokens_to_blocks(rest)
+
+        checked = None
+        if token.start is None and text and text[0].text.content[:4].lower() in ('[ ] ', '[x] '):
+            checked = text[0].text.content[1].lower() == 'x'
+            text[0].text.content = text[0].text.content[4:]
+
+        if checked is not None:
+            result.append(make_block(BlockType.to_do, TodoBlock(text=text, checked=checked), children))
+        elif token.start is None:
+            result.append(make_block(BlockType.bulleted_list_item, BulletedListBlock(text=text), children))
+        else:
+            result.append(make_block(BlockType.numbered_list_item, NumberedListBlock(text=text), children))
+
+    return result
+
+
+def table_block(token: block_token.Table) -> Block:
+    # The API does not support tables, hence they are kept as markdown source
+    rows = ([token.header] if getattr(token, 'header', None) else []) + list(token.children)
+    lines = ['| ' + ' | '.join(raw_text(cell) for cell in row.children) + ' |' for row in rows]
+    if getattr(token, 'header', None):
+        lines.insert(1, '|' + '---|' * len(token.header.children))
+    return make_block(BlockType.code, CodeBlock(
+        text=text_objects('\n'.join(lines)), language='markdown'
+    ))
+
+
+def tokens_to_blocks(tokens: Iterable[block_token.BlockToken]) -> List[Block]:
+    result = []
+    for token in tokens:
+        if isinstance(token, (block_token.Heading, block_token.SetextHeading)):
+            result.append(heading_block(token.level, spans_to_rich_text(token.children)))
+        elif isinstance(token, block_token.Paragraph):
+            result.append(paragraph_block(token))
+        elif isinstance(token, block_token.List):
+            result.extend(list_item_blocks(token))
+        elif isinstance(token, (block_token.CodeFence, block_token.BlockCode)):
+            result.append(make_block(BlockType.code, CodeBlock(
+                text=text_objects(raw_text(token).rstrip('\n')),
+                language=code_language(getattr(token, 'language', None))
+            )))
+        elif isinstance(token, block_token.Quote):
+            # Quotes are not supported by the API, their content is nested under a paragraph instead
+            quoted = tokens_to_blocks(token.children)
+            if quoted and quoted[0].type == BlockType.paragraph:
+                quoted[0].paragraph.set_children(quoted[1:] or None)
+                quoted[0].has_children = len(quoted) > 1
+                result.append(quoted[0])
+            else:
+                result.extend(quoted)
+        elif isinstance(token, block_token.ThematicBreak):
+            result.append(make_block(BlockType.divider, DividerBlock()))
+        elif isinstance(token, block_token.Table):
+            result.append(table_block(token))
+        elif getattr(token, 'children', None):
+            result.extend(tokens_to_blocks(token.children))
+
+    return result
+
+
+def markdown_to_blocks(content: str) -> List[Block]:
+    """
+    Parses markdown into notion blocks (including their nested children)
+    """
+    return tokens_to_blocks(Document(content).children)
+
+
+def parse_markdown_page(content: str) -> Tuple[Optional[str], List[Block]]:
+    """
+    Parses a markdown page as exported by `Page.to_markdown`. Leading h1 is used as the title and the
+    property table following it is skipped.
+    """
+    tokens = list(Document(content).children)
+    title = None
+    if tokens and isinstance(tokens[0], block_token.Heading) and tokens[0].level == 1:
+        title = raw_text(tokens.pop(0)).strip()
+        if tokens and isinstance(tokens[0], block_token.Table):
+            tokens.pop(0)
+
+    return title, tokens_to_blocks(tokens)
+
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Callable, Any, Awaitable, Dict
+
+import httpx
+from notion_client import Client
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+RETRYABLE_ERRORS = (RequestTimeoutError, httpx.TimeoutException, httpx.NetworkError)
+# Methods which can be safely repeated if Notion may already have applied a failed request
+IDEMPOTENT_METHODS = {'GET', 'PATCH', 'DELETE'}
+# Appending block children is sent as PATCH, but adds the blocks again when repeated
+NON_IDEMPOTENT_PATHS = re.compile(r'^/?blocks/[^/]+/children/?$')
+
+
+@dataclass
+class RequestStats:
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0
+    wait_time: float = 0.0
+    backoff_time: float = 0.0
+
+    def __str__(self):
+        return f'{self.requests} requests ({self.retries} retries, {self.throttled} rate limited), ' \
+               f'waited {self.wait_time:.1f}s on rate limit and {self.backoff_time:.1f}s on backoff'
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket. Callers reserve a token and are told how long to wait for it,
+    which allows the same bucket to pace both threads and coroutines.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+
+        with self.lock:
+            self._refill()
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def pause(self, seconds: float):
+        """
+        Drains the bucket such that no token is handed out in the coming `seconds`
+        """
+        if self.rate <= 0:
+            return
+
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+@dataclass
+class RateLimiter:
+    requests_per_second: float = 3.0
+    burst: int = 3
+    max_retries: int = 5
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+
+    stats: RequestStats = field(default_factory=RequestStats)
+
+    def __post_init__(self):
+        self.bucket = TokenBucket(self.requests_per_second, self.burst)
+        self.stats_lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> float:
+        # Full jitter exponential backoff
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def retry_delay(self, error: Exception, attempt: int, idempotent: bool = True) -> Optional[float]:
+        """
+        Returns number of seconds to wait before retrying or None if the error should be raised.
+        Server errors and timeouts of non idempotent requests are not retried, as the request may have been applied.
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        if isinstance(error, HTTPResponseError):
+            if error.status == 429:
+                retry_after = parse_retry_after(error.headers)
+                return retry_after if retry_after is not None else self.backoff(attempt)
+            elif error.status >= 500 and idempotent:
+                return self.backoff(attempt)
+            return None
+        elif isinstance(error, RETRYABLE_ERRORS) and idempotent:
+            return self.backoff(attempt)
+
+        return None
+
+    def _record(self, **deltas):
+        with self.stats_lock:
+            for k, v in deltas.items():
+                setattr(self.stats, k, getattr(self.stats, k) + v)
+
+    def _on_error(self, error: Exception, attempt: int, idempotent: bool) -> float:
+        delay = self.retry_delay(error, attempt, idempotent)
+        if delay is None:
+            raise error
+
+        throttled = isinstance(error, HTTPResponseError) and error.status == 429
+        if throttled:
+            # Rate limit applies to the integration, so hold back every caller sharing the bucket
+            self.bucket.pause(delay)
+            delay = 0.0
+
+        logging.debug(f'Retrying notion request after {error!r} (attempt {attempt + 1})')
+        self._record(retries=1, throttled=int(throttled), backoff_time=delay)
+        return delay
+
+    def call(self, fn: Callable[[], Any], idempotent: bool = True) -> Any:
+        attempt = 0
+        while True:
+            wait = self.bucket.reserve()
+            self._record(requests=1, wait_time=wait)
+            time.sleep(wait)
+            try:
+                return fn()
+            except Exception as e:
+                time.sleep(self._on_error(e, attempt, idempotent))
+                attempt += 1
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], idempotent: bool = True) -> Any:
+        attempt = 0
+        while True:
+            wait = self.bucket.reserve()
+            self._record(requests=1, wait_time=wait)
+            await asyncio.sleep(wait)
+            try:
+                return await fn()
+            except Exception as e:
+                await asyncio.sleep(self._on_error(e, attempt, idempotent))
+                attempt += 1
+
+
+def is_idempotent(method: str, path: str) -> bool:
+    method = method.upper()
+    if method == 'PATCH' and NON_IDEMPOTENT_PATHS.match(path):
+        return False
+    return method in IDEMPOTENT_METHODS
+
+
+def parse_retry_after(headers: Optional[Dict[str, str]]) -> Optional[float]:
+    try:
+        return float(headers.get('Retry-After')) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_response(client: Client, response: httpx.Response) -> Any:
+    """
+    Parses the response like the upstream client, but raises an HTTPResponseError for error responses
+    without a json body (such as gateway errors) instead of a decode error
+    """
+    try:
+        return Client._parse_response(client, response)
+    except ValueError:
+        if response.is_error:
+            raise HTTPResponseError(response)
+        raise
+
+
+class RateLimitedClient(Client):
+    """
+    Notion client that paces every request through a (shareable) RateLimiter and retries
+    rate limited, failed and timed out requests
+    """
+
+    def __init__(self, *args, limiter: Optional[RateLimiter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter or RateLimiter()
+
+    def request(
+            self,
+            path: str,
+            method: str,
+            query: Optional[Dict[Any, Any]] = None,
+            body: Optional[Dict[Any, Any]] = None,
+            auth: Optional[str] = None,
+    ) -> Any:
+        return self.limiter.call(
+            lambda: Client.request(self, path, method, query, body, auth),
+            idempotent=is_idempotent(method, path)
+        )
+
+    def _parse_response(self, response: httpx.Response) -> Any:
+        return parse_response(self, response)
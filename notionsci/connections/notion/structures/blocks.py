@@ -2,15 +2,13 @@ import datetime as dt
 import urllib.parse
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional, List, Union, Callable
+from typing import Optional, List, Union, Callable, TextIO
 
-import pandas as pd
-from dataclass_dict_convert import dataclass_dict_convert
 from stringcase import snakecase
 
 from notionsci.connections.notion.structures.common import FileObject, RichText, ID
 from notionsci.utils import ForwardRefConvertor, ListConvertor, ToMarkdownMixin, MarkdownBuilder, MarkdownContext, \
-    chain_to_markdown, ignore_fields
+    chain_to_markdown, ignore_fields, dataclass_codec, slotted, write_chain_markdown
 from notionsci.utils.markdown import MarkdownListType
 
 
@@ -45,6 +43,7 @@ def block_type_filter(t: 'BlockType'):
     return lambda b: b.type == t
 
 
+@slotted
 @dataclass
 class ChildrenMixin:
     children: Optional[List['Block']] = None
@@ -56,10 +55,11 @@ class ChildrenMixin:
         return self.children if not predicate else list(filter(predicate, self.children))
 
 
-@dataclass_dict_convert(
+@dataclass_codec(
     dict_letter_case=snakecase,
     custom_type_convertors=[BlockConvertor]
 )
+@slotted
 @dataclass
 class ParagraphBlock(ToMarkdownMixin, ChildrenMixin):
     text: List[RichText] = field(default_factory=list)
@@ -76,11 +76,23 @@ class ParagraphBlock(ToMarkdownMixin, ChildrenMixin):
 
         return f'{content}\n{children}' if children else content
 
+    def write_markdown(self, context: MarkdownContext, sink: TextIO, lead: str = '') -> bool:
+        sink.write(lead)
+        sink.write(MarkdownBuilder.heading(chain_to_markdown(self.text, context), 'paragraph'))
+        if self.get_children():
+            write_chain_markdown(
+                self.children,
+                context.copy(depth=context.depth + 1, counter=1),
+                sink, sep='\n', prefix='    ' * (context.depth + 1), lead='\n'
+            )
+        return True
+
 
-@dataclass_dict_convert(
+@dataclass_codec(
     dict_letter_case=snakecase,
     custom_type_convertors=[BlockConvertor]
 )
+@slotted
 @dataclass
 class ListBlock(ToMarkdownMixin, ChildrenMixin):
     text: List[RichText] = field(default_factory=list)
@@ -96,6 +108,18 @@ class ListBlock(ToMarkdownMixin, ChildrenMixin):
 
         return f'{content}\n{children}' if children else content
 
+    def write_markdown(self, context: MarkdownContext, sink: TextIO, lead: str = '') -> bool:
+        prefix = self._prefix() * (context.depth + 1)
+        sink.write(lead)
+        sink.write(self._markdown_format_fn()(chain_to_markdown(self.text, context.copy(counter=1)), context))
+        if self.get_children():
+            write_chain_markdown(
+                self.children,
+                context.copy(depth=context.depth + 1, counter=1),
+                sink, sep='\n', prefix=prefix, lead='\n'
+            )
+        return True
+
     def _prefix(self) -> str:
         return '  '
 
@@ -103,20 +127,22 @@ class ListBlock(ToMarkdownMixin, ChildrenMixin):
         return lambda x, ctx: x
 
 
-@dataclass_dict_convert(
+@dataclass_codec(
     dict_letter_case=snakecase,
     custom_type_convertors=[BlockConvertor]
 )
+@slotted
 @dataclass
 class BulletedListBlock(ListBlock):
     def _markdown_format_fn(self):
         return lambda x, ctx: MarkdownBuilder.list(x, ctx, MarkdownListType.bullet)
 
 
-@dataclass_dict_convert(
+@dataclass_codec(
     dict_letter_case=snakecase,
     custom_type_convertors=[BlockConvertor]
 )
+@slotted
 @dataclass
 class NumberedListBlock(ListBlock):
     def _markdown_format_fn(self):
@@ -129,10 +155,11 @@ class NumberedListBlock(ListBlock):
         return '    '
 
 
-@dataclass_dict_convert(
+@dataclass_codec(
     dict_letter_case=snakecase,
     custom_type_convertors=[BlockConvertor]
 )
+@slotted
 @dataclass
 class TodoBlock(ListBlock):
     checked: Optional[bool] = None
@@ -141,10 +168,11 @@ class TodoBlock(ListBlock):
         return lambda x, ctx: MarkdownBuilder.todo(x, self.checked)
 
 
-@dataclass_dict_convert(
+@dataclass_codec(
     dict_letter_case=snakecase,
     custom_type_convertors=[BlockConvertor]
 )
+@slotted
 @dataclass
 class ToggleBlock(ListBlock):
     def to_markdown(self, context: MarkdownContext) -> str:
@@ -157,13 +185,26 @@ class ToggleBlock(ListBlock):
 
         return MarkdownBuilder.toggle(title, content)
 
+    def write_markdown(self, context: MarkdownContext, sink: TextIO, lead: str = '') -> bool:
+        if not self.get_children():
+            return ToMarkdownMixin.write_markdown(self, context, sink, lead)
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+        head, tail = MarkdownBuilder.toggle_parts(chain_to_markdown(self.text, context.copy(counter=1)))
+        sink.write(lead)
+        sink.write(head)
+        write_chain_markdown(self.children, context.copy(counter=1), sink, sep='\n')
+        sink.write(tail)
+        return True
+
+
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class ChildPageBlock:
     title: str
 
 
+@slotted
 @dataclass
 class HeadingBlock(ToMarkdownMixin):
     text: List[RichText]
@@ -172,28 +213,32 @@ class HeadingBlock(ToMarkdownMixin):
         return chain_to_markdown(self.text, context)
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class Heading1Block(HeadingBlock):
     def to_markdown(self, context: MarkdownContext) -> str:
         return MarkdownBuilder.heading(super().to_markdown(context), 'h2')
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class Heading2Block(HeadingBlock):
     def to_markdown(self, context: MarkdownContext) -> str:
         return MarkdownBuilder.heading(super().to_markdown(context), 'h3')
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class Heading3Block(HeadingBlock):
     def to_markdown(self, context: MarkdownContext) -> str:
         return MarkdownBuilder.heading(super().to_markdown(context), 'h4')
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class EmbedBlock(ToMarkdownMixin):
     url: str
@@ -206,13 +251,15 @@ class EmbedBlock(ToMarkdownMixin):
         )
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class BookmarkBlock(EmbedBlock):
     pass
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class ImageBlock(FileObject):
     def to_markdown(self, context: MarkdownContext) -> str:
@@ -221,7 +268,8 @@ class ImageBlock(FileObject):
             caption=self.to_markdown_caption(context))
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class PdfBlock(FileObject):
     def to_markdown(self, context: MarkdownContext) -> str:
@@ -230,7 +278,8 @@ class PdfBlock(FileObject):
             caption=self.to_markdown_caption(context) or ' ')
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class VideoBlock(FileObject):
     def to_markdown(self, context: MarkdownContext) -> str:
@@ -239,7 +288,8 @@ class VideoBlock(FileObject):
             caption=self.to_markdown_caption(context) or ' ')
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class EquationBlock(ToMarkdownMixin):
     expression: str
@@ -248,7 +298,8 @@ class EquationBlock(ToMarkdownMixin):
         return MarkdownBuilder.equation(self.expression)
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class CodeBlock(ToMarkdownMixin):
     text: List[RichText]
@@ -259,24 +310,27 @@ class CodeBlock(ToMarkdownMixin):
         return MarkdownBuilder.code(content, self.language)
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class TableOfContentsBlock(ToMarkdownMixin):
     def to_markdown(self, context: MarkdownContext) -> str:
         return MarkdownBuilder.table_of_contents()
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class DividerBlock(ToMarkdownMixin):
     def to_markdown(self, context: MarkdownContext) -> str:
         return MarkdownBuilder.divider()
 
 
-@dataclass_dict_convert(
+@dataclass_codec(
     dict_letter_case=snakecase,
     **ignore_fields(['database', 'children'])
 )
+@slotted
 @dataclass
 class ChildDatabaseBlock(ToMarkdownMixin):
     title: str
@@ -285,14 +339,13 @@ class ChildDatabaseBlock(ToMarkdownMixin):
 
     def to_markdown(self, context: MarkdownContext) -> str:
         if self.database and self.children:
-            df = pd.DataFrame([
+            return MarkdownBuilder.table([
                 {
                     prop_name: child.get_property(prop_name).to_markdown(context)
                     for prop_name, prop in self.database.properties.items()
                 }
                 for child in self.children
-            ])
-            return MarkdownBuilder.table(df)
+            ], columns=list(self.database.properties.keys()))
         else:
             return f'Table {self.title}\n'
 
@@ -300,7 +353,8 @@ class ChildDatabaseBlock(ToMarkdownMixin):
 FileBlock = FileObject
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted(variants=[t.value for t in BlockType])
 @dataclass
 class Block(ToMarkdownMixin):
     object: str = 'block'
@@ -344,6 +398,12 @@ class Block(ToMarkdownMixin):
         else:
             raise Exception('unsupported! ' + self.type.value)
 
+    def write_markdown(self, context: MarkdownContext, sink: TextIO, lead: str = '') -> bool:
+        part = self.get_part()
+        if self.type != BlockType.unsupported and isinstance(part, ToMarkdownMixin):
+            return part.write_markdown(context, sink, lead)
+        return super().write_markdown(context, sink, lead)
+
     def get_part(self) -> Union[ToMarkdownMixin]:
         return getattr(self, self.type.value)
 
@@ -3,17 +3,16 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Optional, Dict, Union, List
 
-from dataclass_dict_convert import dataclass_dict_convert
 from stringcase import snakecase
 
 from notionsci.utils import UnionConvertor, ToMarkdownMixin, MarkdownContext, MarkdownBuilder, chain_to_markdown, \
-    Undefinable, serde
+    Undefinable, serde, dataclass_codec, slotted
 
 Color = str
 ID = str
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
 @dataclass
 class UserObject:
     object: str = 'user'
@@ -32,7 +31,8 @@ class RichTextType(Enum):
     equation = 'inline_equation'
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class Annotation:
     bold: bool
@@ -59,7 +59,8 @@ class Annotation:
         return text
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class TextObject:
     content: str
@@ -69,7 +70,8 @@ class TextObject:
         return self.content
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
+@slotted
 @dataclass
 class EquationObject:
     expression: str
@@ -78,7 +80,7 @@ class EquationObject:
         return self.expression
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
 @dataclass
 class PageMention:
     id: ID
@@ -96,6 +98,7 @@ class MentionObject:
 
 
 @serde()
+@slotted
 @dataclass
 class RichText(ToMarkdownMixin):
     type: RichTextType
@@ -176,7 +179,7 @@ class FileObject(ToMarkdownMixin):
         return MarkdownBuilder.url(self.get_url(), self.name or self.to_markdown_caption(context))
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
 @dataclass
 class EmojiObject:
     emoji: str
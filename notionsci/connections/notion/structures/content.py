@@ -1,10 +1,9 @@
 import datetime as dt
+from collections.abc import MutableMapping
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional, Dict, TypeVar, Generic, Iterator, Any
+from typing import Optional, Dict, TypeVar, Generic, Iterator, Any, Callable, TextIO
 
-import pandas as pd
-from dataclass_dict_convert import dataclass_dict_convert
 from stringcase import snakecase
 
 from notionsci.connections.notion.structures.blocks import ChildrenMixin, BlockConvertor
@@ -12,7 +11,7 @@ from notionsci.connections.notion.structures.common import FileObject, ID, \
     UnionEmojiFileConvertor, EmojiFileType
 from notionsci.connections.notion.structures.properties import PropertyDef, TitleValue, PropertyType, Property
 from notionsci.utils import ToMarkdownMixin, MarkdownContext, chain_to_markdown, MarkdownBuilder, filter_not_none, \
-    Undefinable, serde
+    Undefinable, serde, dataclass_codec, write_chain_markdown
 
 
 class ParentType(Enum):
@@ -24,7 +23,56 @@ class ParentType(Enum):
 PT = TypeVar('PT', Property, PropertyDef)
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+class LazyProperties(MutableMapping):
+    """
+    Properties as returned by the api, each one is decoded on first access and memoized.
+    Avoids building every property of every page when only a few of them are read.
+    """
+
+    def __init__(self, values: Dict[str, Any], decode: Callable[[dict], PT]):
+        self._values = dict(values)
+        self._decode = decode
+
+    def __getitem__(self, name: str) -> PT:
+        value = self._values[name]
+        if isinstance(value, dict):
+            value = self._values[name] = self._decode(value)
+        return value
+
+    def __setitem__(self, name: str, value: PT):
+        self._values[name] = value
+
+    def __delitem__(self, name: str):
+        del self._values[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self._values
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def copy(self) -> 'LazyProperties':
+        return LazyProperties(self._values, self._decode)
+
+    def is_decoded(self, name: str) -> bool:
+        return not isinstance(self._values[name], dict)
+
+    def type_of(self, name: str) -> Optional[PropertyType]:
+        value = self._values[name]
+        return PropertyType.__members__.get(value.get('type')) if isinstance(value, dict) else value.type
+
+    @staticmethod
+    def from_dict_convertor(decode: Callable[[dict], PT]) -> Callable[[Dict[str, dict]], 'LazyProperties']:
+        return lambda values: LazyProperties(values, decode)
+
+
+@dataclass_codec(dict_letter_case=snakecase)
 @dataclass
 class HasPropertiesMixin(Generic[PT]):
     properties: Dict[str, PT] = field(default_factory=dict)
@@ -42,16 +90,27 @@ class HasPropertiesMixin(Generic[PT]):
         return self.get_property(name).value() if name in self.properties else default
 
     def get_property_by_type(self, type: PropertyType) -> Iterator[PT]:
+        if isinstance(self.properties, LazyProperties):
+            return (self.properties[name] for name in self.properties if self.properties.type_of(name) == type)
         return filter(lambda x: x.type == type, self.properties.values())
 
     def extend_properties(self, properties: Dict[str, PT]):
-        self.properties = {
-            **self.properties,
-            **properties
+        extended = self.properties.copy()
+        extended.update(properties)
+        self.properties = extended
+
+    def diff_properties(self, properties: Dict[str, Property]) -> Dict[str, Property]:
+        """
+        Subset of given properties whose value differs from the current one
+        """
+        return {
+            name: prop
+            for name, prop in properties.items()
+            if name not in self.properties or not self.properties[name].same_value(prop)
         }
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
 @dataclass
 class Parent:
     type: ParentType
@@ -68,7 +127,7 @@ class Parent:
         return Parent(type=ParentType.database, database_id=id)
 
 
-@dataclass_dict_convert(
+@dataclass_codec(
     dict_letter_case=snakecase,
     custom_type_convertors=[UnionEmojiFileConvertor]
 )
@@ -88,6 +147,9 @@ class ContentObject:
 
 @serde(
     custom_type_convertors=[UnionEmojiFileConvertor, BlockConvertor],
+    custom_from_dict_convertors={
+        'properties': LazyProperties.from_dict_convertor(Property.from_dict)
+    },
     exclude=['children']
 )
 @dataclass
@@ -100,17 +162,31 @@ class Page(ContentObject, ToMarkdownMixin, ChildrenMixin, HasPropertiesMixin[Pro
 
     def to_markdown(self, context: MarkdownContext) -> str:
         title = MarkdownBuilder.heading(self.get_title(), 'h1')
-        prop_data = [
-            {'Name': name, 'Value': prop.to_markdown(context)} for name, prop in self.properties.items()
-            if prop.type != PropertyType.title
-        ]
-        props = MarkdownBuilder.table(pd.DataFrame(prop_data)) + '\n' if prop_data else None
+        props = self._properties_markdown(context)
         content = chain_to_markdown(self.children, context, sep='\n')
 
         return '\n'.join(filter_not_none([
             title, props, content
         ]))
 
+    def write_markdown(self, context: MarkdownContext, sink: TextIO, lead: str = '') -> bool:
+        sink.write(lead)
+        sink.write(MarkdownBuilder.heading(self.get_title(), 'h1'))
+        props = self._properties_markdown(context)
+        if props is not None:
+            sink.write('\n')
+            sink.write(props)
+        sink.write('\n')
+        write_chain_markdown(self.children, context, sink, sep='\n')
+        return True
+
+    def _properties_markdown(self, context: MarkdownContext) -> Optional[str]:
+        prop_data = [
+            {'Name': name, 'Value': prop.to_markdown(context)} for name, prop in self.properties.items()
+            if prop.type != PropertyType.title
+        ]
+        return MarkdownBuilder.table(prop_data, columns=['Name', 'Value']) + '\n' if prop_data else None
+
     def get_title(self):
         return next(map(lambda x: x.value(), self.get_property_by_type(PropertyType.title)), '')
 
@@ -88,6 +88,13 @@ def object_to_text_value(raw_value: Any):
     return str(raw_value)
 
 
+def parse_date_value(value: Optional[str]) -> Optional[Any]:
+    try:
+        return dt.datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return value
+
+
 def object_to_markdown(raw_value: Any, context: MarkdownContext, sep=' '):
     if isinstance(raw_value, list):
         return sep.join([object_to_markdown(v, context) for v in raw_value])
@@ -153,6 +160,32 @@ class Property(ToMarkdownMixin):
             sep=',+ ' if self.type == PropertyType.multi_select else ' '
         )
 
+    def canonical_value(self) -> Any:
+        """
+        Value stripped of server assigned and presentational details (ids, colors, annotations)
+        such that a property read from notion compares equal to the one it was written with
+        """
+        value = self._value()
+        if not value and not isinstance(value, (bool, int, float)):
+            return None
+
+        if self.type in (PropertyType.title, PropertyType.rich_text):
+            return ''.join(text.text_value() for text in value) or None
+        elif self.type == PropertyType.select:
+            return value.name
+        elif self.type == PropertyType.multi_select:
+            return sorted(option.name for option in value)
+        elif self.type == PropertyType.relation:
+            return sorted(item.id.replace('-', '') for item in value)
+        elif self.type == PropertyType.date:
+            return parse_date_value(value.start), parse_date_value(value.end)
+        elif hasattr(value, 'to_dict'):
+            return value.to_dict()
+        return value
+
+    def same_value(self, other: 'Property') -> bool:
+        return self.type == other.type and self.canonical_value() == other.canonical_value()
+
     @staticmethod
     def as_title(text: str) -> 'Property':
         return Property(
@@ -2,12 +2,11 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional, List, Dict, Union
 
-from dataclass_dict_convert import dataclass_dict_convert
 from stringcase import snakecase
 
 from notionsci.connections.notion.structures.blocks import Block
 from notionsci.connections.notion.structures.content import Database, Page
-from notionsci.utils import filter_none_dict, ListConvertor, UnionConvertor
+from notionsci.utils import filter_none_dict, ListConvertor, UnionConvertor, dataclass_codec
 
 
 def result_item_from_dict(x: dict):
@@ -25,7 +24,7 @@ ResultItem = Union[Page, Database, Block]
 ResultConverter = ListConvertor(UnionConvertor(ResultItem, result_item_from_dict))
 
 
-@dataclass_dict_convert(
+@dataclass_codec(
     dict_letter_case=snakecase,
     custom_type_convertors=[ResultConverter],
 )
@@ -50,7 +49,7 @@ class SortDirection(Enum):
     descending = 'descending'
 
 
-@dataclass_dict_convert(dict_letter_case=snakecase)
+@dataclass_codec(dict_letter_case=snakecase)
 @dataclass
 class SortObject:
     direction: SortDirection
@@ -1,3 +1,5 @@
 from .structures import *
 from .helpers import *
+from .cache import *
+from .mirror import *
 from .client import *
@@ -0,0 +1,94 @@
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Set, Union
+
+from notionsci.connections.zotero.structures import ID, Item, Collection
+from notionsci.utils import load_json, save_json
+
+CACHE_VERSION = 1
+
+
+@dataclass
+class LibraryChanges:
+    """
+    Entities changed in a Zotero library since a given library version
+    """
+    since: int
+    version: int
+    items: List[Item] = field(default_factory=list)
+    collections: List[Collection] = field(default_factory=list)
+    deleted_items: List[ID] = field(default_factory=list)
+    deleted_collections: List[ID] = field(default_factory=list)
+
+    def item_keys(self) -> Set[ID]:
+        return {x.key for x in self.items}.union(self.deleted_items)
+
+    def collection_keys(self) -> Set[ID]:
+        return {x.key for x in self.collections}.union(self.deleted_collections)
+
+
+def is_trashed(entity: Union[Item, Collection]) -> bool:
+    properties = getattr(entity.data, 'properties', None) or {}
+    return bool(properties.get('deleted', False))
+
+
+@dataclass
+class LibraryCache:
+    """
+    Local copy of a Zotero library kept up to date with version based deltas
+    """
+    path: Optional[str] = None
+    version: int = 0
+    items: Dict[ID, dict] = field(default_factory=dict)
+    collections: Dict[ID, dict] = field(default_factory=dict)
+
+    @staticmethod
+    def load(path: str) -> 'LibraryCache':
+        raw = load_json(path, {})
+        if raw.get('cache_version') != CACHE_VERSION:
+            return LibraryCache(path)
+
+        return LibraryCache(
+            path,
+            version=raw.get('version', 0),
+            items=raw.get('items', {}),
+            collections=raw.get('collections', {}),
+        )
+
+    def save(self):
+        if not self.path:
+            return
+
+        save_json(self.path, {
+            'cache_version': CACHE_VERSION,
+            'version': self.version,
+            'items': self.items,
+            'collections': self.collections,
+        })
+
+    def reset(self):
+        self.version = 0
+        self.items = {}
+        self.collections = {}
+
+    def apply(self, changes: LibraryChanges):
+        for item in changes.items:
+            if is_trashed(item):
+                self.items.pop(item.key, None)
+            else:
+                self.items[item.key] = Item.to_dict(item)
+
+        for collection in changes.collections:
+            self.collections[collection.key] = Collection.to_dict(collection)
+
+        for key in changes.deleted_items:
+            self.items.pop(key, None)
+        for key in changes.deleted_collections:
+            self.collections.pop(key, None)
+
+        self.version = max(self.version, changes.version)
+
+    def get_items(self) -> List[Item]:
+        return [Item.from_dict(raw) for raw in self.items.values()]
+
+    def get_collections(self) -> List[Collection]:
+        return [Collection.from_dict(raw) for raw in self.collections.values()]
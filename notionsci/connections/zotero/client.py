@@ -1,18 +1,69 @@
-from dataclasses import dataclass
-from typing import Optional, List, Dict, Callable, Any, Iterator, TypeVar, Union
+import copy
+import dataclasses
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Callable, Any, Iterator, TypeVar, Union, Tuple
 
-from pyzotero.zotero import Zotero
+import requests
+from pyzotero.zotero import Zotero, error_handler
 
 from notionsci.connections.notion import NotionNotAttachedException
 from notionsci.connections.zotero import Entity
+from notionsci.connections.zotero.cache import LibraryCache, LibraryChanges
+from notionsci.connections.zotero.mirror import LibraryMirror
 from notionsci.connections.zotero.structures import SearchParameters, SearchPagination, Item, ID, Collection
-from notionsci.utils import list_from_dict
+from notionsci.utils import list_from_dict, chunks
+
+T = TypeVar('T')
+
+# Maximal number of objects the api accepts in a single write request
+MAX_WRITE_OBJECTS = 50
+# Number of times a write rejected with one of the status codes below is retried
+MAX_WRITE_RETRIES = 5
+RETRY_STATUS_CODES = {429, 503}
 
 
 class ZoteroNotAttachedException(Exception):
     pass
 
 
+@dataclass
+class WriteFailure:
+    key: ID
+    code: int
+    message: str
+
+
+@dataclass
+class WriteResult:
+    """
+    Outcome of a write per object. Successfully written objects are mapped to their new version
+    """
+    successful: Dict[ID, int] = field(default_factory=dict)
+    unchanged: List[ID] = field(default_factory=list)
+    failed: Dict[ID, WriteFailure] = field(default_factory=dict)
+
+    def add_response(self, keys: List[ID], response: dict):
+        for index, obj in response.get('successful', {}).items():
+            self.successful[keys[int(index)]] = obj.get('version', obj.get('data', {}).get('version'))
+        for index in response.get('unchanged', {}).keys():
+            self.unchanged.append(keys[int(index)])
+        for index, failure in response.get('failed', {}).items():
+            key = keys[int(index)]
+            self.failed[key] = WriteFailure(key, failure.get('code', 0), failure.get('message', ''))
+
+    def error(self, key: ID) -> Optional[Exception]:
+        if key in self.failed:
+            failure = self.failed[key]
+            return Exception(f'Zotero rejected {key} ({failure.code}): {failure.message}')
+        if key not in self.successful and key not in self.unchanged:
+            return Exception(f'Zotero did not report the outcome of writing {key}')
+        return None
+
+
 @dataclass
 class ZoteroApiMixin:
     client: Optional[Zotero] = None
@@ -35,32 +86,47 @@ class ZoteroApiMixin:
 
 @dataclass
 class ZoteroClient(ZoteroApiMixin):
+    cache: Optional[Union[LibraryCache, LibraryMirror]] = None
+    changes: Optional[LibraryChanges] = None
+    # Number of pages fetched concurrently once the total number of results is known, 1 fetches them one by one
+    max_in_flight: int = 1
+
     def collections(
             self,
             params: Optional[SearchParameters] = None,
             pagination: Optional[SearchPagination] = None,
             **kwargs
     ) -> List[Item]:
-        result_raw = self.client.collections(
-            **(params.to_query() if params else {}),
-            **(pagination.to_query() if pagination else {}),
-            **kwargs
-        )
-        return list_from_dict(Collection, result_raw)
+        return query_entities(self.client.collections, Collection, params, pagination, **kwargs)
 
     def all_collections(
             self,
             params: Optional[SearchParameters] = None,
             pagination: Optional[SearchPagination] = None,
+            ordered: bool = True,
     ):
-        yield from traverse_pagination(
-            pagination, lambda pagination: self.collections(params, pagination)
+        yield from self.traverse(
+            lambda client, pagination: query_entities(client.collections, Collection, params, pagination),
+            pagination, ordered
         )
 
-    def update_items(self, items: List[Item]) -> Item:
-        args = [Item.to_dict(item)['data'] for item in items]
-        res = self.client.update_items(args)
-        return res
+    def update_items(self, items: List[Item], fields: Optional[List[str]] = None) -> WriteResult:
+        """
+        Writes given items in chunks the api accepts, only the given `fields` of the item data if specified.
+        Every item carries its version as precondition, hence items modified in the meantime fail with 412
+        instead of being overwritten.
+        """
+        payload = []
+        for item in items:
+            data = Item.to_dict(item)['data']
+            if fields is not None:
+                data = {k: v for k, v in data.items() if k in {'key', 'version', *fields}}
+            payload.append(data)
+
+        result = WriteResult()
+        for chunk in chunks(payload, MAX_WRITE_OBJECTS):
+            result.add_response([data['key'] for data in chunk], post_json(self.client, 'items', chunk))
+        return result
 
     def items(
             self,
@@ -68,31 +134,107 @@ class ZoteroClient(ZoteroApiMixin):
             pagination: Optional[SearchPagination] = None,
             **kwargs
     ) -> List[Item]:
-        result_raw = self.client.items(
-            **(params.to_query() if params else {}),
-            **(pagination.to_query() if pagination else {}),
-            **kwargs
-        )
-        return list_from_dict(Item, result_raw)
+        return query_entities(self.client.items, Item, params, pagination, **kwargs)
 
     def all_items(
             self,
             params: Optional[SearchParameters] = None,
             pagination: Optional[SearchPagination] = None,
+            ordered: bool = True,
     ):
-        yield from traverse_pagination(
-            pagination, lambda pagination: self.items(params, pagination)
+        yield from self.traverse(
+            lambda client, pagination: query_entities(client.items, Item, params, pagination),
+            pagination, ordered
         )
 
+    def search_items(
+            self,
+            params: Optional[SearchParameters] = None,
+            pagination: Optional[SearchPagination] = None,
+    ) -> List[Item]:
+        """
+        Items matching given search parameters. Served from the local mirror if one is attached,
+        a single page is returned if pagination is given.
+        """
+        if isinstance(self.cache, LibraryMirror) and self.refresh_cache():
+            return self.cache.query_items(params, pagination)
+        if pagination:
+            return self.items(params, pagination)
+        return list(self.all_items(params))
+
+    def traverse(
+            self,
+            query_fn: Callable[[Zotero, SearchPagination], List[T]],
+            pagination: Optional[SearchPagination] = None,
+            ordered: bool = True,
+    ) -> Iterator[T]:
+        """
+        Fetches all pages of a query. Pages following the first one are fetched concurrently if `max_in_flight`
+        is above 1, unless `ordered` they are yielded as soon as they arrive.
+        """
+        if self.max_in_flight <= 1:
+            yield from traverse_pagination(pagination, lambda pagination: query_fn(self.client, pagination))
+            return
+
+        # Pyzotero keeps the query parameters and the last response on the instance, hence a copy per thread
+        clients = threading.local()
+
+        def query(pagination: SearchPagination) -> Tuple[List[T], Optional[int]]:
+            if not hasattr(clients, 'client'):
+                clients.client = copy.copy(self.client)
+            return query_fn(clients.client, pagination), total_results(clients.client)
+
+        yield from traverse_pagination_parallel(pagination, query, self.max_in_flight, ordered)
+
+    def library_version(self) -> int:
+        return self.client.last_modified_version()
+
+    def deleted(self, since: int) -> Dict[str, List[ID]]:
+        return self.client.deleted(since=since)
+
+    def changes_since(self, since: int = 0) -> LibraryChanges:
+        """
+        Fetches items and collections modified since given library version (everything if 0)
+        together with tombstones of the deleted ones. Trashed items are included such that they can be evicted.
+        """
+        # Version is determined upfront, anything modified in the meantime will be refetched next time
+        version = self.library_version()
+        deleted = self.deleted(since) if since else {}
+
+        return LibraryChanges(
+            since=since,
+            version=version,
+            items=list(self.all_items(SearchParameters(since=since or None, include_trashed=1), ordered=False)),
+            collections=list(self.all_collections(SearchParameters(since=since or None), ordered=False)),
+            deleted_items=deleted.get('items', []),
+            deleted_collections=deleted.get('collections', []),
+        )
+
+    def refresh_cache(self, full: bool = False) -> Optional[LibraryChanges]:
+        """
+        Brings the local library cache up to date (once per client). Returns None if no cache is attached.
+        """
+        if not self.cache:
+            return None
+
+        if self.changes is None:
+            if full:
+                self.cache.reset()
+            self.changes = self.changes_since(self.cache.version)
+            self.cache.apply(self.changes)
+            self.cache.save()
+
+        return self.changes
+
     def all_items_grouped(self, delete_children: bool = True) -> List[Item]:
-        return group_entities(self.all_items(), lambda x: x.data.parent_item, delete_children)
+        items = self.cache.get_items() if self.refresh_cache() else self.all_items()
+        return group_entities(items, lambda x: x.data.parent_item, delete_children)
 
     def all_collections_grouped(self, delete_children: bool = True) -> List[Collection]:
-        return group_entities(self.all_collections(), lambda x: x.data.parent_collection, delete_children)
+        collections = self.cache.get_collections() if self.refresh_cache() else self.all_collections()
+        return group_entities(collections, lambda x: x.data.parent_collection, delete_children)
 
 
-T = TypeVar('T')
-
 
 def traverse_pagination(
         args: Optional[SearchPagination],
@@ -111,6 +253,97 @@ def traverse_pagination(
         yield from result
 
 
+def traverse_pagination_parallel(
+        args: Optional[SearchPagination],
+        query_fn: Callable[[SearchPagination], Tuple[List[T], Optional[int]]],
+        max_in_flight: int,
+        ordered: bool = True
+) -> Iterator[T]:
+    """
+    Reads the total number of results from the first page and fetches the remaining pages concurrently.
+    Falls back to fetching page by page if the total is unknown or turns out too low.
+    """
+    if not args:
+        args = SearchPagination()
+
+    first, total = query_fn(args)
+    yield from first
+    if len(first) < args.limit:
+        return
+
+    start = args.start + args.limit
+    if total is not None:
+        if total <= start:
+            return
+
+        pages = [dataclasses.replace(args, start=offset) for offset in range(start, total, args.limit)]
+        start = pages[-1].start + args.limit
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            futures = [pool.submit(query_fn, page) for page in pages]
+            for future in futures if ordered else as_completed(futures):
+                yield from future.result()[0]
+
+        if len(futures[-1].result()[0]) < args.limit:
+            return
+
+    # Library grew while fetching or the total is not reported
+    yield from traverse_pagination(
+        dataclasses.replace(args, start=start), lambda pagination: query_fn(pagination)[0]
+    )
+
+
+def query_entities(
+        fn: Callable[..., List[dict]],
+        cls,
+        params: Optional[SearchParameters] = None,
+        pagination: Optional[SearchPagination] = None,
+        **kwargs
+) -> List[T]:
+    result_raw = fn(
+        **(params.to_query() if params else {}),
+        **(pagination.to_query() if pagination else {}),
+        **kwargs
+    )
+    return list_from_dict(cls, result_raw)
+
+
+def post_json(client: Zotero, path: str, payload: Any, max_retries: int = MAX_WRITE_RETRIES) -> dict:
+    """
+    Posts given payload with the backoff handling of pyzotero. Requests the api rejects with 429 or 503
+    are retried after the requested `Retry-After`/`Backoff` delay (or an exponential one) at most `max_retries` times.
+    """
+    url = f'{client.endpoint}/{client.library_type}/{client.library_id}/{path}'
+    headers = {**client.default_headers(), 'Content-Type': 'application/json'}
+    data = json.dumps(payload)
+    for attempt in range(max_retries + 1):
+        # Wait for a backoff requested by an earlier response to the same client
+        client._check_backoff()
+        response = requests.post(url, headers=headers, data=data)
+        client.request = response
+
+        backoff = response.headers.get('Backoff') or response.headers.get('Retry-After')
+        if response.status_code in RETRY_STATUS_CODES and attempt < max_retries:
+            time.sleep(float(backoff) if backoff else 2 ** attempt)
+            continue
+
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            error_handler(client, response, e)
+            raise
+
+        # Api asks to slow down, honor it before the next request
+        if backoff:
+            client._set_backoff(backoff)
+        return response.json()
+
+
+def total_results(client: Zotero) -> Optional[int]:
+    request = getattr(client, 'request', None)
+    total = request.headers.get('Total-Results') if request is not None else None
+    return int(total) if total is not None else None
+
+
 def group_entities(
         items: Iterator[Union[Entity, T]],
         parent_key: Callable[[T], ID],
@@ -0,0 +1,246 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Optional, List, Tuple, Iterable
+
+from notionsci.connections.zotero.cache import LibraryChanges, is_trashed
+from notionsci.connections.zotero.structures import ID, Item, Collection, SearchParameters, SearchPagination
+
+MIRROR_VERSION = 1
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)',
+    '''CREATE TABLE IF NOT EXISTS items (
+        key TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        parent_item TEXT,
+        item_type TEXT,
+        title TEXT,
+        creator_summary TEXT,
+        date_added TEXT,
+        date_modified TEXT,
+        data TEXT NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS items_parent_item ON items (parent_item)',
+    'CREATE INDEX IF NOT EXISTS items_date_modified ON items (date_modified)',
+    'CREATE INDEX IF NOT EXISTS items_version ON items (version)',
+    '''CREATE TABLE IF NOT EXISTS item_collections (
+        item_key TEXT NOT NULL,
+        collection_key TEXT NOT NULL,
+        PRIMARY KEY (item_key, collection_key)
+    )''',
+    'CREATE INDEX IF NOT EXISTS item_collections_collection_key ON item_collections (collection_key)',
+    '''CREATE TABLE IF NOT EXISTS item_tags (
+        item_key TEXT NOT NULL,
+        tag TEXT NOT NULL,
+        PRIMARY KEY (item_key, tag)
+    )''',
+    'CREATE INDEX IF NOT EXISTS item_tags_tag ON item_tags (tag)',
+    '''CREATE TABLE IF NOT EXISTS collections (
+        key TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        parent_collection TEXT,
+        name TEXT,
+        data TEXT NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS collections_parent_collection ON collections (parent_collection)',
+]
+
+SORT_COLUMNS = {
+    'dateModified': 'date_modified',
+    'dateAdded': 'date_added',
+    'title': 'title',
+    'itemType': 'item_type',
+    'creator': 'creator_summary',
+}
+
+
+def item_title(item: Item) -> str:
+    properties = item.data.properties or {}
+    return properties.get('title') or properties.get('note') or ''
+
+
+class LibraryMirror:
+    """
+    Local copy of a Zotero library in SQLite, kept up to date with version based deltas like `LibraryCache`.
+    Items and collections are stored as json next to indexed columns, such that lookups by key, parent,
+    collection, tag or modification date as well as `SearchParameters` queries are served locally.
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+            if self._meta('mirror_version') != MIRROR_VERSION:
+                self._clear()
+                self._set_meta('mirror_version', MIRROR_VERSION)
+
+    def _meta(self, name: str, default: int = None) -> Optional[int]:
+        row = self.connection.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, name: str, value: int):
+        self.connection.execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)', (name, value))
+
+    def _clear(self):
+        for table in ['items', 'item_collections', 'item_tags', 'collections']:
+            self.connection.execute(f'DELETE FROM {table}')
+        self._set_meta('version', 0)
+
+    @property
+    def version(self) -> int:
+        with self.lock:
+            return self._meta('version', 0)
+
+    def reset(self):
+        with self.lock, self.connection:
+            self._clear()
+
+    def save(self):
+        # Changes are committed as they are applied
+        pass
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def _delete_item(self, key: ID):
+        for table, column in [('items', 'key'), ('item_collections', 'item_key'), ('item_tags', 'item_key')]:
+            self.connection.execute(f'DELETE FROM {table} WHERE {column} = ?', (key,))
+
+    def _put_item(self, item: Item):
+        self._delete_item(item.key)
+        self.connection.execute(
+            'INSERT INTO items (key, version, parent_item, item_type, title, creator_summary, date_added, '
+            'date_modified, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                item.key, item.version, item.data.parent_item or None, item.data.item_type.value,
+                item_title(item), item.meta.creator_summary,
+                item.data.date_added.isoformat() if item.data.date_added else None,
+                item.data.date_modified.isoformat() if item.data.date_modified else None,
+                json.dumps(Item.to_dict(item)),
+            )
+        )
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO item_collections (item_key, collection_key) VALUES (?, ?)',
+            [(item.key, key) for key in item.data.collections or []]
+        )
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO item_tags (item_key, tag) VALUES (?, ?)',
+            [(item.key, tag.tag) for tag in item.data.tags or []]
+        )
+
+    def apply(self, changes: LibraryChanges):
+        with self.lock, self.connection:
+            for item in changes.items:
+                if is_trashed(item):
+                    self._delete_item(item.key)
+                else:
+                    self._put_item(item)
+
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO collections (key, version, parent_collection, name, data) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [
+                    (
+                        c.key, c.version, c.data.parent_collection or None, c.data.name,
+                        json.dumps(Collection.to_dict(c))
+                    )
+                    for c in changes.collections
+                ]
+            )
+
+            for key in changes.deleted_items:
+                self._delete_item(key)
+            self.connection.executemany(
+                'DELETE FROM collections WHERE key = ?', [(key,) for key in changes.deleted_collections]
+            )
+
+            self._set_meta('version', max(self._meta('version', 0), changes.version))
+
+    def _select_items(self, where: List[str], args: List, pagination: Optional[SearchPagination] = None) \
+            -> List[Item]:
+        query = 'SELECT data FROM items' + (' WHERE ' + ' AND '.join(where) if where else '')
+        if pagination:
+            column = SORT_COLUMNS.get(pagination.sort or 'dateModified', 'date_modified')
+            direction = 'ASC' if pagination.direction and pagination.direction.value == 'asc' else 'DESC'
+            query += f' ORDER BY {column} {direction}, key LIMIT ? OFFSET ?'
+            args = [*args, pagination.limit, pagination.start]
+
+        with self.lock:
+            rows = self.connection.execute(query, args).fetchall()
+        return [Item.from_dict(json.loads(row[0])) for row in rows]
+
+    def get_items(self) -> List[Item]:
+        return self._select_items([], [])
+
+    def get_item(self, key: ID) -> Optional[Item]:
+        return next(iter(self._select_items(['key = ?'], [key])), None)
+
+    def get_children(self, key: ID) -> List[Item]:
+        return self._select_items(['parent_item = ?'], [key])
+
+    def get_collection_items(self, collection_key: ID) -> List[Item]:
+        return self._select_items(
+            ['key IN (SELECT item_key FROM item_collections WHERE collection_key = ?)'], [collection_key]
+        )
+
+    def get_collections(self) -> List[Collection]:
+        with self.lock:
+            rows = self.connection.execute('SELECT data FROM collections').fetchall()
+        return [Collection.from_dict(json.loads(row[0])) for row in rows]
+
+    def query_items(
+            self,
+            params: Optional[SearchParameters] = None,
+            pagination: Optional[SearchPagination] = None
+    ) -> List[Item]:
+        """
+        Items matching given search parameters, mirroring the semantics of the api where possible:
+        `q` matches title and creators, `tag` supports `a || b` alternatives and `-a` negation.
+        Trashed items are never part of the mirror.
+        """
+        where, args = search_conditions(params or SearchParameters())
+        return self._select_items(where, args, pagination)
+
+
+def search_conditions(params: SearchParameters) -> Tuple[List[str], List]:
+    where, args = [], []
+
+    keys = params.item_key.split(',') if isinstance(params.item_key, str) else params.item_key
+    if keys:
+        where.append(f'key IN ({", ".join("?" * len(keys))})')
+        args.extend(keys)
+    if params.item_type:
+        negate = params.item_type.startswith('-')
+        where.append(f'item_type {"!=" if negate else "="} ?')
+        args.append(params.item_type.lstrip('-'))
+    if params.q:
+        where.append('(title LIKE ? OR creator_summary LIKE ?)')
+        args.extend([f'%{params.q}%'] * 2)
+    if params.since:
+        where.append('version > ?')
+        args.append(int(params.since))
+    if params.tag:
+        tags = [t.strip() for t in params.tag.split('||')]
+        negated = [t[1:] for t in tags if t.startswith('-')]
+        tags = [t for t in tags if not t.startswith('-')]
+        if tags:
+            where.append(tag_condition(tags))
+            args.extend(tags)
+        if negated:
+            where.append(f'NOT {tag_condition(negated)}')
+            args.extend(negated)
+
+    return where, args
+
+
+def tag_condition(tags: Iterable[str]) -> str:
+    return f'key IN (SELECT item_key FROM item_tags WHERE tag IN ({", ".join("?" * len(list(tags)))}))'
@@ -2,13 +2,13 @@ import datetime as dt
 from dataclasses import dataclass
 from typing import Dict, Optional
 
-from dataclass_dict_convert import dataclass_dict_convert
 from stringcase import camelcase
 
 from notionsci.connections.zotero.structures import ID, ItemData, Links, Library, Meta, Entity
+from notionsci.utils import dataclass_codec
 
 
-@dataclass_dict_convert(dict_letter_case=camelcase)
+@dataclass_codec(dict_letter_case=camelcase)
 @dataclass
 class CollectionData(Entity):
     name: str
@@ -20,7 +20,7 @@ class CollectionData(Entity):
         return self.name
 
 
-@dataclass_dict_convert(dict_letter_case=camelcase)
+@dataclass_codec(dict_letter_case=camelcase)
 @dataclass
 class Collection(Entity):
     library: Library
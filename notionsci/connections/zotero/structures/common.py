@@ -1,15 +1,16 @@
 from dataclasses import dataclass
 from typing import Dict, Optional
 
-from dataclass_dict_convert import dataclass_dict_convert
 from stringcase import camelcase
 
+from notionsci.utils import dataclass_codec
+
 ID = str
 Links = Dict
 User = Dict
 
 
-@dataclass_dict_convert(dict_letter_case=camelcase)
+@dataclass_codec(dict_letter_case=camelcase)
 @dataclass
 class Meta:
     created_by_user: Optional[User] = None
@@ -3,11 +3,10 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Dict, Any, List, Optional
 
-from dataclass_dict_convert import dataclass_dict_convert
 from stringcase import camelcase
 
 from notionsci.connections.zotero.structures import ID, Links, Library, Meta, Entity
-from notionsci.utils import serde, Undefinable
+from notionsci.utils import serde, Undefinable, dataclass_codec
 
 
 class ItemType(Enum):
@@ -1,10 +1,10 @@
 from dataclasses import dataclass
 from enum import Enum
 
-from dataclass_dict_convert import dataclass_dict_convert
 from stringcase import camelcase
 
 from notionsci.connections.zotero.structures import Links
+from notionsci.utils import dataclass_codec
 
 
 class LibraryType(Enum):
@@ -12,7 +12,7 @@ class LibraryType(Enum):
     user = 'user'
 
 
-@dataclass_dict_convert(dict_letter_case=camelcase)
+@dataclass_codec(dict_letter_case=camelcase)
 @dataclass
 class Library:
     id: int
@@ -2,14 +2,13 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Optional, List
 
-from dataclass_dict_convert import dataclass_dict_convert
 from stringcase import camelcase
 
 from notionsci.connections.zotero.structures import ID
-from notionsci.utils import filter_none_dict
+from notionsci.utils import filter_none_dict, dataclass_codec
 
 
-@dataclass_dict_convert(dict_letter_case=camelcase)
+@dataclass_codec(dict_letter_case=camelcase)
 @dataclass
 class SearchParameters:
     item_key: Optional[List[ID]] = None
@@ -32,7 +31,7 @@ class Direction(Enum):
     desc = 'desc'
 
 
-@dataclass_dict_convert(dict_letter_case=camelcase)
+@dataclass_codec(dict_letter_case=camelcase)
 @dataclass
 class SearchPagination:
     sort: Optional[str] = None
@@ -1,2 +1,7 @@
+from .executor import *
+from .graph import *
+from .journal import *
 from .structure import *
+from .snapshot import *
+from .state import *
 from .zotero import *
@@ -0,0 +1,151 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Generic, Dict, List, Callable, Set, TypeVar, Hashable, Iterable, Tuple
+
+from notionsci.sync.graph import DependencyGraph
+
+T = TypeVar('T')
+
+
+@dataclass
+class ActionFailure(Generic[T]):
+    key: str
+    action: T
+    error: Exception
+
+
+class ActionExecutor(Generic[T]):
+    """
+    Executes the actions of a dependency graph concurrently with a separate worker pool per target
+    (as given by `target_fn`). An action is started as soon as all the actions it depends on completed. Failures are collected
+    rather than raised and fail the actions depending on them.
+    """
+
+    def __init__(
+            self,
+            execute: Callable[[str, T], None],
+            target_fn: Callable[[T], Hashable],
+            concurrency: Dict[Hashable, int]
+    ):
+        self.execute = execute
+        self.target_fn = target_fn
+        self.concurrency = concurrency
+
+    def run(self, actions: Dict[str, T], graph: DependencyGraph) -> List[ActionFailure[T]]:
+        waves = graph.waves()
+        order = {key: i for i, key in enumerate(key for wave in waves for key in wave)}
+        remaining = {key: len(deps) for key, deps in graph.dependencies.items()}
+        failures: List[ActionFailure[T]] = []
+        finished: Set[str] = set()
+
+        def fail(key: str, error: Exception):
+            stack = [(key, error)]
+            while stack:
+                key, error = stack.pop()
+                if key in finished:
+                    continue
+                failures.append(ActionFailure(key, actions[key], error))
+                finished.add(key)
+                stack.extend((child, Exception(f'Depends on {key} which failed')) for child in graph.dependents[key])
+
+        pools = {
+            target: ThreadPoolExecutor(max_workers=max(1, self.concurrency.get(target, 1)))
+            for target in {self.target_fn(actions[key]) for key in graph.nodes}
+        }
+        running: Dict[Future, str] = {}
+
+        def submit(key: str):
+            running[pools[self.target_fn(actions[key])].submit(self.execute, key, actions[key])] = key
+
+        try:
+            for key in waves[0] if waves else []:
+                submit(key)
+
+            while running:
+                done, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+                ready = []
+                for future in done:
+                    key = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        fail(key, error)
+                        continue
+
+                    finished.add(key)
+                    for child in graph.dependents[key]:
+                        remaining[child] -= 1
+                        if remaining[child] == 0 and child not in finished:
+                            ready.append(child)
+
+                # Start actions of earlier waves first
+                for key in sorted(ready, key=order.get):
+                    submit(key)
+        finally:
+            for future in running.keys():
+                future.cancel()
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+
+        for key in graph.cyclic_nodes(waves):
+            fail(key, Exception('Action is part of a dependency cycle'))
+
+        return failures
+
+
+class ActionPipeline(Generic[T]):
+    """
+    Executes actions while they are still being produced, with a separate worker pool per target
+    (as given by `target_fn`). At most `max_pending` actions wait for execution at a time, beyond that
+    the producer is blocked until a worker catches up. Failures are collected rather than raised.
+    Actions are independent of each other, there is no ordering between them.
+    """
+
+    def __init__(
+            self,
+            execute: Callable[[str, T], None],
+            target_fn: Callable[[T], Hashable],
+            concurrency: Dict[Hashable, int],
+            max_pending: int = 64
+    ):
+        self.execute = execute
+        self.target_fn = target_fn
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+
+    def run(self, actions: Iterable[Tuple[str, T]]) -> List[ActionFailure[T]]:
+        failures: List[ActionFailure[T]] = []
+        slots = threading.BoundedSemaphore(max(1, self.max_pending))
+        lock = threading.Lock()
+        pools: Dict[Hashable, ThreadPoolExecutor] = {}
+        pending: Set[Future] = set()
+
+        def finished(key: str, action: T, future: Future):
+            slots.release()
+            with lock:
+                pending.discard(future)
+                if not future.cancelled() and future.exception() is not None:
+                    failures.append(ActionFailure(key, action, future.exception()))
+
+        try:
+            for key, action in actions:
+                target = self.target_fn(action)
+                if target not in pools:
+                    pools[target] = ThreadPoolExecutor(max_workers=max(1, self.concurrency.get(target, 1)))
+
+                slots.acquire()
+                future = pools[target].submit(self.execute, key, action)
+                with lock:
+                    pending.add(future)
+                future.add_done_callback(lambda f, key=key, action=action: finished(key, action, f))
+        finally:
+            with lock:
+                # Producer failed, drop the actions which did not start yet
+                unfinished = list(pending) if sys.exc_info()[0] else []
+            for future in unfinished:
+                future.cancel()
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+
+        return failures
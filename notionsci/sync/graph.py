@@ -0,0 +1,47 @@
+from typing import Dict, List, Iterable, Set
+
+
+class DependencyGraph:
+    """
+    Graph of keys and the keys they depend on. Dependencies on keys outside of the graph are
+    considered satisfied.
+    """
+
+    def __init__(self, nodes: Iterable[str], dependencies: Dict[str, Iterable[str]]):
+        self.nodes: List[str] = list(dict.fromkeys(nodes))
+        self.dependencies: Dict[str, Set[str]] = {node: set() for node in self.nodes}
+        self.dependents: Dict[str, List[str]] = {node: [] for node in self.nodes}
+
+        for node in self.nodes:
+            for dep in dependencies.get(node, []):
+                if dep in self.dependencies and dep != node and dep not in self.dependencies[node]:
+                    self.dependencies[node].add(dep)
+                    self.dependents[dep].append(node)
+
+    def waves(self) -> List[List[str]]:
+        """
+        Groups the nodes into waves such that every node only depends on nodes of earlier waves.
+        Nodes within a wave are independent of each other. Nodes part of a cycle are left out.
+        Runs in O(nodes + edges).
+        """
+        remaining = {node: len(deps) for node, deps in self.dependencies.items()}
+        wave = [node for node in self.nodes if remaining[node] == 0]
+        waves = []
+        while wave:
+            waves.append(wave)
+            next_wave = []
+            for node in wave:
+                for child in self.dependents[node]:
+                    remaining[child] -= 1
+                    if remaining[child] == 0:
+                        next_wave.append(child)
+            wave = next_wave
+
+        return waves
+
+    def order(self) -> List[str]:
+        return [node for wave in self.waves() for node in wave]
+
+    def cyclic_nodes(self, waves: List[List[str]] = None) -> List[str]:
+        scheduled = {node for wave in (waves if waves is not None else self.waves()) for node in wave}
+        return [node for node in self.nodes if node not in scheduled]
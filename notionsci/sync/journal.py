@@ -0,0 +1,116 @@
+import datetime as dt
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Set, Iterable, List
+
+
+@dataclass
+class Checkpoint:
+    """
+    Progress of a sync run which did not complete
+    """
+    run: str
+    planned: Set[str] = field(default_factory=set)
+    done: Dict[str, str] = field(default_factory=dict)
+
+    def pending(self) -> Set[str]:
+        return self.planned.difference(self.done.keys())
+
+    def is_done(self, key: str, fingerprint: str) -> bool:
+        return self.done.get(key) == fingerprint
+
+
+class SyncJournal:
+    """
+    Append only log of the actions planned and completed by a sync. Every completed action is flushed
+    to disk immediately, such that an interrupted sync can be resumed without redoing the actions it
+    already applied. The journal is cleared once a run completes without failures.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.run: Optional[str] = None
+        self.lock = threading.Lock()
+        self.file = None
+
+    def _entries(self) -> List[dict]:
+        if not os.path.exists(self.path):
+            return []
+
+        entries = []
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Line cut off when the process was killed mid write
+                    continue
+        return entries
+
+    def checkpoint(self) -> Optional[Checkpoint]:
+        """
+        Progress of the interrupted runs since the last completed one, None if there is nothing to resume
+        """
+        checkpoint = None
+        for entry in self._entries():
+            if entry['event'] == 'plan':
+                checkpoint = checkpoint or Checkpoint(entry['run'])
+                checkpoint.run = entry['run']
+                checkpoint.planned.update(entry['keys'])
+            elif entry['event'] == 'done' and checkpoint:
+                checkpoint.done[entry['key']] = entry['fingerprint']
+            elif entry['event'] == 'complete':
+                checkpoint = None
+
+        return checkpoint
+
+    def _append(self, entry: dict):
+        with self.lock:
+            if self.file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self.file = open(self.path, 'a')
+                if not ends_with_newline(self.path):
+                    self.file.write('\n')
+
+            self.file.write(json.dumps(entry) + '\n')
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def begin(self, keys: Iterable[str]):
+        self.run = uuid.uuid4().hex
+        self._append({
+            'event': 'plan', 'run': self.run, 'keys': list(keys),
+            'at': dt.datetime.now(dt.timezone.utc).isoformat()
+        })
+
+    def plan(self, keys: Iterable[str]):
+        """
+        Adds keys to the plan of the current run, for syncs which only discover their actions while executing
+        """
+        self._append({'event': 'plan', 'run': self.run, 'keys': list(keys)})
+
+    def done(self, key: str, fingerprint: str):
+        self._append({'event': 'done', 'run': self.run, 'key': key, 'fingerprint': fingerprint})
+
+    def complete(self):
+        self._append({'event': 'complete', 'run': self.run})
+        self.close()
+        os.remove(self.path)
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def ends_with_newline(path: str) -> bool:
+    if os.path.getsize(path) == 0:
+        return True
+
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
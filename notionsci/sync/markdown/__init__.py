@@ -1 +1,2 @@
+from .manifest import *
 from .pages import *
\ No newline at end of file
@@ -0,0 +1,93 @@
+import datetime as dt
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Optional, Dict
+
+from notionsci.utils import load_json, save_json, FileRecord
+
+MANIFEST_VERSION = 1
+MANIFEST_PATH = os.path.join('.notionsci', 'manifest.json')
+
+
+@dataclass
+class ManifestEntry:
+    size: int
+    mtime_ns: int
+    hash: Optional[str] = None
+    synced_at: Optional[dt.datetime] = None
+
+    def matches(self, record: FileRecord) -> bool:
+        return self.size == record.size and self.mtime_ns == record.mtime_ns
+
+    def to_dict(self) -> dict:
+        return {
+            'size': self.size,
+            'mtime_ns': self.mtime_ns,
+            'hash': self.hash,
+            'synced_at': self.synced_at.isoformat() if self.synced_at else None,
+        }
+
+    @staticmethod
+    def from_dict(raw: dict) -> 'ManifestEntry':
+        return ManifestEntry(
+            raw['size'], raw['mtime_ns'], raw.get('hash'),
+            dt.datetime.fromisoformat(raw['synced_at']) if raw.get('synced_at') else None
+        )
+
+
+@dataclass
+class MarkdownManifest:
+    """
+    Size, modification time, content hash and synced at value of the markdown files in a directory,
+    keyed by their relative path. Files whose stat is unchanged since they were last seen need not be read.
+    """
+    path: Optional[str] = None
+    entries: Dict[str, ManifestEntry] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    # Whether entries changed since the manifest was loaded or saved
+    dirty: bool = field(default=False, repr=False, compare=False)
+
+    @staticmethod
+    def load(path: str) -> 'MarkdownManifest':
+        raw = load_json(path, {})
+        if raw.get('version') != MANIFEST_VERSION:
+            return MarkdownManifest(path)
+
+        return MarkdownManifest(path, {
+            key: ManifestEntry.from_dict(entry) for key, entry in raw.get('entries', {}).items()
+        })
+
+    @staticmethod
+    def for_directory(markdown_dir: str) -> 'MarkdownManifest':
+        return MarkdownManifest.load(os.path.join(markdown_dir, MANIFEST_PATH))
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+
+        with self.lock:
+            entries = {key: entry.to_dict() for key, entry in self.entries.items()}
+            self.dirty = False
+        save_json(self.path, {'version': MANIFEST_VERSION, 'entries': entries})
+
+    def get(self, record: FileRecord) -> Optional[ManifestEntry]:
+        """
+        Entry of given file if it was not modified since it was recorded
+        """
+        entry = self.entries.get(record.path)
+        return entry if entry and entry.matches(record) else None
+
+    def put(self, record: FileRecord, hash: Optional[str], synced_at: Optional[dt.datetime]):
+        with self.lock:
+            self.entries[record.path] = ManifestEntry(record.size, record.mtime_ns, hash, synced_at)
+            self.dirty = True
+
+    def retain(self, keys: set):
+        """
+        Drops the entries of files which no longer exist
+        """
+        with self.lock:
+            entries = {key: entry for key, entry in self.entries.items() if key in keys}
+            self.dirty = self.dirty or len(entries) != len(self.entries)
+            self.entries = entries
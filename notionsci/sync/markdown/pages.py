@@ -1,16 +1,24 @@
 import datetime as dt
 import os
 import re
-from dataclasses import dataclass
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterator, Tuple
 
-from notionsci.connections.notion import Page, ID, NotionClient, SortObject, SortDirection, DateValue, Property
+from notionsci.connections.notion import Page, ID, NotionClient, SortObject, SortDirection, DateValue, Property, \
+    Parent, PropertyType, parse_markdown_page
 from notionsci.sync import Action
+from notionsci.sync.journal import SyncJournal
+from notionsci.sync.markdown.manifest import MarkdownManifest
+from notionsci.sync.state import SyncState, SyncRecord
 from notionsci.sync.structure import Sync, ActionTarget, ActionType
-from notionsci.utils import sanitize_filename, MarkdownContext
+from notionsci.utils import sanitize_filename, render_markdown, HashingWriter, text_hash, \
+    scan_files, FileRecord, slotted, atomic_write, ProgressReport
 
 
+@slotted
 @dataclass
 class MarkdownPage:
     filename: str
@@ -30,48 +38,86 @@ class MarkdownPage:
         return self.path.replace('.md', '')
 
 
+def page_key(page: Page) -> str:
+    return sanitize_filename(page.get_title())
+
+
 PROPERTY_PATTERN = r'\|\s*{property_name}\s*\|(.*)\|'
 SYNCED_AT_PATTERN = PROPERTY_PATTERN.format(property_name='Synced At')
 
 
+def parse_synced_at(content: str) -> Optional[dt.datetime]:
+    synced_at = re.search(SYNCED_AT_PATTERN, content)
+    return dt.datetime.fromisoformat(synced_at.group(1).strip()) if synced_at else None
+
+
 @dataclass
 class MarkdownPagesSync(Sync[MarkdownPage, Page]):
     notion: NotionClient
     database_id: ID
     markdown_dir: str
+    state: Optional[SyncState] = None
+    journal: Optional[SyncJournal] = None
+    title_property: Optional[str] = None
+    pipelined: bool = False
+    manifest: Optional[MarkdownManifest] = None
+    # Threads listing the subdirectories of markdown_dir
+    scan_workers: int = 8
+    # Number of pages downloaded and rendered concurrently, they share the requests in flight of the client
+    concurrency_a: int = 4
+    progress: ProgressReport = field(default_factory=lambda: ProgressReport('pages'))
+    # Pool of `max_in_flight` workers the page trees are loaded with during a sync
+    request_pool: Optional[ThreadPoolExecutor] = field(default=None, init=False, repr=False)
+
+    def sync(self):
+        with ThreadPoolExecutor(max_workers=self.notion.max_in_flight) as pool:
+            self.request_pool = pool
+            try:
+                return super().sync()
+            finally:
+                self.request_pool = None
 
     def fetch_items_a(self) -> Dict[str, MarkdownPage]:
         print('Loading existing Markdown pages')
-        path = Path(self.markdown_dir)
+        root = os.path.abspath(self.markdown_dir)
+        records = scan_files(root, '.md', max_workers=self.scan_workers)
         pages = []
-        for file in path.glob('**/*.md'):
-            if not file.is_file():
-                continue
-
-            content = file.read_text()
-            synced_at = re.search(SYNCED_AT_PATTERN, content)
+        for record in records:
+            entry = self.manifest.get(record) if self.manifest else None
+            if entry:
+                # Unchanged since last seen, the file need not be read
+                synced_at = entry.synced_at
+            else:
+                content = Path(root, record.path).read_text()
+                synced_at = parse_synced_at(content)
+                if self.manifest:
+                    self.manifest.put(record, text_hash(content), synced_at)
 
             pages.append(MarkdownPage(
-                file.name,
-                str(file.absolute()),
-                created_at=dt.datetime.fromtimestamp(os.path.getctime(file)),
-                updated_at=dt.datetime.fromtimestamp(os.path.getmtime(file)),
-                synced_at=dt.datetime.fromisoformat(synced_at.group(1).strip()) if synced_at else None,
-                deleted='deleted' in file.parts
+                os.path.basename(record.path),
+                os.path.join(root, record.path),
+                created_at=dt.datetime.fromtimestamp(record.ctime_ns / 1e9),
+                updated_at=dt.datetime.fromtimestamp(record.mtime_ns / 1e9),
+                synced_at=synced_at,
+                deleted='deleted' in record.path.split(os.sep)
             ))
 
+        if self.manifest:
+            self.manifest.retain({record.path for record in records})
+            self.manifest.save()
         return {page.filename.replace('.md', ''): page for page in pages}
 
     def fetch_items_b(self) -> Dict[str, Page]:
+        return dict(self.stream_items_b())
+
+    def stream_items_b(self) -> Iterator[Tuple[str, Page]]:
         print('Loading existing Notion pages')
-        return {
-            sanitize_filename(page.get_title()): page
-            for page in self.notion.database_query_all(
+        for page in self.notion.database_query_all(
                 self.database_id,
                 sorts=[SortObject(property='Modified At', direction=SortDirection.descending)],
                 filter=None
-            )
-        }
+        ):
+            yield page_key(page), page
 
     def compare(self, a: Optional[MarkdownPage], b: Optional[Page]) -> Action[MarkdownPage, Page]:
         if a is None:  # Doesn't exist in markdown
@@ -85,9 +131,18 @@ class MarkdownPagesSync(Sync[MarkdownPage, Page]):
         if a.deleted:
             return Action.delete(ActionTarget.B, a, b)
 
-        locally_modified = a.synced_at is None or a.updated_at > a.synced_at
-        remote_modified = b.get_propery_value('Synced At') is None \
-                          or b.get_propery_value('Modified At') > b.get_propery_value('Synced At')
+        record = self.state.get(page_key(b)) if self.state else None
+        if record and record.remote_id != b.id:
+            record = None
+
+        synced_at = max(filter(None, [a.synced_at, record.synced_at if record else None]), default=None)
+        locally_modified = synced_at is None or a.updated_at > synced_at
+        if record and record.version:
+            # Synced At is not written back to notion, therefore rely on the last downloaded revision
+            remote_modified = b.last_edited_time.isoformat() != record.version
+        else:
+            remote_modified = b.get_propery_value('Synced At') is None \
+                              or b.get_propery_value('Modified At') > b.get_propery_value('Synced At')
         if locally_modified and remote_modified:
             return Action.merge(a, b)
         elif locally_modified:
@@ -97,15 +152,21 @@ class MarkdownPagesSync(Sync[MarkdownPage, Page]):
 
         return Action.ignore()
 
+    def fingerprint(self, action: Action[MarkdownPage, Page]) -> str:
+        return f'{super().fingerprint(action)}:' \
+               f'{action.a.updated_at.isoformat() if action.a else None}:' \
+               f'{action.b.last_edited_time.isoformat() if action.b and action.b.last_edited_time else None}'
+
     def execute_a(self, action: Action[MarkdownPage, Page]):
         if action.action_type == ActionType.PUSH:
             # Load page property
+            self.progress.start()
             page = action.b
-            self.notion.load_children(page, recursive=True, databases=True)
+            self.notion.load_children(page, recursive=True, databases=True, pool=self.request_pool)
             path = os.path.join(self.markdown_dir, f'{sanitize_filename(page.get_title())}.md')
             synced_at = dt.datetime.now()
 
-            # Update synced at property
+            # Update synced at property, it is only written to the markdown file (see `compare`)
             if page.has_property('Synced At'):
                 page.get_property('Synced At').set_raw_value(DateValue.from_date(synced_at))
             else:
@@ -113,30 +174,83 @@ class MarkdownPagesSync(Sync[MarkdownPage, Page]):
                     'Synced At': Property.as_date(synced_at)
                 })
 
-            # TODO: Save to notion
-
             # Download page to markdown
-            content = page.to_markdown(MarkdownContext())
-            with open(path, 'w') as f:
-                f.write(content)
+            with atomic_write(path) as f:
+                writer = HashingWriter(f)
+                render_markdown(page, writer)
 
             # Update file modified at such that it is before synced at
             os.utime(path, (synced_at.timestamp() - 5, synced_at.timestamp() - 5))
+            if self.manifest:
+                self.manifest.put(
+                    FileRecord.from_stat(os.path.relpath(path, self.markdown_dir), os.stat(path)),
+                    writer.hexdigest(), synced_at
+                )
+            if self.state:
+                self.state.put(SyncRecord(
+                    page_key(page), page.id,
+                    version=page.last_edited_time.isoformat() if page.last_edited_time else None,
+                    payload_hash=writer.hexdigest(),
+                    synced_at=synced_at
+                ))
             print(f'- [MARKDOWN] Updated: {action.b.get_title()}')
-        elif action.action_type == ActionType.PUSH:
-            page = action.b
-            path = os.path.join(self.markdown_dir, f'{sanitize_filename(page.get_title())}.md')
-            os.remove(path)
-            print(f'- [MARKDOWN] Deleted: {action.b.get_title()}')
+            self.progress.tick()
         else:
             return super().execute_a(action)
 
+    def postprocess(self, counts: Counter):
+        if self.progress.count:
+            print(f'Exported {self.progress}')
+        if self.manifest:
+            self.manifest.save()
+
+    def get_title_property(self) -> str:
+        if not self.title_property:
+            database = self.notion.database_get(self.database_id)
+            self.title_property = next(
+                name for name, prop in database.properties.items() if prop.type == PropertyType.title
+            )
+        return self.title_property
+
     def execute_b(self, action: Action[MarkdownPage, Page]):
         if action.action_type == ActionType.PUSH:
-            pass
-            print(f'- [NOTION] Updated: {action.a.get_title()}')
-        elif action.action_type == ActionType.PUSH:
-            pass
+            with open(action.a.path, 'r') as f:
+                content = f.read()
+            title, blocks = parse_markdown_page(content)
+
+            page = action.b
+            old_ids = []
+            if page:
+                # Old content is only removed once the new content was appended,
+                # such that a failed append never leaves the page empty
+                old_ids = [block.id for block in self.notion.block_retrieve_all_children(page.id)]
+            else:
+                page = self.notion.page_create(Page(
+                    parent=Parent.database(self.database_id),
+                    properties={
+                        self.get_title_property(): Property.as_title(title or Path(action.a.filename).stem)
+                    }
+                ))
+
+            self.notion.append_blocks(page.id, blocks)
+            if old_ids:
+                with ThreadPoolExecutor(max_workers=self.notion.max_in_flight) as pool:
+                    list(pool.map(self.notion.block_delete, old_ids))
+            page = self.notion.page_get(page.id)
+            if self.state:
+                self.state.put(SyncRecord(
+                    page_key(page), page.id,
+                    version=page.last_edited_time.isoformat() if page.last_edited_time else None,
+                    payload_hash=text_hash(content),
+                    synced_at=dt.datetime.now()
+                ))
+            action.b = page
+            print(f'- [NOTION] Updated: {page.get_title()}')
+        elif action.action_type == ActionType.DELETE:
+            action.b.archived = True
+            action.b = self.notion.page_update(action.b)
+            if self.state:
+                self.state.delete(page_key(action.b))
             print(f'- [NOTION] Deleted: {action.b.get_title()}')
         else:
-            return super().execute_a(action)
+            return super().execute_b(action)
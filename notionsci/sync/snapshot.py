@@ -0,0 +1,107 @@
+import datetime as dt
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Iterable, List
+
+from notionsci.connections.notion import ID, Page, QueryFilter
+from notionsci.utils import load_json, save_json
+
+SNAPSHOT_VERSION = 1
+
+
+@dataclass
+class DatabaseSnapshot:
+    """
+    Locally cached copy of the pages of a Notion database together with the high-water mark
+    (latest last_edited_time) seen. Allows fetching only the pages edited since the previous sync.
+    """
+    path: Optional[str] = None
+    database_id: Optional[ID] = None
+    high_water_mark: Optional[dt.datetime] = None
+    full_fetched_at: Optional[dt.datetime] = None
+    pages: Dict[ID, dict] = field(default_factory=dict)
+
+    @staticmethod
+    def load(path: str, database_id: ID) -> 'DatabaseSnapshot':
+        raw = load_json(path, {})
+        if raw.get('version') != SNAPSHOT_VERSION or raw.get('database_id') != database_id:
+            return DatabaseSnapshot(path, database_id)
+
+        return DatabaseSnapshot(
+            path, database_id,
+            high_water_mark=parse_datetime(raw.get('high_water_mark')),
+            full_fetched_at=parse_datetime(raw.get('full_fetched_at')),
+            pages=raw.get('pages', {}),
+        )
+
+    def save(self):
+        if not self.path:
+            return
+
+        save_json(self.path, {
+            'version': SNAPSHOT_VERSION,
+            'database_id': self.database_id,
+            'high_water_mark': self.high_water_mark.isoformat() if self.high_water_mark else None,
+            'full_fetched_at': self.full_fetched_at.isoformat() if self.full_fetched_at else None,
+            'pages': self.pages,
+        })
+
+    def is_stale(self, max_age: Optional[dt.timedelta]) -> bool:
+        """
+        Archived pages do not show up in delta queries, therefore the snapshot is rebuilt from
+        a full scan every once in a while
+        """
+        if self.full_fetched_at is None:
+            return True
+        return max_age is not None and dt.datetime.now(dt.timezone.utc) - self.full_fetched_at > max_age
+
+    def reset(self):
+        self.pages = {}
+        self.high_water_mark = None
+        self.full_fetched_at = dt.datetime.now(dt.timezone.utc)
+
+    def delta_since(self) -> Optional[dt.datetime]:
+        """
+        Edit time from which on pages have to be fetched again. Without any page seen, this is the start
+        of the last full scan, such that empty databases are not scanned in full on every sync.
+        """
+        return self.high_water_mark or self.full_fetched_at
+
+    def delta_filter(self, property: str) -> Optional[QueryFilter]:
+        """
+        Filter for pages edited since the high-water mark. Notion rounds edit times to the minute,
+        hence the inclusive bound.
+        """
+        since = self.delta_since()
+        if since is None:
+            return None
+
+        return {
+            'property': property,
+            'last_edited_time': {'on_or_after': since.isoformat()}
+        }
+
+    def merge(self, pages: Iterable[Page], advance: bool = True):
+        """
+        Stores given pages in the snapshot. Pending writes made by the sync itself should not advance
+        the high-water mark, otherwise concurrent remote edits made in the meantime would be skipped.
+        """
+        for page in pages:
+            if page.archived:
+                self.remove(page.id)
+                continue
+
+            self.pages[page.id] = page.to_dict()
+            if advance and page.last_edited_time and (
+                    self.high_water_mark is None or page.last_edited_time > self.high_water_mark
+            ):
+                self.high_water_mark = page.last_edited_time
+
+    def remove(self, id: ID):
+        self.pages.pop(id, None)
+
+    def get_pages(self) -> List[Page]:
+        return [Page.from_dict(raw) for raw in self.pages.values()]
+
+
+def parse_datetime(value: Optional[str]) -> Optional[dt.datetime]:
+    return dt.datetime.fromisoformat(value) if value else None
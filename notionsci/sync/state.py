@@ -0,0 +1,156 @@
+import datetime as dt
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Any
+
+
+@dataclass
+class SyncRecord:
+    """
+    What was last synced for a single key: the remote counterpart, the version of the source entity
+    and a hash of the payload pushed
+    """
+    key: str
+    remote_id: Optional[str] = None
+    version: Optional[str] = None
+    payload_hash: Optional[str] = None
+    synced_at: Optional[dt.datetime] = None
+
+
+class SyncState(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Optional[SyncRecord]:
+        pass
+
+    @abstractmethod
+    def put(self, record: SyncRecord):
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def records(self) -> List[SyncRecord]:
+        pass
+
+    def close(self):
+        pass
+
+    def matches(self, key: str, remote_id: Optional[str] = None, version: Any = None,
+                payload_hash: Optional[str] = None) -> bool:
+        """
+        Whether the stored record agrees with all the given (non None) values
+        """
+        record = self.get(key)
+        if record is None:
+            return False
+
+        return (remote_id is None or record.remote_id == remote_id) \
+               and (version is None or str(record.version) == str(version)) \
+               and (payload_hash is None or record.payload_hash == payload_hash)
+
+
+class MemorySyncState(SyncState):
+    def __init__(self):
+        self.entries: Dict[str, SyncRecord] = {}
+
+    def get(self, key: str) -> Optional[SyncRecord]:
+        return self.entries.get(key, None)
+
+    def put(self, record: SyncRecord):
+        self.entries[record.key] = record
+
+    def delete(self, key: str):
+        self.entries.pop(key, None)
+
+    def records(self) -> List[SyncRecord]:
+        return list(self.entries.values())
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sync_state (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    remote_id TEXT,
+    version TEXT,
+    payload_hash TEXT,
+    synced_at TEXT,
+    PRIMARY KEY (namespace, key)
+)
+'''
+
+
+class SqliteSyncState(SyncState):
+    """
+    Sync state persisted in a SQLite database. Multiple syncs share a database, separated by namespace.
+    Every write is committed immediately such that an interrupted sync can pick up where it left.
+    """
+
+    def __init__(self, path: str, namespace: str):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.namespace = namespace
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(SCHEMA)
+
+    def _select(self, where: str = '', params: tuple = ()) -> List[SyncRecord]:
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT key, remote_id, version, payload_hash, synced_at FROM sync_state '
+                f'WHERE namespace = ? {where}',
+                (self.namespace, *params)
+            ).fetchall()
+
+        return [
+            SyncRecord(
+                key, remote_id, version, payload_hash,
+                synced_at=dt.datetime.fromisoformat(synced_at) if synced_at else None
+            )
+            for key, remote_id, version, payload_hash, synced_at in rows
+        ]
+
+    def get(self, key: str) -> Optional[SyncRecord]:
+        return next(iter(self._select('AND key = ?', (key,))), None)
+
+    def put(self, record: SyncRecord):
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO sync_state (namespace, key, remote_id, version, payload_hash, synced_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    self.namespace, record.key, record.remote_id,
+                    str(record.version) if record.version is not None else None,
+                    record.payload_hash,
+                    record.synced_at.isoformat() if record.synced_at else None
+                )
+            )
+
+    def delete(self, key: str):
+        with self.lock:
+            self.connection.execute(
+                'DELETE FROM sync_state WHERE namespace = ? AND key = ?', (self.namespace, key)
+            )
+
+    def records(self) -> List[SyncRecord]:
+        return self._select()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def payload_hash(payload: Any) -> str:
+    """
+    Stable hash of a json serializable payload
+    """
+    data = json.dumps(payload, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
@@ -1,8 +1,12 @@
 from abc import abstractmethod
-from collections import deque
+from collections import deque, Counter
 from dataclasses import dataclass
 from enum import Enum
-from typing import TypeVar, Generic, Optional, Dict, List, Iterable, Callable
+from typing import TypeVar, Generic, Optional, Dict, List, Iterable, Callable, Tuple, Iterator
+
+from notionsci.sync.executor import ActionExecutor, ActionFailure, ActionPipeline
+from notionsci.sync.graph import DependencyGraph
+from notionsci.sync.journal import SyncJournal
 
 A = TypeVar('A')
 B = TypeVar('B')
@@ -51,37 +55,143 @@ class Action(Generic[A, B]):
 
 
 class Sync(Generic[A, B]):
-    def sync(self):
+    # Number of actions executed concurrently per target
+    concurrency_a: int = 1
+    concurrency_b: int = 1
+    journal: Optional[SyncJournal] = None
+    # Execute actions while the items of B are still being fetched, see `sync_pipelined`
+    pipelined: bool = False
+    # Number of compared actions which may wait for execution in pipelined mode
+    pipeline_size: int = 64
+
+    def sync(self) -> List[ActionFailure[Action[A, B]]]:
+        checkpoint = self.journal.checkpoint() if self.journal else None
+        if checkpoint:
+            print(f'Resuming interrupted sync ({len(checkpoint.done)} of {len(checkpoint.planned)} actions applied)')
+        if self.pipelined:
+            return self.sync_pipelined(checkpoint)
+
         items_a = self.fetch_items_a()
         items_b = self.fetch_items_b()
 
         keys = list({*items_a.keys(), *items_b.keys()})
         items_a, items_b, keys = self.preprocess(items_a, items_b, keys)
-        actions = [
-            self.compare(items_a.get(key, None), items_b.get(key, None))
+        if checkpoint:
+            # Reconsider the actions left over by the interrupted run, even if their change was already consumed
+            known = set(keys)
+            keys += [k for k in checkpoint.pending() if k not in known and (k in items_a or k in items_b)]
+
+        actions = {
+            key: self.compare(items_a.get(key, None), items_b.get(key, None))
             for key in keys
-        ]
-        # TODO: apply topo sort on resulting graph
+        }
 
         print('Checking for conflicts')
-        for a in actions:
+        for a in actions.values():
             if a.action_type == ActionType.MERGE:
-                v = input(f'Merge conflict occurred for {a.b.get_title()}. Do you want to continue y/n').lower()
-                if v == 'n':
-                    exit(1)
+                self.confirm_merge(a)
 
-        print('Executing actions')
-        for a in actions:
-            if a.action_type == ActionType.MERGE:
-                pass
-            elif a.target == ActionTarget.A:
-                self.execute_a(a)
-            elif a.target == ActionTarget.B:
-                self.execute_b(a)
+        executable = {
+            key: a for key, a in actions.items()
+            if a.action_type not in (ActionType.IGNORE, ActionType.MERGE) and a.target is not None
+            and not (checkpoint and checkpoint.is_done(key, self.fingerprint(a)))
+        }
+        graph = DependencyGraph(
+            executable.keys(),
+            {key: self.dependencies(key, a) for key, a in executable.items()}
+        )
+        print(f'Executing {len(executable)} actions in {len(graph.waves())} waves')
+        executor = ActionExecutor(
+            self.execute_journaled, lambda a: a.target,
+            {ActionTarget.A: self.concurrency_a, ActionTarget.B: self.concurrency_b}
+        )
+        if self.journal:
+            self.journal.begin(executable.keys())
+        failures = executor.run(executable, graph)
+        if self.journal:
+            # Keep the journal around such that failed actions are retried by the next run
+            self.journal.close() if failures else self.journal.complete()
+
+        self.postprocess(Counter(a.action_type for a in actions.values()))
+        self.report(failures)
+        return failures
+
+    def sync_pipelined(self, checkpoint=None) -> List[ActionFailure[Action[A, B]]]:
+        """
+        Indexes the items of A and streams the items of B through `compare` while they are being fetched.
+        Actions are executed as soon as they are known, hence the first writes do not wait for all items
+        to be loaded and at most `pipeline_size` actions are held in memory.
+        Preprocessing and action dependencies are not supported, A should be the smaller side.
+        Merge conflicts are confirmed as they are encountered.
+        """
+        items_a = self.fetch_items_a()
+        # Only counted, such that executed actions and the items they hold can be freed
+        counts = Counter()
+
+        def produce() -> Iterator[Tuple[str, Action[A, B]]]:
+            for key, action in self.stream_actions(items_a):
+                counts[action.action_type] += 1
+                if action.action_type == ActionType.MERGE:
+                    self.confirm_merge(action)
+                if action.action_type == ActionType.IGNORE:
+                    continue
+
+                if action.action_type == ActionType.MERGE or action.target is None \
+                        or (checkpoint and checkpoint.is_done(key, self.fingerprint(action))):
+                    continue
+                if self.journal:
+                    self.journal.plan([key])
+                yield key, action
+
+        print('Executing actions while loading items')
+        pipeline = ActionPipeline(
+            self.execute_journaled, lambda a: a.target,
+            {ActionTarget.A: self.concurrency_a, ActionTarget.B: self.concurrency_b},
+            max_pending=self.pipeline_size
+        )
+        if self.journal:
+            self.journal.begin([])
+        failures = pipeline.run(produce())
+        if self.journal:
+            self.journal.close() if failures else self.journal.complete()
+        print(f'Found {sum(counts.values()) - counts[ActionType.IGNORE]} actions')
+
+        self.postprocess(counts)
+        self.report(failures)
+        return failures
+
+    def stream_actions(self, items_a: Dict[str, A]) -> Iterator[Tuple[str, Action[A, B]]]:
+        items_a = dict(items_a)
+        seen = set()
+        for key, b in self.stream_items_b():
+            if key in seen:
+                continue
+            seen.add(key)
+            yield key, self.compare(items_a.pop(key, None), b)
+
+        for key, a in items_a.items():
+            yield key, self.compare(a, None)
+
+    def confirm_merge(self, action: Action[A, B]):
+        v = input(f'Merge conflict occurred for {action.b.get_title()}. Do you want to continue y/n').lower()
+        if v == 'n':
+            exit(1)
+
+    def report(self, failures: List[ActionFailure[Action[A, B]]]):
+        if failures:
+            print(f'Failed to execute {len(failures)} actions:')
+            for failure in failures:
+                print(f'- {failure.key}: {failure.error}')
 
     def preprocess(self, items_a: Dict[str, A], items_b: Dict[str, B], keys: List[str]):
         return items_a, items_b, keys
 
+    def postprocess(self, counts: Counter):
+        """
+        Called once all actions were executed with the number of compared actions per ActionType
+        """
+        pass
+
     @abstractmethod
     def fetch_items_a(self) -> Dict[str, A]:
         pass
@@ -90,11 +200,40 @@ class Sync(Generic[A, B]):
     def fetch_items_b(self) -> Dict[str, B]:
         pass
 
+    def stream_items_b(self) -> Iterable[Tuple[str, B]]:
+        """
+        Items of B as they are fetched, used by the pipelined sync
+        """
+        return self.fetch_items_b().items()
+
     def compare(self, a: Optional[A], b: Optional[B]) -> Action[A, B]:
         if a is None or b is None:
             return Action.push(ActionTarget.A if not a else ActionTarget.B, a, b)
         return None
 
+    def dependencies(self, key: str, action: Action[A, B]) -> Iterable[str]:
+        """
+        Keys of the actions which have to be executed before the given one
+        """
+        return []
+
+    def fingerprint(self, action: Action[A, B]) -> str:
+        """
+        Identifies an action across runs, used to tell whether it was already applied by an interrupted run
+        """
+        return f'{action.action_type.name}:{action.target.name}'
+
+    def execute_journaled(self, key: str, action: Action[A, B]):
+        self.execute(action)
+        if self.journal:
+            self.journal.done(key, self.fingerprint(action))
+
+    def execute(self, action: Action[A, B]):
+        if action.target == ActionTarget.A:
+            self.execute_a(action)
+        elif action.target == ActionTarget.B:
+            self.execute_b(action)
+
     def execute_a(self, action: Action[A, B]):
         raise Exception('Action is unsupported during one way sync')
 
@@ -106,14 +245,23 @@ T = TypeVar('T')
 
 
 def topo_sort(xs: List[T], children_fn: Callable[[T], Iterable[T]]) -> List[T]:
-    depth = 0
-    counter = {}
-    q = deque(xs)
+    """
+    Orders given nodes and all their descendants such that parents come before their children.
+    Nodes part of a cycle are put last.
+    """
+    nodes = list(dict.fromkeys(xs))
+    seen = set(nodes)
+    parents: Dict[T, List[T]] = {}
+    q = deque(nodes)
     while len(q) > 0:
         x = q.popleft()
-        counter[x] = max(depth, counter.get(x, 0))
-        depth += 1
+        for child in children_fn(x):
+            parents.setdefault(child, []).append(x)
+            if child not in seen:
+                seen.add(child)
+                nodes.append(child)
+                q.append(child)
 
-        children = children_fn(x)
-        q.extend(children)
-    return sorted(counter.keys(), key=lambda x: counter[x])
+    graph = DependencyGraph(nodes, parents)
+    waves = graph.waves()
+    return [x for wave in waves for x in wave] + graph.cyclic_nodes(waves)
@@ -1,10 +1,16 @@
+import copy
 import datetime as dt
+import threading
+from collections import Counter
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Optional, Dict
-
-from notionsci.connections.notion import Page, ID, NotionClient, SortObject, SortDirection, Parent
-from notionsci.connections.zotero import ZoteroClient, Entity
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Set
+
+from notionsci.connections.notion import Page, ID, NotionClient, SortObject, SortDirection, Parent, Property
+from notionsci.connections.zotero import ZoteroClient, Entity, LibraryChanges
+from notionsci.sync.journal import SyncJournal
+from notionsci.sync.snapshot import DatabaseSnapshot
+from notionsci.sync.state import SyncState, SyncRecord, payload_hash
 from notionsci.sync.structure import Sync, Action, ActionTarget, B, ActionType, A
 
 PROP_MODIFIED_AT = 'Modified At'
@@ -55,22 +61,114 @@ class ZoteroNotionSync(Sync[A, Page], ABC):
     database_id: ID
     force: bool = False
     last_sync_date: Optional[dt.datetime] = None
+    snapshot: Optional[DatabaseSnapshot] = None
+    snapshot_max_age: Optional[dt.timedelta] = dt.timedelta(days=1)
+    changed_keys_a: Optional[Set[str]] = None
+    changed_keys_b: Optional[Set[str]] = None
+    state: Optional[SyncState] = None
+    skipped_updates: int = 0
+    concurrency_a: int = 1
+    concurrency_b: int = 4
+    journal: Optional[SyncJournal] = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
 
     def fetch_items_b(self) -> Dict[str, B]:
-        print('Loading existing Notion items')
+        if not self.snapshot:
+            print('Loading existing Notion items')
+            return {
+                x.get_propery_value('ID'): x
+                for x in self.notion.database_query_all(
+                    self.database_id,
+                    sorts=[SortObject(property=PROP_MODIFIED_AT, direction=SortDirection.descending)],
+                    filter=None
+                )
+            }
+
+        full = self.force or self.snapshot.is_stale(self.snapshot_max_age)
+        if full:
+            print('Loading existing Notion items')
+            self.snapshot.reset()
+        else:
+            print(f'Loading Notion items edited since {self.snapshot.delta_since()}')
+
+        self.last_sync_date = self.snapshot.high_water_mark
+        changed = list(self.notion.database_query_all(
+            self.database_id,
+            filter=None if full else self.snapshot.delta_filter(PROP_MODIFIED_AT)
+        ))
+        self.changed_keys_b = None if full else {x.get_propery_value('ID') for x in changed}
+        self.snapshot.merge(changed)
+        self.snapshot.save()
+
+        pages = sorted(self.snapshot.get_pages(), key=lambda x: x.last_edited_time, reverse=True)
         return {
             x.get_propery_value('ID'): x
-            for x in self.notion.database_query_all(
-                self.database_id,
-                sorts=[SortObject(property='Modified At', direction=SortDirection.descending)],
-                filter=None
-            )
+            for x in pages
         }
 
+    def fetch_zotero_changes(self) -> Optional[LibraryChanges]:
+        changes = self.zotero.refresh_cache(full=self.force)
+        if changes:
+            print(f'Fetched {len(changes.items)} items and {len(changes.collections)} collections '
+                  f'changed in Zotero since version {changes.since}')
+        return changes
+
+    def tracks_b_changes(self) -> bool:
+        """
+        Whether changes made on the Notion side can result in actions
+        """
+        return False
+
+    def is_changed(self, key: str, items_a: Dict[str, A], items_b: Dict[str, B]) -> bool:
+        if key not in items_a or key not in items_b:
+            return True
+        if self.is_changed_a(key, items_a[key], items_b[key]):
+            return True
+        return self.tracks_b_changes() and (self.changed_keys_b is None or key in self.changed_keys_b)
+
+    def is_changed_a(self, key: str, a: A, b: B) -> bool:
+        if self.changed_keys_a is not None and key in self.changed_keys_a:
+            return True
+        if self.state:
+            # Unchanged if the current version was already pushed to this very page. Also catches changes
+            # consumed from the library cache by a run which was interrupted before pushing them
+            return not self.state.matches(key, remote_id=b.id, version=a.version)
+        return self.changed_keys_a is None
+
+    def preprocess(self, items_a: Dict[str, A], items_b: Dict[str, B], keys: List[str]):
+        if not self.force:
+            keys = [key for key in keys if self.is_changed(key, items_a, items_b)]
+        return super().preprocess(items_a, items_b, keys)
+
+    def postprocess(self, counts: Counter):
+        if self.skipped_updates:
+            print(f'Skipped {self.skipped_updates} Notion page updates without changes')
+        if self.snapshot:
+            self.snapshot.save()
+
     @abstractmethod
     def collect_props(self, a: A):
         pass
 
+    def props_hash(self, props: Dict[str, Property]) -> str:
+        return payload_hash({
+            name: prop.to_dict()
+            for name, prop in props.items()
+            if name != PROP_SYNCED_AT
+        })
+
+    def fingerprint(self, action: Action[A, B]) -> str:
+        return f'{super().fingerprint(action)}:{action.a.version if action.a else None}'
+
+    def record_state(self, action: Action[A, B], props: Dict[str, Property]):
+        if self.state:
+            self.state.put(SyncRecord(
+                action.a.key, action.b.id,
+                version=action.a.version,
+                payload_hash=self.props_hash(props),
+                synced_at=dt.datetime.now(dt.timezone.utc)
+            ))
+
     def execute_b(self, action: Action[A, B]):
         if action.action_type == ActionType.PUSH:
             if not action.b:
@@ -78,10 +176,37 @@ class ZoteroNotionSync(Sync[A, Page], ABC):
                     parent=Parent.database(self.database_id),
                 )
 
-            action.b.extend_properties(self.collect_props(action.a))
-            action.b = self.notion.page_upsert(action.b)
+            props = self.collect_props(action.a)
+            if action.b.id:
+                # Only send the properties which actually changed. Synced At changes on every push, hence
+                # it is only sent along with other changes
+                changed = action.b.diff_properties({k: v for k, v in props.items() if k != PROP_SYNCED_AT})
+                if not changed:
+                    with self.lock:
+                        self.skipped_updates += 1
+                    self.record_state(action, props)
+                    print(f'-[Notion] Unchanged: {action.b.get_title()}')
+                    return
+
+                patch = copy.copy(action.b)
+                patch.properties = {k: v for k, v in props.items() if k in changed or k == PROP_SYNCED_AT}
+                action.b = self.notion.page_update(patch)
+            else:
+                action.b.extend_properties(props)
+                action.b = self.notion.page_create(action.b)
+
+            self.record_state(action, props)
             print(f'-[Notion] Updated: {action.b.get_title()}')
-        elif action.action_type.DELETE:
-            action.b.archived = True
-            action.b = self.notion.page_update(action.b)
+        elif action.action_type == ActionType.DELETE:
+            patch = copy.copy(action.b)
+            patch.properties = {}
+            patch.archived = True
+            action.b = self.notion.page_update(patch)
+            if self.state:
+                self.state.delete(action.b.get_propery_value('ID'))
             print(f'-[Notion] Deleted: {action.b.get_title()}')
+        else:
+            return super().execute_b(action)
+
+        if self.snapshot:
+            self.snapshot.merge([action.b], advance=False)
@@ -1,11 +1,11 @@
 import datetime as dt
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Iterable
 
 from notionsci.connections.notion import Property, \
     RelationItem
 from notionsci.connections.zotero import Collection
-from notionsci.sync.structure import Action, B, ActionType, topo_sort, A
+from notionsci.sync.structure import Action, B, ActionType, A
 from notionsci.sync.zotero.base import ZoteroNotionSync, PROP_VERSION, PROP_SYNCED_AT, oneway_compare_entity
 
 
@@ -15,29 +15,37 @@ class CollectionsSync(ZoteroNotionSync[Collection]):
 
     def fetch_items_a(self) -> Dict[str, A]:
         print('Loading existing Zotero items')
+        changes = self.fetch_zotero_changes()
+        self.changed_keys_a = changes.collection_keys() if changes else None
         return {
             x.key: x
             for x in self.zotero.all_collections_grouped(delete_children=False)
         }
 
     def preprocess(self, items_a: Dict[str, A], items_b: Dict[str, B], keys: List[str]):
-        # Store existing items
+        # Store existing items (falling back to the pages created during previous runs)
         self.zotero_notion_ids = {
-            k: items_b[k].id
-            for k in items_a.keys() if k in items_b
+            **{
+                record.key: record.remote_id
+                for record in (self.state.records() if self.state else [])
+            },
+            **{
+                k: items_b[k].id
+                for k in items_a.keys() if k in items_b
+            }
         }
 
-        # Apply toposort on collections
-        keys = topo_sort(
-            keys,
-            lambda x: items_a[x].children.keys() if x in items_a and items_a[x].children else []
-        )
-
         return super().preprocess(items_a, items_b, keys)
 
     def compare(self, a: Optional[A], b: Optional[B]) -> Action[A, B]:
         return oneway_compare_entity(a, b, force=self.force)
 
+    def dependencies(self, key: str, action: Action[A, B]) -> Iterable[str]:
+        # Parent relation can only be set once the parent collection page exists
+        if action.a and action.a.data.parent_collection:
+            return [action.a.data.parent_collection]
+        return []
+
     def collect_props(self, a: A):
         return {
             'ID': Property.as_rich_text(a.key),
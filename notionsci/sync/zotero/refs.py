@@ -1,18 +1,19 @@
 import datetime as dt
 import re
 from dataclasses import dataclass, field
-from typing import Optional, Dict, List, Set
+from typing import Optional, Dict, List, Set, Any
 
 import pytz
 
 from notionsci.connections.notion import Page, ID, SortObject, SortDirection, Property, \
     RelationItem, PropertyDef
-from notionsci.connections.zotero import Item, generate_citekey, Collection, build_inherency_tree, Tag
+from notionsci.connections.zotero import Item, generate_citekey, Collection, build_inherency_tree, Tag, \
+    MAX_WRITE_OBJECTS
 from notionsci.sync import Action
 from notionsci.sync.structure import B, A, ActionType
 from notionsci.sync.zotero.base import ZoteroNotionSync, PROP_SYNCED_AT, PROP_VERSION, twoway_compare_entity, \
     oneway_compare_entity
-from notionsci.utils import key_by, flatten
+from notionsci.utils import key_by, flatten, WriteBatcher
 
 SCHEMA = {
     'ID': PropertyDef.as_rich_text(),
@@ -40,9 +41,18 @@ class RefsSync(ZoteroNotionSync[Item]):
     collection_sets: Dict[ID, Set[ID]] = field(default_factory=dict)
     special_tags_regex: str = None
     twoway: bool = True
+    # Zotero updates are sent in batches, each one waits in a worker until its batch is written
+    concurrency_a: int = MAX_WRITE_OBJECTS
+    tag_writer: Optional[WriteBatcher[Item]] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.tag_writer is None:
+            self.tag_writer = WriteBatcher(self.write_tags, max_size=MAX_WRITE_OBJECTS)
 
     def fetch_items_a(self) -> Dict[str, A]:
         print('Loading existing Zotero items')
+        changes = self.fetch_zotero_changes()
+        self.changed_keys_a = changes.item_keys() if changes else None
         return {
             x.key: x
             for x in self.zotero.all_items_grouped(delete_children=True)
@@ -69,6 +79,9 @@ class RefsSync(ZoteroNotionSync[Item]):
 
         return super().preprocess(items_a, items_b, keys)
 
+    def tracks_b_changes(self) -> bool:
+        return self.twoway
+
     def compare(self, a: Optional[A], b: Optional[B]) -> Action[A, B]:
         if self.twoway:
             return twoway_compare_entity(a, b, force=self.force)
@@ -122,9 +135,9 @@ class RefsSync(ZoteroNotionSync[Item]):
             tags = [Tag(tag=select.name, type=None) for select in action.b.get_propery_raw_value('Tags', [])] \
                    + [Tag(tag=select.name, type=1) for select in action.b.get_propery_raw_value('Special Tags', [])]
 
-            # Update zotero
+            # Update zotero, batched with the tag updates of other items
             action.a.data.tags = tags
-            self.zotero.update_items([action.a])
+            self.tag_writer.submit(action.a)
 
             # Update synced at date in notion
             action.b.extend_properties({
@@ -132,5 +145,9 @@ class RefsSync(ZoteroNotionSync[Item]):
             })
             action.b = self.notion.page_upsert(action.b)
             print(f'-[Zotero] Updated: {action.a.title}')
-        elif action.action_type == action.action_type.DELETE:
+        elif action.action_type == ActionType.DELETE:
             raise Exception('Deleting from zotero is not supported')
+
+    def write_tags(self, items: List[Item]) -> List[Any]:
+        result = self.zotero.update_items(items, fields=['tags'])
+        return [result.error(item.key) or result.successful.get(item.key) for item in items]
@@ -1,5 +1,10 @@
 from .iterators import *
 from .dicts import *
+from .codec import *
+from .slots import *
 from .serialization import *
 from .markdown import *
 from .io import *
+from .batch import *
+from .scan import *
+from .progress import *
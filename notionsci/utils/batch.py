@@ -0,0 +1,69 @@
+import threading
+import time
+from typing import Generic, TypeVar, Callable, List, Any, Optional
+
+T = TypeVar('T')
+
+
+class _Batch(Generic[T]):
+    def __init__(self):
+        self.values: List[T] = []
+        self.updated_at = time.monotonic()
+        self.closed = threading.Event()
+        self.written = threading.Event()
+        self.results: List[Any] = []
+
+
+class WriteBatcher(Generic[T]):
+    """
+    Groups writes issued concurrently by multiple threads into batches. Each caller blocks until the batch
+    holding its value is written. A batch is written once it holds `max_size` values or when no value was
+    added to it for `linger` seconds.
+
+    `write_fn` receives the values of a batch and returns a result per value, results which are exceptions
+    are raised to the respective caller.
+    """
+
+    def __init__(self, write_fn: Callable[[List[T]], List[Any]], max_size: int = 50, linger: float = 0.1):
+        self.write_fn = write_fn
+        self.max_size = max_size
+        self.linger = linger
+        self.lock = threading.Lock()
+        self.batch: Optional[_Batch[T]] = None
+
+    def submit(self, value: T) -> Any:
+        with self.lock:
+            leader = self.batch is None
+            if leader:
+                self.batch = _Batch()
+            batch = self.batch
+            index = len(batch.values)
+            batch.values.append(value)
+            batch.updated_at = time.monotonic()
+            if len(batch.values) >= self.max_size:
+                self._close(batch)
+
+        if leader:
+            # First caller of a batch waits for it to fill up and writes it on behalf of everyone
+            while not batch.closed.wait(self.linger):
+                with self.lock:
+                    if time.monotonic() - batch.updated_at >= self.linger:
+                        self._close(batch)
+
+            try:
+                batch.results = self.write_fn(batch.values)
+            except Exception as e:
+                batch.results = [e] * len(batch.values)
+            batch.written.set()
+        else:
+            batch.written.wait()
+
+        result = batch.results[index]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _close(self, batch: _Batch[T]):
+        batch.closed.set()
+        if self.batch is batch:
+            self.batch = None
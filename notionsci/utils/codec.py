@@ -0,0 +1,191 @@
+import dataclasses
+import datetime as dt
+import enum
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from dataclass_dict_convert import dataclass_dict_convert
+from dataclass_dict_convert.convert import DataclassConvertError, TypeConvertorError, UnknownFieldError, \
+    TypeConvertor
+from dataclass_dict_convert.rfc3339 import parse_rfc3339
+
+_MISSING = object()
+
+
+class _Compiler:
+    """
+    Generates the source of a from_dict function specialized for the fields of a single dataclass.
+    Mirrors the type dispatch of dataclass_dict_convert, but resolves it once instead of on every call.
+    """
+
+    def __init__(
+            self,
+            cls,
+            case: Callable[[str], str],
+            custom_from_dict_convertors: Dict[str, Callable],
+            custom_type_convertors: List[TypeConvertor],
+            direct_fields: List[str],
+            datetime_convertor: Callable,
+            on_unknown_field: Callable[[str], None],
+            undefinable_fields: List[str],
+            explicit_none: Optional[type],
+    ):
+        self.cls = cls
+        self.case = case
+        self.custom_from_dict_convertors = custom_from_dict_convertors
+        self.custom_type_convertors = custom_type_convertors
+        self.direct_fields = direct_fields
+        self.datetime_convertor = datetime_convertor
+        self.on_unknown_field = on_unknown_field
+        self.undefinable_fields = set(undefinable_fields)
+        self.namespace = {
+            'MISSING': _MISSING, 'Mapping': Mapping, 'ExplicitNone': explicit_none,
+            'TypeConvertorError': TypeConvertorError, 'DataclassConvertError': DataclassConvertError,
+        }
+
+    def constant(self, value: Any) -> str:
+        name = f'c{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+    def expression(self, field_name: str, field_type, var: str, depth: int = 0) -> str:
+        if field_name in self.custom_from_dict_convertors:
+            return f'{self.constant(self.custom_from_dict_convertors[field_name])}({var})'
+        if field_type in (int, bool, float, str) or field_name in self.direct_fields:
+            return var
+        for convertor in self.custom_type_convertors:
+            if field_type is convertor.get_type():
+                return f'{self.constant(convertor.convert_from_dict)}({var})'
+        if field_type is dt.datetime:
+            return f'{self.constant(self.datetime_convertor)}({var})'
+
+        origin = getattr(field_type, '__origin__', None)
+        args = getattr(field_type, '__args__', None) or ()
+        if origin is Union and len(args) == 2 and type(None) in args:
+            inner = self.expression(field_name, args[0] if args[0] is not type(None) else args[1], var, depth)
+            return var if inner == var else f'(None if {var} is None else {inner})'
+        if origin is list:
+            item = f'x{depth}'
+            inner = self.expression(field_name, args[0], item, depth + 1)
+            return f'list({var})' if inner == item else f'[{inner} for {item} in {var}]'
+        if origin is dict or field_type is dict:
+            if len(args) != 2 or not all(isinstance(arg, type) for arg in args):
+                # Values of dicts without concrete key and value classes are kept as is
+                return f'dict({var})'
+            key, value = f'k{depth}', f'v{depth}'
+            key_expr = self.expression(field_name, args[0], key, depth + 1)
+            value_expr = self.expression(field_name, args[1], value, depth + 1)
+            return f'{{{key_expr}: {value_expr} for {key}, {value} in {var}.items()}}'
+        if isinstance(field_type, type) and issubclass(field_type, enum.Enum):
+            return f'{self.constant(field_type.__members__)}.get({var})'
+        if dataclasses.is_dataclass(field_type) and hasattr(field_type, 'from_dict'):
+            return f'{self.constant(field_type)}.from_dict({var})'
+
+        raise DataclassConvertError(f'Unhandled "from" type {field_type!r} of field {field_name!r}')
+
+    def compile(self) -> Callable:
+        fields = {}
+        lines = [
+            'def from_dict(d, on_unknown_field_override=None):',
+            '    if type(d) is not dict and not isinstance(d, Mapping):',
+            '        raise ValueError(f"from_dict(d) (possibly nested) where d is {type(d)} instead of dict: {d!r}")',
+            '    kw = {}',
+            '    try:',
+        ]
+        for field in dataclasses.fields(self.cls):
+            key = self.case(field.name)
+            fields[key] = field.name
+            expr = self.expression(field.name, field.type, 'v')
+            if field.name in self.undefinable_fields:
+                # Distinguishes explicit nulls from absent fields
+                expr = f'ExplicitNone() if v is None else {expr}'
+
+            lines += [
+                f'        v = d.get({key!r}, MISSING)',
+                f'        if v is not MISSING:',
+                f'            kw[{field.name!r}] = {expr}',
+            ]
+
+        if not fields:
+            lines.append('        pass')
+
+        lines += [
+            '    except (TypeConvertorError, DataclassConvertError):',
+            '        raise',
+            '    except Exception as e:',
+            f'        raise TypeConvertorError("Error converting {self.cls.__name__} from dict: " + repr(e)) from e',
+            '    if len(kw) != len(d):',
+            '        unknown(d, on_unknown_field_override)',
+            '    return cls(**kw)',
+        ]
+
+        def unknown(d: dict, override: Optional[Callable[[str], None]]):
+            for key in d.keys():
+                if key not in fields:
+                    override(key) if override else self.on_unknown_field(key)
+
+        self.namespace.update(cls=self.cls, unknown=unknown)
+        exec('\n'.join(lines), self.namespace)
+        return self.namespace['from_dict']
+
+
+def default_on_unknown(field_name: str):
+    raise UnknownFieldError(f'Unknown field encountered: {field_name}')
+
+
+def compile_from_dict(
+        cls,
+        dict_letter_case: Optional[Callable[[str], str]] = None,
+        on_unknown_field: Optional[Callable[[str], None]] = None,
+        direct_fields: Optional[List[str]] = None,
+        default_from_datetime_convertor: Optional[Callable] = None,
+        custom_from_dict_convertors: Optional[Dict[str, Callable]] = None,
+        custom_type_convertors: Optional[List[TypeConvertor]] = None,
+        undefinable_fields: Optional[List[str]] = None,
+        explicit_none: Optional[type] = None,
+        **kwargs
+) -> Callable:
+    """
+    Compiles a from_dict function for given dataclass. Takes the same options as `dataclass_dict_convert`,
+    fields listed in `undefinable_fields` are set to `explicit_none()` when explicitly null.
+    """
+    return _Compiler(
+        cls,
+        case=dict_letter_case or (lambda s: s),
+        custom_from_dict_convertors=custom_from_dict_convertors or {},
+        custom_type_convertors=custom_type_convertors or [],
+        direct_fields=direct_fields or [],
+        datetime_convertor=default_from_datetime_convertor or parse_rfc3339,
+        on_unknown_field=on_unknown_field or default_on_unknown,
+        undefinable_fields=undefinable_fields or [],
+        explicit_none=explicit_none,
+    ).compile()
+
+
+def dataclass_codec(_cls=None, *, undefinable_fields: List[str] = None, explicit_none: type = None, **kwargs):
+    """
+    Drop-in replacement for `dataclass_dict_convert` which parses dicts with a from_dict function generated
+    for the class. The function is compiled on first use, once all referenced classes are defined.
+    """
+
+    def wrap(cls):
+        cls = dataclass_dict_convert(**kwargs)(cls)
+        if kwargs.get('extra_field_defaults'):
+            return cls
+
+        compiled = None
+
+        def from_dict(cls2, d, *, on_unknown_field_override=None):
+            nonlocal compiled
+            if compiled is None:
+                compiled = compile_from_dict(
+                    cls, undefinable_fields=undefinable_fields, explicit_none=explicit_none, **kwargs
+                )
+            return compiled(d, on_unknown_field_override)
+
+        cls.from_dict = classmethod(from_dict)
+        return cls
+
+    if _cls is None:
+        return wrap
+    return wrap(_cls)
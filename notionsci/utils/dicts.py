@@ -10,6 +10,17 @@ def filter_dict(fn: Callable[[dict], bool], d: dict) -> dict:
 filter_none_dict = partial(filter_dict, lambda x: x is not None)
 
 
+def strip_none(value: Any) -> Any:
+    """
+    Recursively drops None values from dicts
+    """
+    if isinstance(value, dict):
+        return {k: strip_none(v) for k, v in filter_none_dict(value).items()}
+    elif isinstance(value, list):
+        return [strip_none(v) for v in value]
+    return value
+
+
 def key_by(
         items: Iterable[Any], key: Union[Callable[[Any], Any], str]
 ) -> Dict[Any, Any]:
@@ -1,5 +1,70 @@
+import hashlib
+import json
+import os
 import re
+import tempfile
+from contextlib import contextmanager
+from typing import Any, TextIO, Iterator
+
+# Files created by mkstemp are private, written files get the permissions open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 
 def sanitize_filename(filename: str) -> str:
     return re.sub(r'[/;,><&*:%=+@!#^()|?^]', '', filename)
+
+
+def load_json(path: str, default: Any = None) -> Any:
+    if not os.path.exists(path):
+        return default
+
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[TextIO]:
+    """
+    Opens a unique temporary file in the same directory which replaces given path once closed without errors
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{name}.', suffix='.tmp')
+    try:
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        with os.fdopen(fd, 'w') as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def save_json(path: str, data: Any):
+    """
+    Atomically writes json data to given path (through a temporary file in the same directory)
+    """
+    with atomic_write(path) as f:
+        json.dump(data, f)
+
+
+def text_hash(content: str) -> str:
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class HashingWriter:
+    """
+    Text stream wrapper which hashes everything written through it, equal to `text_hash` of the whole content
+    """
+
+    def __init__(self, sink: TextIO):
+        self.sink = sink
+        self.hash = hashlib.sha1()
+
+    def write(self, content: str) -> int:
+        self.hash.update(content.encode('utf-8'))
+        return self.sink.write(content)
+
+    def hexdigest(self) -> str:
+        return self.hash.hexdigest()
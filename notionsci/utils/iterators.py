@@ -5,3 +5,8 @@ T = TypeVar('T')
 
 def take_1(x: Union[Iterable[T], List[T]]) -> Optional[T]:
     return next(iter(x), None)
+
+
+def chunks(items: List[T], size: int) -> Iterable[List[T]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
@@ -3,9 +3,7 @@ import re
 from abc import abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Dict
-
-import pandas as pd
+from typing import List, Dict, TextIO, Optional, Iterable, Any
 
 
 @dataclass
@@ -22,10 +20,24 @@ class MarkdownContext:
 
 
 class ToMarkdownMixin:
+    __slots__ = ()
+
     @abstractmethod
     def to_markdown(self, context: MarkdownContext) -> str:
         pass
 
+    def write_markdown(self, context: MarkdownContext, sink: TextIO, lead: str = '') -> bool:
+        """
+        Writes the same markdown as `to_markdown` to given sink, preceded by `lead`.
+        Returns False if there was nothing to write. Containers override it to stream their children.
+        """
+        content = self.to_markdown(context)
+        if content is None:
+            return False
+        sink.write(lead)
+        sink.write(content)
+        return True
+
     def countable(self) -> bool:
         return False
 
@@ -71,6 +83,28 @@ YOUTUBE_TEMPLATE = '''
 '''.strip() + '\n'
 
 
+TABLE_JUSTIFY = {
+    'left': str.ljust,
+    'right': str.rjust,
+    'center': str.center,
+}
+
+TABLE_RULE = {
+    'left': lambda width: ':' + '-' * (width + 1),
+    'right': lambda width: '-' * (width + 1) + ':',
+    'center': lambda width: ':' + '-' * width + ':',
+}
+
+
+def table_cell(value: Any) -> str:
+    """
+    Cell content on a single line, pipes are escaped so they do not split the cell
+    """
+    if value is None:
+        return ''
+    return str(value).replace('|', '\\|').replace('\r\n', '<br>').replace('\n', '<br>')
+
+
 class MarkdownListType(Enum):
     bullet = 'bullet'
     numeric = 'numeric'
@@ -151,11 +185,38 @@ class MarkdownBuilder:
         return TOGGLE_TEMPLATE.format(title=title, content=content)
 
     @staticmethod
-    def table(data: pd.DataFrame, alignments: Dict[str, str] = None):
-        if alignments:
-            for col, align in alignments.items():
-                data.style.set_properties(subset=[col], **{'text-align': align})
-        return data.to_markdown(index=False)
+    def toggle_parts(title) -> (str, str):
+        """
+        Toggle markup before and after its content
+        """
+        head, tail = TOGGLE_TEMPLATE.split('{content}')
+        return head.format(title=title), tail
+
+    @staticmethod
+    def table(rows: List[Dict[str, Any]], alignments: Dict[str, str] = None, columns: List[str] = None):
+        """
+        Renders rows as a GFM table. Columns default to the keys of the rows in order of appearance,
+        alignments map column names to left (default), right or center.
+        """
+        columns = columns or list(dict.fromkeys(key for row in rows for key in row))
+        alignments = alignments or {}
+        cells = [[table_cell(row.get(col)) for col in columns] for row in rows]
+        widths = [
+            max([len(col) + 2] + [len(row[i]) for row in cells])
+            for i, col in enumerate(columns)
+        ]
+        aligns = [alignments.get(col, 'left') for col in columns]
+
+        def line(values):
+            return '| ' + ' | '.join(
+                TABLE_JUSTIFY[align](value, width) for value, width, align in zip(values, widths, aligns)
+            ) + ' |'
+
+        return '\n'.join([
+            line(columns),
+            '|' + '|'.join(TABLE_RULE[align](width) for width, align in zip(widths, aligns)) + '|',
+            *map(line, cells)
+        ])
 
     @staticmethod
     def code(content, language):
@@ -182,3 +243,30 @@ def chain_to_markdown(items: List[ToMarkdownMixin], context: MarkdownContext, se
         result.append(item.to_markdown(context))
 
     return sep.join(map(lambda x: f'{prefix}{x}', filter(lambda x: x is not None, result))) if items else ''
+
+
+def write_chain_markdown(
+        items: Optional[Iterable[ToMarkdownMixin]],
+        context: MarkdownContext,
+        sink: TextIO,
+        sep='',
+        prefix='',
+        lead=''
+) -> bool:
+    """
+    Streaming counterpart of `chain_to_markdown`, `lead` is written before the first item
+    """
+    written = False
+    for item in items or []:
+        if not item.countable():
+            context.counter = 1
+        written = item.write_markdown(context, sink, f'{sep if written else lead}{prefix}') or written
+
+    return written
+
+
+def render_markdown(item: ToMarkdownMixin, sink: TextIO, context: Optional[MarkdownContext] = None):
+    """
+    Writes given page or block as markdown to a text stream while walking its tree
+    """
+    item.write_markdown(context or MarkdownContext(), sink)
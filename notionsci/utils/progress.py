@@ -0,0 +1,46 @@
+import threading
+import time
+from typing import Callable, Optional
+
+
+class ProgressReport:
+    """
+    Counts units of work completed by multiple threads and prints the throughput every `interval` seconds
+    """
+
+    def __init__(self, unit: str, interval: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.unit = unit
+        self.interval = interval
+        self.clock = clock
+        self.count = 0
+        self.started_at: Optional[float] = None
+        self.reported_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.started_at is None:
+                self.started_at = self.reported_at = self.clock()
+
+    def tick(self, n: int = 1):
+        with self.lock:
+            now = self.clock()
+            if self.started_at is None:
+                self.started_at = self.reported_at = now
+            self.count += n
+            report = now - self.reported_at >= self.interval
+            if report:
+                self.reported_at = now
+
+        if report:
+            print(f'Progress: {self}')
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started_at if self.started_at is not None else 0.0
+
+    def rate(self) -> float:
+        elapsed = self.elapsed()
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return f'{self.count} {self.unit} in {self.elapsed():.1f}s ({self.rate():.1f} {self.unit}/s)'
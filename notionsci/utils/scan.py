@@ -0,0 +1,45 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import NamedTuple, List, Tuple
+
+
+class FileRecord(NamedTuple):
+    # Path relative to the scanned root
+    path: str
+    size: int
+    mtime_ns: int
+    ctime_ns: int
+
+    @staticmethod
+    def from_stat(path: str, stat: os.stat_result) -> 'FileRecord':
+        return FileRecord(path, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns)
+
+
+def _scan_dir(root: str, relative: str, suffix: str) -> Tuple[List[FileRecord], List[str]]:
+    records, subdirs = [], []
+    with os.scandir(os.path.join(root, relative)) as entries:
+        for entry in entries:
+            path = os.path.join(relative, entry.name) if relative else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(path)
+            elif entry.name.endswith(suffix) and entry.is_file():
+                records.append(FileRecord.from_stat(path, entry.stat()))
+    return records, subdirs
+
+
+def scan_files(root: str, suffix: str = '', max_workers: int = 8) -> List[FileRecord]:
+    """
+    Size and timestamps of all files below root ending with suffix. Directories are listed with `os.scandir`,
+    such that file types come from the directory listing and only matching files are stat'ed.
+    Subdirectories are scanned concurrently by up to `max_workers` threads. Symlinked directories are not followed.
+    """
+    records = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(_scan_dir, root, '', suffix)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, subdirs = future.result()
+                records.extend(found)
+                pending.update(pool.submit(_scan_dir, root, subdir, suffix) for subdir in subdirs)
+    return records
@@ -1,15 +1,26 @@
 import types
 from typing import List, Dict, Union, Any, Callable, Optional, get_type_hints
 
-from dataclass_dict_convert.convert import SimpleTypeConvertor, dataclass_dict_convert
+from dataclass_dict_convert.convert import SimpleTypeConvertor
 from stringcase import camelcase, snakecase
 import itertools as it
 
+from notionsci.utils.codec import dataclass_codec
+
 
 class ExplicitNone():
-    def __nonzero__(self):
+    def __bool__(self):
         return False
 
+    def __eq__(self, other):
+        return isinstance(other, ExplicitNone)
+
+    def __hash__(self):
+        return hash(None)
+
+    def __repr__(self):
+        return 'ExplicitNone()'
+
 
 class UndefinableMeta(type):
     def __getitem__(cls, key):
@@ -43,22 +54,23 @@ def serde(
             for field_name, field_type in types.items()
             if isinstance(field_type, UndefinableMeta)
         ]
+        omitted_keys = [case(field_name) for field_name in it.chain(undefinable_fields, exclude)]
 
-        cls = dataclass_dict_convert(
+        cls = dataclass_codec(
             dict_letter_case=case,
             on_unknown_field=ignore_unknown if ignore_unknown else None,
+            undefinable_fields=undefinable_fields,
+            explicit_none=ExplicitNone,
             **kwargs,
         )(cls)
 
         original_to_dict = cls.to_dict
-        original_from_dict = cls.from_dict
 
         def to_dict(self, *args, **kwargs):
             result: dict = original_to_dict(self, *args, **kwargs)
-            for field_name in it.chain(undefinable_fields, exclude):
-                field_name = case(field_name)
-                if field_name in result and result[field_name] is None:
-                    del result[field_name]
+            for key in omitted_keys:
+                if key in result and result[key] is None:
+                    del result[key]
 
             for k, v in result.items():
                 if isinstance(v, ExplicitNone):
@@ -66,17 +78,7 @@ def serde(
 
             return result
 
-        def from_dict(dict, *args, **kwargs):
-            result = original_from_dict(dict, *args, **kwargs)
-            for field_name in undefinable_fields:
-                field_name = case(field_name)
-                if field_name in dict and dict[field_name] is None:
-                    setattr(result, field_name, ExplicitNone())
-
-            return result
-
         cls.to_dict = to_dict
-        cls.from_dict = from_dict
 
         return cls
 
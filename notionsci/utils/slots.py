@@ -0,0 +1,71 @@
+import dataclasses
+from typing import Iterable, Optional
+
+
+def _slot_names(cls) -> set:
+    names = set()
+    for base in cls.__mro__:
+        slots = base.__dict__.get('__slots__', ())
+        names.update([slots] if isinstance(slots, str) else slots)
+    return names
+
+
+def _variant_property(name: str) -> property:
+    def get(self):
+        return self._variant if getattr(self, '_variant_field', None) == name else None
+
+    def set(self, value):
+        if value is not None:
+            self._variant, self._variant_field = value, name
+        elif getattr(self, '_variant_field', None) == name:
+            self._variant = self._variant_field = None
+
+    return property(get, set)
+
+
+def slotted(_cls=None, *, variants: Optional[Iterable[str]] = None):
+    """
+    Recreates a dataclass with `__slots__` so its instances do not carry a `__dict__`.
+    Fields listed in `variants` are mutually exclusive and share a single slot: only the last one
+    set to a value other than None holds it, the others read as None.
+    Must be applied directly on top of `@dataclass`.
+    """
+
+    def wrap(cls):
+        variant_names = set(variants or [])
+        inherited = _slot_names(cls)
+        names = [
+            f.name for f in dataclasses.fields(cls)
+            if f.name not in inherited and f.name not in variant_names and not isinstance(
+                getattr(cls, f.name, None), property
+            )
+        ]
+        if variant_names and '_variant' not in inherited:
+            names += ['_variant', '_variant_field']
+
+        namespace = dict(cls.__dict__)
+        for f in dataclasses.fields(cls):
+            # Class level defaults conflict with slots, dataclass keeps them in __init__
+            if f.name in names or f.name in variant_names:
+                namespace.pop(f.name, None)
+        namespace.pop('__dict__', None)
+        namespace.pop('__weakref__', None)
+        namespace['__slots__'] = tuple(names)
+        for name in variant_names:
+            namespace[name] = _variant_property(name)
+
+        new_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+        new_cls.__qualname__ = cls.__qualname__
+
+        # Point the implicit __class__ cell used by super() to the new class
+        for member in namespace.values():
+            func = getattr(member, '__func__', member)
+            for cell in getattr(func, '__closure__', None) or ():
+                if cell.cell_contents is cls:
+                    cell.cell_contents = new_cls
+
+        return new_cls
+
+    if _cls is None:
+        return wrap
+    return wrap(_cls)
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_modules(code: str) -> set:
+    result = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys\nprint(' '.join(sys.modules))"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+class TestCli(unittest.TestCase):
+    def test_lazy_imports(self):
+        modules = imported_modules("import notionsci.cli")
+
+        for module in [
+            "notion",
+            "notion_client",
+            "pyzotero",
+            "simple_parsing",
+            "notionsci.config.structure",
+            "notionsci.connections",
+        ]:
+            self.assertNotIn(module, modules)
+
+    def test_lazy_config(self):
+        modules = imported_modules(
+            "import notionsci.config as c\nassert c._loaded is None"
+        )
+        self.assertNotIn("yaml", modules)
@@ -1,6 +1,355 @@
+import asyncio
+import dataclasses
+import io
+import datetime as dt
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from notionsci.connections.notion import (
+    NotionClient,
+    Page,
+    Block,
+    AsyncNotionClient,
+    async_list,
+    BlockType,
+    markdown_to_blocks,
+    parse_markdown_page,
+    block_payload,
+    BlockCache,
+    MarkdownContext,
+    Heading1Block,
+    RichText,
+    RichTextType,
+)
+from notionsci.utils import render_markdown, MarkdownBuilder
+from utils import FakeNotionApi, block_json, FakeAsyncNotionApi, load_asset_json
+
+
+def nested_tree(edited: str = None):
+    return {
+        "root": [block_json(f"t{i}", "toggle", True, edited) for i in range(5)],
+        **{
+            f"t{i}": [
+                block_json(f"t{i}-{j}", "bulleted_list_item", j == 0, edited)
+                for j in range(3)
+            ]
+            for i in range(5)
+        },
+        **{
+            f"t{i}-0": [block_json(f"t{i}-0-p", last_edited_time=edited)]
+            for i in range(5)
+        },
+    }
+
+
+MARKDOWN_PAGE = """# Title
+
+| Name | Value |
+|:-----|:------|
+| Synced At | 2021-01-01 |
+
+## Heading
+
+Some **bold** and [link](http://x.y)
+
+- item
+    - nested
+- [x] done
+
+1. one
+
+```py
+print(1)
+```
+
+$$
+x^2
+$$
+
+---
+"""
+
+
+def text_block(id: str, type: str, content: str, children: list = None) -> Block:
+    raw = block_json(id, type, bool(children))
+    raw[type]["text"] = [
+        {"type": "text", "plain_text": content, "text": {"content": content}}
+    ]
+    block = Block.from_dict(raw)
+    if children:
+        block.set_children(children)
+    return block
+
+
+def markdown_page() -> Page:
+    page = Page.from_dict(load_asset_json("notion_ref_pages.json")["results"][0])
+    tree = [
+        text_block("h", "heading_1", "Heading"),
+        text_block(
+            "p",
+            "paragraph",
+            "Paragraph",
+            [
+                text_block("p1", "paragraph", "Nested"),
+                text_block("p2", "numbered_list_item", "One"),
+                text_block("p3", "numbered_list_item", "Two"),
+            ],
+        ),
+        text_block(
+            "n1",
+            "numbered_list_item",
+            "First",
+            [text_block("b1", "bulleted_list_item", "Bullet")],
+        ),
+        text_block("n2", "numbered_list_item", "Second"),
+        text_block("t1", "toggle", "Toggle", [text_block("t2", "paragraph", "In")]),
+        text_block("t3", "toggle", "Empty toggle"),
+        text_block("d", "to_do", "Todo"),
+        Block.from_dict({**block_json("div", "divider"), "divider": {}}),
+    ]
+    page.set_children(tree)
+    return page
 
 
 class TestNotion(unittest.TestCase):
     def test_clone(self):
         pass
+
+    def test_load_children_recursive(self):
+        api = FakeNotionApi(nested_tree(), page_size=2, delay=0.01)
+        notion = NotionClient(client=api, max_in_flight=3)
+
+        page = Page(id="root")
+        notion.load_children(page, recursive=True)
+
+        self.assertTreeLoaded(page)
+        self.assertLessEqual(api.max_in_flight, 3)
+        self.assertGreater(api.max_in_flight, 1)
+
+    def test_load_children_shared_pool(self):
+        api = FakeNotionApi(nested_tree(), page_size=2, delay=0.01)
+        notion = NotionClient(client=api, max_in_flight=3)
+
+        pages = [Page(id="root") for _ in range(4)]
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            with ThreadPoolExecutor(max_workers=len(pages)) as loaders:
+                list(
+                    loaders.map(
+                        lambda page: notion.load_children(
+                            page, recursive=True, pool=pool
+                        ),
+                        pages,
+                    )
+                )
+
+        for page in pages:
+            self.assertTreeLoaded(page)
+        self.assertEqual(api.max_in_flight, 3)
+
+    def test_async_load_children_recursive(self):
+        api = FakeAsyncNotionApi(nested_tree(), page_size=2, delay=0.01)
+        notion = AsyncNotionClient(client=api, max_in_flight=3)
+
+        page = Page(id="root")
+        asyncio.get_event_loop().run_until_complete(
+            notion.load_children(page, recursive=True)
+        )
+
+        self.assertTreeLoaded(page)
+        self.assertLessEqual(api.max_in_flight, 3)
+        self.assertGreater(api.max_in_flight, 1)
+
+    def test_block_cache(self):
+        edited = dt.datetime(2021, 1, 1, tzinfo=dt.timezone.utc)
+        api = FakeNotionApi(nested_tree("2021-01-01T00:00:00.000Z"))
+        notion = NotionClient(client=api, cache=BlockCache(":memory:"))
+
+        def load(**kwargs):
+            api.calls.clear()
+            page = Page(id="root", last_edited_time=edited)
+            notion.load_children(page, recursive=True, **kwargs)
+            self.assertTreeLoaded(page)
+            paragraph = page.get_children()[2].get_children()[0].get_children()[0]
+            return (
+                paragraph.paragraph.text[0].plain_text
+                if paragraph.paragraph.text
+                else None
+            )
+
+        load(allow_stale=True)
+        self.assertEqual(len(api.calls), 11)
+        load(allow_stale=True)
+        self.assertEqual(api.calls, [])
+        self.assertEqual(notion.cache.stats.hits, 11)
+
+        # Edit of a paragraph does not change the edit time of the page or its parent
+        api.tree["t2-0"][0]["paragraph"]["text"] = [
+            {"type": "text", "plain_text": "Edited", "text": {"content": "Edited"}}
+        ]
+        self.assertEqual(load(), "Edited")
+        self.assertEqual(len(api.calls), 11)
+        # The cache is only used by loads which accept stale content
+        self.assertIsNone(load(allow_stale=True))
+        self.assertEqual(api.calls, [])
+
+    def test_block_cache_eviction(self):
+        edited = dt.datetime(2021, 1, 1, tzinfo=dt.timezone.utc)
+        blocks = [Block.from_dict(block_json(f"b{i}")) for i in range(10)]
+        cache = BlockCache(":memory:", max_size=3000)
+        for i in range(20):
+            cache.put(f"p{i}", edited, blocks)
+            cache.get("p0", edited)
+
+        self.assertLessEqual(cache.size, 3000)
+        self.assertGreater(cache.stats.evictions, 0)
+        self.assertIsNotNone(cache.get("p0", edited))
+        self.assertIsNone(cache.get("p1", edited))
+        self.assertIsNone(cache.get("p0", edited + dt.timedelta(days=1)))
+
+        # Recently edited blocks are not cached as edit times are rounded to the minute
+        cache.put("recent", dt.datetime.now(dt.timezone.utc), blocks)
+        self.assertIsNone(cache.get("recent", dt.datetime.now(dt.timezone.utc)))
+
+    def test_slotted_blocks(self):
+        heading = Block(
+            type=BlockType.heading_1,
+            heading_1=Heading1Block(
+                text=[RichText(type=RichTextType.text, plain_text="Heading")]
+            ),
+        )
+        item = markdown_to_blocks("- **a**\n    - b")[0]
+
+        for obj in [heading, item, item.get_part(), item.get_part().text[0]]:
+            self.assertFalse(hasattr(obj, "__dict__"))
+        self.assertIsNone(item.paragraph)
+        self.assertEqual(item.get_children()[0].type, BlockType.bulleted_list_item)
+        self.assertEqual(heading.to_markdown(MarkdownContext()), "## Heading")
+
+        copy = dataclasses.replace(
+            item, bulleted_list_item=None, paragraph=heading.get_part()
+        )
+        self.assertIs(copy.paragraph, heading.get_part())
+        self.assertIsNone(copy.bulleted_list_item)
+        self.assertEqual(Block.from_dict(heading.to_dict()), heading)
+
+    def test_render_markdown(self):
+        page = markdown_page()
+        sink = io.StringIO()
+        render_markdown(page, sink)
+
+        self.assertEqual(sink.getvalue(), page.to_markdown(MarkdownContext()))
+        self.assertIn("2. Second", sink.getvalue())
+        self.assertIn("<summary>Toggle</summary>", sink.getvalue())
+
+    def test_markdown_table(self):
+        table = MarkdownBuilder.table(
+            [{"Name": "a", "Value": "x|y"}, {"Name": "long name", "Value": "1\n2"}],
+            alignments={"Value": "right"},
+        )
+        self.assertEqual(
+            table.split("\n"),
+            [
+                "| Name      |   Value |",
+                "|:----------|--------:|",
+                "| a         |    x\\|y |",
+                "| long name |  1<br>2 |",
+            ],
+        )
+
+        _, blocks = parse_markdown_page(markdown_page().to_markdown(MarkdownContext()))
+        self.assertEqual(blocks[0].type, BlockType.heading_1)
+
+    def test_async_block_retrieve_all_children(self):
+        api = FakeAsyncNotionApi(nested_tree(), page_size=2)
+        notion = AsyncNotionClient(client=api)
+
+        children = asyncio.get_event_loop().run_until_complete(
+            async_list(notion.block_retrieve_all_children("root"))
+        )
+
+        self.assertEqual([b.id for b in children], [f"t{i}" for i in range(5)])
+        self.assertEqual(api.calls, ["root"] * 3)
+
+    def test_markdown_to_blocks(self):
+        title, blocks = parse_markdown_page(MARKDOWN_PAGE)
+        self.assertEqual(title, "Title")
+        self.assertEqual(
+            [b.type for b in blocks],
+            [
+                BlockType.heading_1,
+                BlockType.paragraph,
+                BlockType.bulleted_list_item,
+                BlockType.to_do,
+                BlockType.numbered_list_item,
+                BlockType.code,
+                BlockType.equation,
+                BlockType.divider,
+            ],
+        )
+
+        paragraph = block_payload(blocks[1])
+        self.assertEqual(
+            [t["text"]["content"] for t in paragraph["paragraph"]["text"]],
+            ["Some ", "bold", " and ", "link"],
+        )
+        self.assertTrue(paragraph["paragraph"]["text"][1]["annotations"]["bold"])
+        self.assertEqual(
+            paragraph["paragraph"]["text"][3]["text"]["link"], {"url": "http://x.y"}
+        )
+        self.assertEqual(
+            block_payload(blocks[2]),
+            {
+                "object": "block",
+                "type": "bulleted_list_item",
+                "bulleted_list_item": {
+                    "text": [{"type": "text", "text": {"content": "item"}}]
+                },
+            },
+        )
+        self.assertEqual(blocks[2].get_children()[0].type, BlockType.bulleted_list_item)
+        self.assertTrue(blocks[3].to_do.checked)
+        self.assertEqual(blocks[5].code.language, "python")
+        self.assertEqual(blocks[6].equation.expression, "x^2")
+
+    def test_append_blocks(self):
+        blocks = markdown_to_blocks(
+            "\n".join(f"- item {i}\n    - nested {i}" for i in range(250))
+        )
+        api = FakeNotionApi({}, delay=0.001)
+        notion = NotionClient(client=api, max_in_flight=3)
+        notion.append_blocks("root", blocks)
+
+        self.assertEqual(api.appends[:3], [("root", 100), ("root", 100), ("root", 50)])
+        self.assertEqual(len(api.appends), 3 + 250)
+        self.assertEqual(len(api.tree["root"]), 250)
+        self.assertEqual(
+            api.tree["root/249"][0]["bulleted_list_item"]["text"][0]["text"],
+            {"content": "nested 249"},
+        )
+        self.assertGreater(api.max_in_flight, 1)
+
+    def test_async_append_blocks(self):
+        blocks = markdown_to_blocks("- a\n    - b\n        - c\n- d")
+        api = FakeAsyncNotionApi({})
+        notion = AsyncNotionClient(client=api)
+        asyncio.get_event_loop().run_until_complete(
+            notion.append_blocks("root", blocks)
+        )
+
+        self.assertEqual(api.appends, [("root", 2), ("root/0", 1), ("root/0/0", 1)])
+
+    def assertTreeLoaded(self, page: Page):
+        self.assertEqual(
+            [b.id for b in page.get_children()], [f"t{i}" for i in range(5)]
+        )
+        for i, toggle in enumerate(page.get_children()):
+            self.assertEqual(
+                [b.id for b in toggle.get_children()], [f"t{i}-{j}" for j in range(3)]
+            )
+            self.assertEqual(
+                [b.id for b in toggle.get_children()[0].get_children()], [f"t{i}-0-p"]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,16 +1,117 @@
+import datetime as dt
 import unittest
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional, List, Dict
 
-from notionsci.connections.notion.structures import QueryResult
+from dataclass_dict_convert import dataclass_dict_convert
+from dataclass_dict_convert.convert import UnknownFieldError
+from stringcase import camelcase
+
+from notionsci.connections.notion.structures import (
+    QueryResult,
+    Page,
+    Property,
+    LazyProperties,
+)
 from notionsci.connections.zotero import Item, Collection
+from notionsci.utils import dataclass_codec, serde, Undefinable, ExplicitNone
 from utils import load_asset_json
 
 
+class Color(Enum):
+    red = "red"
+    blue = "blue"
+
+
+def make_tree(decorator):
+    @decorator
+    @dataclass
+    class Leaf:
+        name: str
+        color: Optional[Color] = None
+
+    @decorator
+    @dataclass
+    class Tree:
+        leaves: List[Leaf]
+        by_name: Dict[str, Leaf]
+        created_time: Optional[dt.datetime] = None
+        extra: Optional[Dict] = None
+        parent_name: Undefinable[str] = None
+
+    return Tree
+
+
 class TestParse(unittest.TestCase):
     def test_notion_parse_items(self):
         data = load_asset_json("notion_ref_pages.json")
 
         result = QueryResult.from_dict(data)
 
+        self.assertEqual(len(result.results), len(data["results"]))
+        for page in result.results:
+            self.assertEqual(page.from_dict(page.to_dict()), page)
+
+    def test_lazy_properties(self):
+        data = load_asset_json("notion_ref_pages.json")["results"][0]
+        page = Page.from_dict(data)
+
+        self.assertIsInstance(page.properties, LazyProperties)
+        self.assertFalse(any(page.properties.is_decoded(k) for k in page.properties))
+
+        title = next(k for k, v in data["properties"].items() if v["type"] == "title")
+        self.assertTrue(page.get_title())
+        self.assertEqual(
+            [k for k in page.properties if page.properties.is_decoded(k)], [title]
+        )
+        self.assertIs(page.get_property(title), page.get_property(title))
+
+        eager = {k: Property.from_dict(v) for k, v in data["properties"].items()}
+        self.assertEqual(page.properties, eager)
+        self.assertEqual(
+            page.to_dict()["properties"], {k: v.to_dict() for k, v in eager.items()}
+        )
+
+    def test_codec(self):
+        data = {
+            "leaves": [{"name": "a", "color": "red"}, {"name": "b"}],
+            "byName": {"c": {"name": "c", "color": None}},
+            "createdTime": "2021-08-14T22:37:00.000Z",
+            "extra": {"x": [1]},
+        }
+
+        parsed = {}
+        for name, decorator in [
+            ("library", dataclass_dict_convert(dict_letter_case=camelcase)),
+            ("codec", dataclass_codec(dict_letter_case=camelcase)),
+        ]:
+            tree = make_tree(decorator)
+            parsed[name] = tree.from_dict(data)
+            self.assertEqual(parsed[name].leaves[0].color, Color.red)
+
+            with self.assertRaises(UnknownFieldError):
+                tree.from_dict({**data, "unknown": 1})
+            unknown = []
+            tree.from_dict(
+                {**data, "unknown": 1}, on_unknown_field_override=unknown.append
+            )
+            self.assertEqual(unknown, ["unknown"])
+
+        self.assertEqual(
+            parsed["codec"].created_time,
+            dt.datetime(2021, 8, 14, 22, 37, tzinfo=dt.timezone.utc),
+        )
+        self.assertEqual(parsed["codec"].to_dict(), parsed["library"].to_dict())
+
+    def test_codec_undefinable(self):
+        tree = make_tree(serde(camel=True))
+        self.assertIsNone(tree.from_dict({"leaves": [], "byName": {}}).parent_name)
+        explicit = tree.from_dict({"leaves": [], "byName": {}, "parentName": None})
+        self.assertIsInstance(explicit.parent_name, ExplicitNone)
+        self.assertEqual(explicit.to_dict()["parentName"], None)
+        self.assertNotIn("parentName", tree(leaves=[], by_name={}).to_dict())
+
     def test_zotero_parse_items(self):
         data = load_asset_json("zotero_items.json")
 
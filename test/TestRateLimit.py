@@ -0,0 +1,140 @@
+import unittest
+from unittest import mock
+
+import httpx
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+from notionsci.connections.notion import (
+    RateLimiter,
+    TokenBucket,
+    RateLimitedClient,
+    is_idempotent,
+)
+
+
+def http_error(status: int, headers: dict = None) -> HTTPResponseError:
+    return HTTPResponseError(httpx.Response(status, headers=headers or {}))
+
+
+def failing(errors):
+    errors = list(errors)
+
+    def fn():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    return fn
+
+
+class TestRateLimit(unittest.TestCase):
+    def test_token_bucket_paces(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=2.0, capacity=2, clock=lambda: now[0])
+
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+
+        now[0] = 10.0
+        self.assertEqual(bucket.reserve(), 0.0)
+
+    def test_token_bucket_pause(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=1.0, capacity=5, clock=lambda: now[0])
+        bucket.pause(3.0)
+
+        self.assertAlmostEqual(bucket.reserve(), 4.0)
+
+    @mock.patch("time.sleep")
+    def test_retry_after(self, sleep):
+        limiter = RateLimiter(requests_per_second=0)
+        result = limiter.call(failing([http_error(429, {"Retry-After": "7"})]))
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(limiter.stats.requests, 2)
+        self.assertEqual(limiter.stats.throttled, 1)
+        self.assertEqual(limiter.stats.retries, 1)
+
+    @mock.patch("time.sleep")
+    def test_retry_honours_bucket_pause(self, sleep):
+        limiter = RateLimiter(requests_per_second=1, burst=1)
+        limiter.call(failing([http_error(429, {"Retry-After": "7"})]))
+
+        self.assertGreaterEqual(limiter.stats.wait_time, 7.0)
+
+    @mock.patch("time.sleep")
+    def test_retry_server_errors_and_timeouts(self, sleep):
+        limiter = RateLimiter(requests_per_second=0, max_retries=3)
+        result = limiter.call(
+            failing([http_error(502), RequestTimeoutError(), http_error(503)])
+        )
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(limiter.stats.retries, 3)
+        self.assertEqual(limiter.stats.throttled, 0)
+
+    @mock.patch("time.sleep")
+    def test_no_retry(self, sleep):
+        limiter = RateLimiter(requests_per_second=0, max_retries=2)
+
+        with self.assertRaises(HTTPResponseError):
+            limiter.call(failing([http_error(400)]))
+        with self.assertRaises(HTTPResponseError):
+            limiter.call(failing([http_error(500)] * 3))
+
+    @mock.patch("time.sleep")
+    def test_no_retry_non_idempotent(self, sleep):
+        limiter = RateLimiter(requests_per_second=0, max_retries=3)
+
+        with self.assertRaises(HTTPResponseError):
+            limiter.call(failing([http_error(502)]), idempotent=False)
+        with self.assertRaises(RequestTimeoutError):
+            limiter.call(failing([RequestTimeoutError()]), idempotent=False)
+        self.assertEqual(
+            limiter.call(failing([http_error(429)]), idempotent=False), "ok"
+        )
+
+    @mock.patch("time.sleep")
+    def test_client_retries_by_method(self, sleep):
+        client = RateLimitedClient(
+            auth="token", limiter=RateLimiter(requests_per_second=0)
+        )
+        for method, calls in [("GET", 2), ("PATCH", 2), ("POST", 1)]:
+            send = failing([http_error(502)])
+            with mock.patch(
+                "notion_client.Client.request",
+                autospec=True,
+                side_effect=lambda *args: send(),
+            ) as request:
+                try:
+                    client.request("pages", method)
+                except HTTPResponseError:
+                    pass
+            self.assertEqual(request.call_count, calls, method)
+
+    @mock.patch("time.sleep")
+    def test_client_no_retry_append(self, sleep):
+        client = RateLimitedClient(
+            auth="token", limiter=RateLimiter(requests_per_second=0)
+        )
+        self.assertFalse(is_idempotent("PATCH", "blocks/abc/children"))
+        self.assertTrue(is_idempotent("PATCH", "blocks/abc"))
+        self.assertTrue(is_idempotent("GET", "blocks/abc/children"))
+
+        for error in [http_error(503), RequestTimeoutError()]:
+            send = failing([error])
+            with mock.patch(
+                "notion_client.Client.request",
+                autospec=True,
+                side_effect=lambda *args: send(),
+            ) as request:
+                with self.assertRaises(type(error)):
+                    client.blocks.children.append("abc", children=[])
+            self.assertEqual(request.call_count, 1)
+            self.assertEqual(request.call_args[0][2], "PATCH")
+
+
+if __name__ == "__main__":
+    unittest.main()
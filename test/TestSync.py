@@ -0,0 +1,617 @@
+import copy
+import gc
+import datetime as dt
+import os
+import tempfile
+import threading
+import time
+import unittest
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+from notionsci.connections.notion import QueryResult, Page, Property
+from notionsci.sync import (
+    Action,
+    ActionTarget,
+    ActionType,
+    ActionExecutor,
+    DependencyGraph,
+    topo_sort,
+    Sync,
+    SyncJournal,
+)
+from notionsci.sync import DatabaseSnapshot, SqliteSyncState, SyncRecord, payload_hash
+from notionsci.sync.markdown import (
+    MarkdownPage,
+    MarkdownPagesSync,
+    MarkdownManifest,
+    page_key,
+)
+from notionsci.sync.zotero import CollectionsSync, RefsSync
+from notionsci.utils import WriteBatcher, scan_files, atomic_write
+from utils import load_asset_json
+
+
+def ref_pages():
+    return QueryResult.from_dict(load_asset_json("notion_ref_pages.json")).results
+
+
+class StubNotion:
+    def __init__(self, pages):
+        self.pages = pages
+        self.filters = []
+        self.updates = []
+
+    def database_query_all(self, id, filter=None, sorts=None):
+        self.filters.append(filter)
+        return iter(self.pages)
+
+    def page_update(self, page):
+        self.updates.append(page)
+        return page
+
+
+class ExportNotion(StubNotion):
+    max_in_flight = 4
+
+    def __init__(self, pages):
+        super().__init__(pages)
+        self.lock = threading.Lock()
+        self.loading = 0
+        self.loading_max = 0
+        self.pools = set()
+
+    def load_children(self, item, recursive=False, databases=False, pool=None):
+        with self.lock:
+            self.loading += 1
+            self.loading_max = max(self.loading_max, self.loading)
+            self.pools.add(pool)
+        time.sleep(0.02)
+        item.set_children([])
+        with self.lock:
+            self.loading -= 1
+
+
+class ListSync(Sync):
+    def __init__(self, items, changed, journal, broken=()):
+        self.items = items
+        self.changed = changed
+        self.journal = journal
+        self.broken = set(broken)
+        self.pushed = []
+
+    def fetch_items_a(self):
+        return dict(self.items)
+
+    def fetch_items_b(self):
+        return {}
+
+    def preprocess(self, items_a, items_b, keys):
+        return items_a, items_b, [k for k in keys if k in self.changed]
+
+    def compare(self, a, b):
+        return Action.push(ActionTarget.B, a, b)
+
+    def execute_b(self, action):
+        if action.a in self.broken:
+            raise Exception("Network down")
+        self.pushed.append(action.a)
+
+
+class StreamSync(Sync):
+    pipelined = True
+    pipeline_size = 2
+    concurrency_b = 2
+
+    def __init__(self, items_a, items_b, journal=None):
+        self.items_a = items_a
+        self.items_b = items_b
+        self.journal = journal
+        self.fetched = []
+        self.pushed = []
+        self.pending_max = 0
+
+    def fetch_items_a(self):
+        return dict(self.items_a)
+
+    def fetch_items_b(self):
+        raise Exception("Should be streamed")
+
+    def stream_items_b(self):
+        for key, b in self.items_b:
+            self.fetched.append(key)
+            self.pending_max = max(
+                self.pending_max, len(self.fetched) - len(self.pushed)
+            )
+            yield key, b
+
+    def compare(self, a, b):
+        if a == b:
+            return Action.ignore()
+        return Action.push(ActionTarget.A if a is None else ActionTarget.B, a, b)
+
+    def execute(self, action):
+        time.sleep(0.005)
+        self.pushed.append((action.target, action.a or action.b))
+
+
+class Payload:
+    pass
+
+
+class MemorySync(StreamSync):
+    """
+    Streams payloads created on the fly and tracks which of them are still alive
+    """
+
+    def __init__(self, count):
+        super().__init__({}, [])
+        self.count = count
+        self.alive = []
+        self.alive_max = 0
+        self.counts = None
+
+    def stream_items_b(self):
+        for i in range(self.count):
+            payload = Payload()
+            self.alive.append(weakref.ref(payload))
+            yield f"k{i}", payload
+
+    def execute(self, action):
+        gc.collect()
+        self.alive_max = max(self.alive_max, sum(1 for r in self.alive if r()))
+
+    def postprocess(self, counts):
+        self.counts = counts
+
+
+class TestSync(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self.tmp.name, "snapshot.json")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_snapshot_roundtrip(self):
+        pages = ref_pages()
+        snapshot = DatabaseSnapshot.load(self.snapshot_path, "db")
+        self.assertTrue(snapshot.is_stale(None))
+
+        snapshot.reset()
+        snapshot.merge(pages)
+        snapshot.save()
+
+        loaded = DatabaseSnapshot.load(self.snapshot_path, "db")
+        self.assertFalse(loaded.is_stale(dt.timedelta(days=1)))
+        self.assertEqual(loaded.high_water_mark, max(p.last_edited_time for p in pages))
+        self.assertEqual(
+            {p.id: p.get_title() for p in loaded.get_pages()},
+            {p.id: p.get_title() for p in pages},
+        )
+        self.assertTrue(
+            DatabaseSnapshot.load(self.snapshot_path, "other").is_stale(None)
+        )
+
+    def test_snapshot_merge(self):
+        pages = ref_pages()
+        snapshot = DatabaseSnapshot(database_id="db")
+        snapshot.merge(pages[:2])
+        high_water_mark = snapshot.high_water_mark
+
+        edited = copy.deepcopy(pages[0])
+        edited.last_edited_time = high_water_mark + dt.timedelta(hours=1)
+        snapshot.merge([edited], advance=False)
+        self.assertEqual(snapshot.high_water_mark, high_water_mark)
+
+        archived = copy.deepcopy(pages[1])
+        archived.archived = True
+        snapshot.merge([archived])
+        self.assertEqual(list(snapshot.pages.keys()), [pages[0].id])
+
+    def test_fetch_items_b_delta(self):
+        pages = ref_pages()
+        snapshot = DatabaseSnapshot(self.snapshot_path, "db")
+        notion = StubNotion(pages)
+
+        sync = CollectionsSync(notion, None, "db", snapshot=snapshot)
+        items = sync.fetch_items_b()
+        self.assertEqual(notion.filters, [None])
+        self.assertEqual(len(items), len({p.get_propery_value("ID") for p in pages}))
+
+        notion.pages = pages[:1]
+        sync = CollectionsSync(
+            notion, None, "db", snapshot=DatabaseSnapshot.load(self.snapshot_path, "db")
+        )
+        items_delta = sync.fetch_items_b()
+        self.assertEqual(
+            notion.filters[1]["last_edited_time"]["on_or_after"],
+            snapshot.high_water_mark.isoformat(),
+        )
+        self.assertEqual(items_delta.keys(), items.keys())
+        self.assertEqual(sync.last_sync_date, snapshot.high_water_mark)
+
+    def test_fetch_items_b_empty(self):
+        notion = StubNotion([])
+        sync = CollectionsSync(
+            notion, None, "db", snapshot=DatabaseSnapshot(self.snapshot_path, "db")
+        )
+        self.assertEqual(sync.fetch_items_b(), {})
+
+        # Empty database is not scanned in full again, only since the last full scan
+        snapshot = DatabaseSnapshot.load(self.snapshot_path, "db")
+        self.assertFalse(snapshot.is_stale(dt.timedelta(days=1)))
+        sync = CollectionsSync(notion, None, "db", snapshot=snapshot)
+        self.assertEqual(sync.fetch_items_b(), {})
+        self.assertEqual(
+            notion.filters[1]["last_edited_time"]["on_or_after"],
+            snapshot.full_fetched_at.isoformat(),
+        )
+
+    def test_is_changed(self):
+        items_a = {"a": 1, "b": 2, "c": 3}
+        items_b = {"a": 1, "b": 2, "d": 4}
+        sync = RefsSync(None, None, "db", changed_keys_a={"a"}, changed_keys_b={"b"})
+
+        sync.twoway = False
+        self.assertEqual(
+            [k for k in "abcd" if sync.is_changed(k, items_a, items_b)],
+            ["a", "c", "d"],
+        )
+        sync.twoway = True
+        self.assertEqual(
+            [k for k in "abcd" if sync.is_changed(k, items_a, items_b)],
+            ["a", "b", "c", "d"],
+        )
+        sync.changed_keys_a = None
+        self.assertTrue(sync.is_changed("b", items_a, items_b))
+
+    def test_sqlite_state(self):
+        path = os.path.join(self.tmp.name, "state.db")
+        state = SqliteSyncState(path, "refs")
+        synced_at = dt.datetime(2021, 1, 1, tzinfo=dt.timezone.utc)
+        state.put(SyncRecord("a", "page-a", 3, payload_hash({"x": 1}), synced_at))
+        state.put(SyncRecord("b", "page-b", 4))
+        SqliteSyncState(path, "collections").put(SyncRecord("a", "other"))
+        state.close()
+
+        state = SqliteSyncState(path, "refs")
+        self.assertEqual(
+            state.get("a"),
+            SyncRecord("a", "page-a", "3", payload_hash({"x": 1}), synced_at),
+        )
+        self.assertTrue(state.matches("a", remote_id="page-a", version=3))
+        self.assertFalse(state.matches("a", version=4))
+        self.assertFalse(state.matches("a", payload_hash=payload_hash({"x": 2})))
+        self.assertFalse(state.matches("c"))
+
+        state.delete("b")
+        self.assertEqual([r.key for r in state.records()], ["a"])
+
+    def test_is_changed_state(self):
+        pages = {p.get_propery_value("ID"): p for p in ref_pages()}
+        key, page = next(iter(pages.items()))
+        item = type("Item", (), {"key": key, "version": 7})()
+
+        state = SqliteSyncState(":memory:", "refs")
+        sync = RefsSync(None, None, "db", state=state, twoway=False)
+        self.assertTrue(sync.is_changed(key, {key: item}, pages))
+
+        state.put(SyncRecord(key, page.id, 7))
+        self.assertFalse(sync.is_changed(key, {key: item}, pages))
+
+        state.put(SyncRecord(key, "another-page", 7))
+        self.assertTrue(sync.is_changed(key, {key: item}, pages))
+
+    def test_execute_b_diff(self):
+        page = ref_pages()[0]
+        props = {
+            "ID": Property.as_rich_text("YHGZV8LU"),
+            "Title": Property.as_rich_text("AlphaFold"),
+            "Authors": Property.as_rich_text(None),
+            "Type": Property.as_select("webpage"),
+            "Cite Key": Property.as_title("Alphafold"),
+            "URL": Property.as_url(
+                "https://deepmind.com/research/case-studies/alphafold"
+            ),
+            "Tags": Property.as_multi_select([]),
+            "Collections": Property.as_multi_select(["Reinforcement Learning"]),
+            "Synced At": Property.as_date(dt.datetime.now(dt.timezone.utc)),
+        }
+        item = type("Item", (), {"key": "YHGZV8LU", "version": 1})()
+        notion = StubNotion([])
+        sync = CollectionsSync(notion, None, "db")
+        sync.collect_props = lambda a: props
+
+        sync.execute_b(Action.push(ActionTarget.B, item, copy.deepcopy(page)))
+        self.assertEqual(notion.updates, [])
+        self.assertEqual(sync.skipped_updates, 1)
+
+        props["Title"] = Property.as_rich_text("AlphaFold 2")
+        sync.execute_b(Action.push(ActionTarget.B, item, copy.deepcopy(page)))
+        self.assertEqual(
+            list(notion.updates[0].properties.keys()), ["Title", "Synced At"]
+        )
+        self.assertEqual(notion.updates[0].id, page.id)
+        self.assertEqual(sync.skipped_updates, 1)
+
+        # Only deletes archive the page
+        with self.assertRaises(Exception):
+            sync.execute_b(Action.merge(item, copy.deepcopy(page)))
+        self.assertEqual(len(notion.updates), 1)
+
+    def test_executor(self):
+        lock = threading.Lock()
+        started, running, max_running = [], {"a": 0, "b": 0}, {"a": 0, "b": 0}
+
+        def execute(key, action):
+            target, key = action
+            with lock:
+                started.append(key)
+                running[target] += 1
+                max_running[target] = max(max_running[target], running[target])
+            time.sleep(0.01)
+            with lock:
+                running[target] -= 1
+            if key == "broken":
+                raise Exception("Boom")
+
+        actions = {f"b{i}": ("b", f"b{i}") for i in range(8)}
+        actions.update({f"a{i}": ("a", f"a{i}") for i in range(4)})
+        actions.update({"broken": ("b", "broken"), "child": ("b", "child")})
+        dependencies = {"b0": ["a0"], "a1": ["b1"], "child": ["broken"]}
+
+        executor = ActionExecutor(execute, lambda x: x[0], {"a": 1, "b": 3})
+        failures = executor.run(actions, DependencyGraph(actions, dependencies))
+
+        self.assertEqual([f.key for f in failures], ["broken", "child"])
+        self.assertNotIn("child", started)
+        self.assertEqual(len(started), len(actions) - 1)
+        self.assertLess(started.index("a0"), started.index("b0"))
+        self.assertLess(started.index("b1"), started.index("a1"))
+        self.assertEqual(max_running, {"a": 1, "b": 3})
+
+    def test_dependency_graph(self):
+        graph = DependencyGraph(
+            ["c", "a", "b", "d", "x", "y"],
+            {"c": ["b"], "b": ["a", "unknown"], "d": ["a"], "x": ["y"], "y": ["x"]},
+        )
+        waves = graph.waves()
+        self.assertEqual(waves, [["a"], ["b", "d"], ["c"]])
+        self.assertEqual(graph.cyclic_nodes(waves), ["x", "y"])
+
+    def test_topo_sort(self):
+        children = {i: [i + 1] for i in range(5000)}
+        self.assertEqual(
+            topo_sort([4999, 0, 2500], lambda x: children.get(x, [])),
+            list(range(5001)),
+        )
+
+    def test_journal_resume(self):
+        path = os.path.join(self.tmp.name, "journal.jsonl")
+        items = {k: k for k in "abcd"}
+
+        sync = ListSync(items, {"a", "b", "c"}, SyncJournal(path), broken={"b"})
+        failures = sync.sync()
+        self.assertEqual([f.key for f in failures], ["b"])
+        self.assertEqual(sorted(sync.pushed), ["a", "c"])
+
+        with open(path, "a") as f:
+            f.write('{"event": "done", "ke')
+        checkpoint = SyncJournal(path).checkpoint()
+        self.assertEqual(checkpoint.pending(), {"b"})
+
+        # Change of b was consumed by the interrupted run, yet it is still retried
+        sync = ListSync(items, {"a", "d"}, SyncJournal(path))
+        self.assertEqual(sync.sync(), [])
+        self.assertEqual(sorted(sync.pushed), ["b", "d"])
+        self.assertFalse(os.path.exists(path))
+
+    def test_sync_pipelined(self):
+        items_b = [(f"k{i}", f"b{i}") for i in range(20)] + [("same", "x")]
+        sync = StreamSync({"same": "x", "k0": "a0", "only": "a"}, items_b)
+
+        self.assertEqual(sync.sync(), [])
+        self.assertEqual(len(sync.pushed), 21)
+        self.assertIn((ActionTarget.B, "a0"), sync.pushed)
+        self.assertIn((ActionTarget.B, "a"), sync.pushed)
+        self.assertIn((ActionTarget.A, "b5"), sync.pushed)
+        # Producer is held back by the bounded queue and the two workers
+        self.assertLessEqual(sync.pending_max, 2 + 2 + 1)
+
+    def test_sync_pipelined_memory(self):
+        sync = MemorySync(50)
+        self.assertEqual(sync.sync(), [])
+
+        # Executed actions are not kept around until the end of the run
+        self.assertLessEqual(sync.alive_max, 2 + 2 + 2)
+        self.assertEqual(sync.counts, {ActionType.PUSH: 50})
+
+    def test_sync_pipelined_journal(self):
+        path = os.path.join(self.tmp.name, "journal.jsonl")
+        journal = SyncJournal(path)
+        journal.begin([])
+        journal.plan(["k0", "k1"])
+        journal.done("k0", "PUSH:A")
+        journal.close()
+
+        sync = StreamSync({}, [("k0", "b0"), ("k1", "b1")], SyncJournal(path))
+        self.assertEqual(sync.sync(), [])
+        self.assertEqual(sync.pushed, [(ActionTarget.A, "b1")])
+        self.assertFalse(os.path.exists(path))
+
+    def test_markdown_manifest(self):
+        directory = os.path.join(self.tmp.name, "pages")
+        os.makedirs(os.path.join(directory, "deleted"))
+        files = {
+            "a.md": "# A\n| Synced At | 2021-06-01T10:00:00 |\n",
+            "b.md": "# B\n",
+            os.path.join("deleted", "c.md"): "# C\n",
+        }
+        for name, content in files.items():
+            with open(os.path.join(directory, name), "w") as f:
+                f.write(content)
+
+        def fetch():
+            sync = MarkdownPagesSync(
+                None,
+                None,
+                directory,
+                manifest=MarkdownManifest.for_directory(directory),
+            )
+            with mock.patch.object(Path, "read_text", autospec=True) as read_text:
+                read_text.side_effect = lambda path: files[
+                    os.path.relpath(path, directory)
+                ]
+                pages = sync.fetch_items_a()
+            return pages, sorted(
+                os.path.relpath(c[0][0], directory) for c in read_text.call_args_list
+            )
+
+        pages, read = fetch()
+        self.assertEqual(read, sorted(files))
+        self.assertEqual(pages["a"].synced_at, dt.datetime(2021, 6, 1, 10))
+        self.assertIsNone(pages["b"].synced_at)
+        self.assertTrue(pages["c"].deleted)
+
+        # Unchanged files are served from the manifest
+        pages, read = fetch()
+        self.assertEqual(read, [])
+        self.assertEqual(pages["a"].synced_at, dt.datetime(2021, 6, 1, 10))
+
+        files["b.md"] = "# B\n| Synced At | 2021-06-02T10:00:00 |\n"
+        with open(os.path.join(directory, "b.md"), "w") as f:
+            f.write(files["b.md"])
+        os.remove(os.path.join(directory, "deleted", "c.md"))
+        pages, read = fetch()
+        self.assertEqual(read, ["b.md"])
+        self.assertEqual(pages["b"].synced_at, dt.datetime(2021, 6, 2, 10))
+        self.assertNotIn("c", pages)
+        self.assertEqual(
+            set(MarkdownManifest.for_directory(directory).entries), {"a.md", "b.md"}
+        )
+
+    def test_markdown_export(self):
+        directory = os.path.join(self.tmp.name, "pages")
+        os.makedirs(directory)
+        pages = ref_pages()
+        notion = ExportNotion(pages)
+        sync = MarkdownPagesSync(
+            notion,
+            None,
+            directory,
+            manifest=MarkdownManifest.for_directory(directory),
+            concurrency_a=2,
+        )
+
+        self.assertEqual(sync.sync(), [])
+        # Concurrent exports share a single pool of the requests in flight of the client
+        self.assertEqual(notion.loading_max, 2)
+        self.assertEqual(len(notion.pools), 1)
+        self.assertEqual(next(iter(notion.pools))._max_workers, 4)
+        self.assertEqual(sync.progress.count, len(pages))
+        self.assertEqual(
+            sorted(os.listdir(directory)),
+            sorted([".notionsci"] + [f"{page_key(p)}.md" for p in pages]),
+        )
+        self.assertEqual(
+            len(MarkdownManifest.for_directory(directory).entries), len(pages)
+        )
+
+    def test_markdown_push_replace(self):
+        path = os.path.join(self.tmp.name, "page.md")
+        with open(path, "w") as f:
+            f.write("# Page\n\nNew content\n")
+        item = MarkdownPage("page.md", path=path)
+        page = Page(id="page")
+
+        notion = mock.Mock(max_in_flight=2)
+        notion.block_retrieve_all_children.return_value = [
+            mock.Mock(id="old1"),
+            mock.Mock(id="old2"),
+        ]
+        notion.page_get.return_value = page
+        sync = MarkdownPagesSync(notion, "db", self.tmp.name)
+
+        # The old content is kept if the new content could not be appended
+        notion.append_blocks.side_effect = Exception("append failed")
+        with self.assertRaises(Exception):
+            sync.execute_b(Action.push(ActionTarget.B, item, page))
+        notion.block_delete.assert_not_called()
+
+        notion.append_blocks.side_effect = None
+        notion.method_calls.clear()
+        sync.execute_b(Action.push(ActionTarget.B, item, page))
+        calls = [c[0] for c in notion.method_calls]
+        self.assertLess(calls.index("append_blocks"), calls.index("block_delete"))
+        self.assertEqual(
+            sorted(c[0][0] for c in notion.block_delete.call_args_list),
+            ["old1", "old2"],
+        )
+
+    def test_atomic_write(self):
+        path = os.path.join(self.tmp.name, "page.md")
+        barrier = threading.Barrier(8)
+
+        def write(i):
+            with atomic_write(path) as f:
+                f.write(f"page {i}")
+                barrier.wait()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(write, range(8)))
+        with open(path) as f:
+            self.assertRegex(f.read(), r"^page \d$")
+        self.assertEqual(os.listdir(self.tmp.name), ["page.md"])
+
+        with self.assertRaises(ValueError):
+            with atomic_write(path) as f:
+                f.write("partial")
+                raise ValueError()
+        with open(path) as f:
+            self.assertNotEqual(f.read(), "partial")
+        self.assertEqual(os.listdir(self.tmp.name), ["page.md"])
+
+    def test_scan_files(self):
+        expected = set()
+        for d in range(3):
+            for sub in ["", "nested", os.path.join("nested", "deeper")]:
+                directory = os.path.join(self.tmp.name, f"d{d}", sub)
+                os.makedirs(directory, exist_ok=True)
+                for name in ["page.md", "notes.txt"]:
+                    with open(os.path.join(directory, name), "w") as f:
+                        f.write(name)
+                expected.add(os.path.join(f"d{d}", sub, "page.md"))
+        os.symlink(
+            os.path.join(self.tmp.name, "d0"), os.path.join(self.tmp.name, "link")
+        )
+
+        for workers in [1, 4]:
+            records = scan_files(self.tmp.name, ".md", max_workers=workers)
+            self.assertEqual({r.path for r in records}, expected)
+        record = next(r for r in records if r.path == os.path.join("d1", "page.md"))
+        stat = os.stat(os.path.join(self.tmp.name, record.path))
+        self.assertEqual((record.size, record.mtime_ns), (7, stat.st_mtime_ns))
+
+    def test_write_batcher(self):
+        batches = []
+
+        def write(values):
+            batches.append(list(values))
+            return [Exception("Rejected") if v == 3 else v * 10 for v in values]
+
+        batcher = WriteBatcher(write, max_size=4, linger=0.05)
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            futures = {i: pool.submit(batcher.submit, i) for i in range(10)}
+
+        self.assertEqual(sorted(v for batch in batches for v in batch), list(range(10)))
+        self.assertTrue(all(len(batch) <= 4 for batch in batches))
+        self.assertLess(len(batches), 10)
+        self.assertEqual(futures[5].result(), 50)
+        self.assertRaises(Exception, futures[3].result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,241 @@
+import copy
+import os
+import tempfile
+import json
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import requests
+
+from notionsci.connections.zotero import (
+    ZoteroClient,
+    LibraryCache,
+    SearchPagination,
+    SearchParameters,
+    Item,
+    LibraryMirror,
+)
+from utils import load_asset_json, FakeZotero
+
+
+def fake_library():
+    return FakeZotero(
+        load_asset_json("zotero_items.json"), load_asset_json("zotero_collections.json")
+    )
+
+
+class StaleTotalZotero(FakeZotero):
+    def _query(self, entities, **kwargs):
+        result = super()._query(entities, **kwargs)
+        self.request.headers["Total-Results"] = str(len(entities) - 5)
+        return result
+
+
+class TestZotero(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, "library.json")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_refresh_cache(self):
+        library = fake_library()
+        zotero = ZoteroClient(library, cache=LibraryCache.load(self.cache_path))
+
+        items = zotero.all_items_grouped(delete_children=False)
+        collections = zotero.all_collections_grouped()
+        self.assertEqual(len(items), len(library.items_raw))
+        self.assertEqual(zotero.changes.since, 0)
+        self.assertEqual(zotero.changes.version, library.version)
+        self.assertNotIn("deleted", [name for name, _ in library.calls])
+
+        # Second run only sees the changes
+        edited = copy.deepcopy(library.items_raw[0])
+        edited["version"] = edited["data"]["version"] = library.version + 1
+        edited["data"]["title"] = "Edited"
+        library.items_raw = [edited] + library.items_raw[1:]
+        library.deleted_raw = {
+            "items": [library.items_raw[1]["key"]],
+            "collections": [],
+        }
+        library.version += 1
+
+        zotero = ZoteroClient(library, cache=LibraryCache.load(self.cache_path))
+        changes = zotero.refresh_cache()
+        self.assertEqual(changes.since, library.version - 1)
+        self.assertEqual(
+            changes.item_keys(), {edited["key"], library.items_raw[1]["key"]}
+        )
+        self.assertEqual(changes.collections, [])
+
+        cached = {x.key: x for x in zotero.all_items_grouped(delete_children=False)}
+        self.assertEqual(len(cached), len(library.items_raw) - 1)
+        self.assertEqual(cached[edited["key"]].data.properties["title"], "Edited")
+        self.assertEqual(len(zotero.all_collections_grouped()), len(collections))
+
+    def test_trashed_items_evicted(self):
+        library = fake_library()
+        zotero = ZoteroClient(library, cache=LibraryCache(self.cache_path))
+        zotero.refresh_cache()
+
+        trashed = copy.deepcopy(library.items_raw[0])
+        trashed["version"] = library.version + 1
+        trashed["data"]["deleted"] = 1
+        library.items_raw = [trashed] + library.items_raw[1:]
+        library.version += 1
+
+        zotero = ZoteroClient(library, cache=LibraryCache.load(self.cache_path))
+        zotero.refresh_cache()
+        self.assertNotIn(trashed["key"], zotero.cache.items)
+
+    def test_parallel_pagination(self):
+        library = fake_library()
+        serial = ZoteroClient(library)
+        parallel = ZoteroClient(library, max_in_flight=3)
+        pagination = lambda: SearchPagination(limit=5)
+
+        keys = [x.key for x in serial.all_items(pagination=pagination())]
+        library.calls.clear()
+        self.assertEqual(
+            [x.key for x in parallel.all_items(pagination=pagination())], keys
+        )
+        self.assertEqual(
+            sorted(kwargs["start"] for _, kwargs in library.calls),
+            list(range(0, len(keys), 5)),
+        )
+        self.assertEqual(
+            sorted(
+                x.key
+                for x in parallel.all_items(pagination=pagination(), ordered=False)
+            ),
+            sorted(keys),
+        )
+
+        # Library grew after the total was reported
+        library = StaleTotalZotero(library.items_raw, library.collections_raw)
+        parallel = ZoteroClient(library, max_in_flight=3)
+        self.assertEqual(
+            [x.key for x in parallel.all_items(pagination=pagination())], keys
+        )
+
+    def test_update_items(self):
+        library = fake_library()
+        items = [Item.from_dict(x) for x in library.items_raw] * 5
+        requests = []
+
+        def post(url, headers, data):
+            payload = json.loads(data)
+            requests.append(payload)
+            # Every third object was modified in the meantime
+            response = {"successful": {}, "failed": {}}
+            for i, obj in enumerate(payload):
+                if i % 3 == 2:
+                    response["failed"][str(i)] = {"code": 412, "message": "Modified"}
+                else:
+                    response["successful"][str(i)] = {"version": obj["version"] + 1}
+            return SimpleNamespace(
+                status_code=200,
+                json=lambda: response,
+                headers={},
+                raise_for_status=lambda: None,
+            )
+
+        with mock.patch("notionsci.connections.zotero.client.requests.post", post):
+            result = ZoteroClient(library).update_items(items[:12], fields=["tags"])
+
+        self.assertEqual([len(r) for r in requests], [12])
+        self.assertEqual(set(requests[0][0].keys()), {"key", "version", "tags"})
+        self.assertEqual(len(result.failed), 4)
+        self.assertEqual(result.successful[items[0].key], items[0].version + 1)
+        self.assertIsNone(result.error(items[0].key))
+        self.assertIn("412", str(result.error(items[2].key)))
+
+        requests.clear()
+        with mock.patch("notionsci.connections.zotero.client.requests.post", post):
+            ZoteroClient(library).update_items(items)
+        self.assertEqual([len(r) for r in requests], [50, 10])
+
+    @mock.patch("time.sleep")
+    def test_update_items_backoff(self, sleep):
+        library = fake_library()
+        items = [Item.from_dict(x) for x in library.items_raw[:2]]
+        statuses = [(429, {"Retry-After": "3"}), (503, {}), (200, {"Backoff": "5"})]
+
+        def post(url, headers, data):
+            status, headers = statuses.pop(0)
+            response = requests.Response()
+            response.status_code = status
+            response.headers.update(headers)
+            response._content = json.dumps(
+                {"successful": {"0": {"version": 2}, "1": {"version": 3}}}
+            ).encode()
+            return response
+
+        with mock.patch("notionsci.connections.zotero.client.requests.post", post):
+            result = ZoteroClient(library).update_items(items)
+        self.assertEqual(len(result.successful), 2)
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [3.0, 2])
+        self.assertEqual(library.backoffs, [5.0])
+
+        statuses = [(503, {"Retry-After": "1"})] * 6
+        with mock.patch("notionsci.connections.zotero.client.requests.post", post):
+            with self.assertRaises(Exception):
+                ZoteroClient(library).update_items(items)
+        self.assertEqual(statuses, [])
+
+    def test_library_mirror(self):
+        library = fake_library()
+        path = os.path.join(self.tmp.name, "library.db")
+        zotero = ZoteroClient(library, cache=LibraryMirror(path))
+
+        items = zotero.all_items_grouped(delete_children=False)
+        self.assertEqual(len(items), len(library.items_raw))
+        self.assertEqual(
+            len(zotero.all_collections_grouped(delete_children=False)),
+            len(library.collections_raw),
+        )
+
+        mirror = zotero.cache
+        self.assertEqual(mirror.version, library.version)
+        self.assertEqual(
+            {x.key for x in mirror.get_children("PBCREJF3")}, {"N6MCDPLA", "FI7NFL6R"}
+        )
+        self.assertEqual(len(mirror.get_collection_items("LYA53AKD")), 4)
+
+        search = lambda **kwargs: [
+            x.key for x in zotero.search_items(SearchParameters(**kwargs))
+        ]
+        self.assertEqual(
+            search(tag="Statistics - Machine Learning || Unknown"), ["YC5UMYGU"]
+        )
+        self.assertEqual(search(tag="-Statistics - Machine Learning", q="Machine"), [])
+        self.assertEqual(search(q="sutton"), ["E4WRQSKY"])
+        self.assertEqual(len(search(item_type="-note")), 8)
+        self.assertEqual(
+            sorted(search(item_key=["5VDJL4P4", "AlphaFold"])), ["5VDJL4P4"]
+        )
+        page = zotero.search_items(
+            SearchParameters(item_type="webpage"), SearchPagination(limit=2, start=2)
+        )
+        self.assertEqual(len(page), 2)
+
+        # Delta is applied to the persisted mirror
+        edited = copy.deepcopy(library.items_raw[-1])
+        edited["version"] = edited["data"]["version"] = library.version + 1
+        edited["data"]["tags"] = [{"tag": "Edited"}]
+        library.items_raw = library.items_raw[:-1] + [edited]
+        library.deleted_raw = {"items": ["ZKBYTT2Q"], "collections": []}
+        library.version += 1
+        mirror.close()
+
+        zotero = ZoteroClient(library, cache=LibraryMirror(path))
+        self.assertEqual(search(tag="Edited"), [edited["key"]])
+        self.assertEqual(search(since=library.version - 1), [edited["key"]])
+        self.assertIsNone(zotero.cache.get_item("ZKBYTT2Q"))
+        self.assertEqual(len(zotero.cache.get_items()), len(library.items_raw) - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Measures the memory held by a parsed tree of 50k blocks
+
+Run with: python test/benchmarks/bench_blocks_memory.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+TEST_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TEST_DIR, os.path.dirname(TEST_DIR)]
+
+from notionsci.connections.notion import Block, Page, MarkdownContext
+from utils import block_json
+
+BLOCKS = 50000
+FANOUT = 50
+
+
+def rich_text(content: str) -> dict:
+    return {
+        "type": "text",
+        "plain_text": content,
+        "text": {"content": content},
+        "annotations": {
+            "bold": False,
+            "italic": False,
+            "strikethrough": False,
+            "underline": False,
+            "code": False,
+            "color": "default",
+        },
+    }
+
+
+def block_tree_json():
+    blocks = []
+    for i in range(BLOCKS):
+        block = block_json(f"b{i}", "bulleted_list_item", i % FANOUT == 0)
+        block["bulleted_list_item"]["text"] = [rich_text(f"item {i}"), rich_text("!")]
+        blocks.append(block)
+    return blocks
+
+
+def build_tree(blocks: list) -> Page:
+    parsed = [Block.from_dict(b) for b in blocks]
+    page = Page(id="root")
+    page.set_children([b for i, b in enumerate(parsed) if i % FANOUT == 0])
+    for i in range(0, BLOCKS, FANOUT):
+        parsed[i].set_children(parsed[i + 1 : i + FANOUT])
+    return page
+
+
+if __name__ == "__main__":
+    data = block_tree_json()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    page = build_tree(data)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"parse {BLOCKS} blocks   {elapsed:8.3f} s")
+    print(
+        f"retained               {current / 2 ** 20:8.1f} MiB {current / BLOCKS:8.0f} B/block"
+    )
+    print(f"peak                   {peak / 2 ** 20:8.1f} MiB")
+
+    start = time.perf_counter()
+    page.to_markdown(MarkdownContext())
+    print(f"render markdown        {time.perf_counter() - start:8.3f} s")
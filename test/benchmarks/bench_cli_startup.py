@@ -0,0 +1,47 @@
+"""
+Measures the startup time of the cli for the help output and a typical subcommand
+
+Run with: python test/benchmarks/bench_cli_startup.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+TEST_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(TEST_DIR)
+sys.path[:0] = [TEST_DIR, ROOT_DIR]
+
+RUNS = 5
+COMMANDS = [
+    ["--help"],
+    ["sync", "zotero", "refs", "--help"],
+    ["config"],
+]
+
+
+def run(args: list, cwd: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "notionsci", *args],
+        cwd=cwd,
+        env={**os.environ, "PYTHONPATH": ROOT_DIR},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    from notionsci.config.structure import Config
+
+    with tempfile.TemporaryDirectory() as cwd:
+        # Overridden config in the working directory keeps the user config untouched
+        Config().save(os.path.join(cwd, "config.yml"))
+
+        for args in COMMANDS:
+            times = sorted(run(args, cwd) for _ in range(RUNS))
+            name = "notionsci " + " ".join(args)
+            print(f"{name:<36} {times[len(times) // 2]:8.3f} s (median)")
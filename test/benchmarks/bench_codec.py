@@ -0,0 +1,35 @@
+"""
+Measures parsing of the recorded api responses into dataclasses
+
+Run with: python test/benchmarks/bench_codec.py
+"""
+import os
+import sys
+import timeit
+
+TEST_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TEST_DIR, os.path.dirname(TEST_DIR)]
+
+from notionsci.connections.notion import QueryResult
+from notionsci.connections.zotero import Item, Collection
+from utils import load_asset_json
+
+
+def bench(name: str, fn, items: int, number: int = 200):
+    fn()  # compile codecs
+    best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"{name:<20} {best * 1000:8.3f} ms/call {best / items * 1e6:8.1f} us/item")
+
+
+if __name__ == "__main__":
+    pages = load_asset_json("notion_ref_pages.json")
+    items = load_asset_json("zotero_items.json")
+    collections = load_asset_json("zotero_collections.json")
+
+    bench("notion pages", lambda: QueryResult.from_dict(pages), len(pages["results"]))
+    bench("zotero items", lambda: [Item.from_dict(i) for i in items], len(items))
+    bench(
+        "zotero collections",
+        lambda: [Collection.from_dict(c) for c in collections],
+        len(collections),
+    )
@@ -0,0 +1,65 @@
+"""
+Measures listing a generated tree of markdown files with `Path.glob` and per-file stat calls
+against `scan_files` with one and several threads, as well as a full `fetch_items_a` with a warm manifest.
+
+Run with: python test/benchmarks/bench_markdown_scan.py
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+TEST_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TEST_DIR, os.path.dirname(TEST_DIR)]
+
+from notionsci.sync.markdown import MarkdownPagesSync, MarkdownManifest
+from notionsci.utils import scan_files
+
+FILES = 100000
+FILES_PER_DIR = 500
+CONTENT = "# Page\n| Synced At | 2021-06-01T10:00:00 |\n"
+
+
+def generate(root: str):
+    for i in range(FILES):
+        directory = os.path.join(
+            root, f"group{i // (FILES_PER_DIR * 20)}", f"dir{i // FILES_PER_DIR}"
+        )
+        if i % FILES_PER_DIR == 0:
+            os.makedirs(directory)
+        with open(os.path.join(directory, f"page{i}.md"), "w") as f:
+            f.write(CONTENT)
+
+
+def glob_stat(root: str) -> list:
+    records = []
+    for file in Path(root).glob("**/*.md"):
+        if not file.is_file():
+            continue
+        records.append((file, os.path.getctime(file), os.path.getmtime(file)))
+    return records
+
+
+def bench(name: str, fn):
+    start = time.perf_counter()
+    count = len(fn())
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {elapsed:8.3f} s {count:8} files")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as root:
+        start = time.perf_counter()
+        generate(root)
+        print(f"generate                 {time.perf_counter() - start:8.3f} s")
+
+        bench("glob + stat", lambda: glob_stat(root))
+        bench("scan_files 1 thread", lambda: scan_files(root, ".md", max_workers=1))
+        bench("scan_files 8 threads", lambda: scan_files(root, ".md", max_workers=8))
+
+        sync = lambda: MarkdownPagesSync(
+            None, None, root, manifest=MarkdownManifest.for_directory(root)
+        )
+        bench("fetch_items_a cold", lambda: sync().fetch_items_a())
+        bench("fetch_items_a manifest", lambda: sync().fetch_items_a())
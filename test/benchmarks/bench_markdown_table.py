@@ -0,0 +1,69 @@
+"""
+Measures the CLI import time and rendering of markdown property tables.
+The pandas based rendering used before is timed for comparison when pandas is installed.
+
+Run with: python test/benchmarks/bench_markdown_table.py
+"""
+import os
+import subprocess
+import sys
+import time
+
+TEST_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TEST_DIR, os.path.dirname(TEST_DIR)]
+
+from notionsci.connections.notion import Page, MarkdownContext
+from notionsci.utils import MarkdownBuilder
+from utils import load_asset_json
+
+PAGES = 2000
+STARTUPS = 5
+
+
+def startup() -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "import notionsci.cli.notion"],
+        cwd=os.path.dirname(TEST_DIR),
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def pandas_table(rows: list) -> str:
+    import pandas as pd
+
+    return pd.DataFrame(rows).to_markdown(index=False)
+
+
+def bench(name: str, fn, pages: list):
+    start = time.perf_counter()
+    for page in pages:
+        fn(page)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {elapsed:8.3f} s {elapsed / len(pages) * 1e6:8.1f} us/page")
+
+
+if __name__ == "__main__":
+    times = sorted(startup() for _ in range(STARTUPS))
+    print(f"cli import (median)      {times[len(times) // 2]:8.3f} s")
+
+    data = load_asset_json("notion_ref_pages.json")["results"]
+    pages = [Page.from_dict(data[i % len(data)]) for i in range(PAGES)]
+    for page in pages:
+        page.set_children([])
+    context = MarkdownContext()
+    rows = [
+        [
+            {"Name": name, "Value": prop.to_markdown(context)}
+            for name, prop in page.properties.items()
+        ]
+        for page in pages
+    ]
+
+    bench("native table", MarkdownBuilder.table, rows)
+    try:
+        bench("pandas table", pandas_table, rows)
+    except ImportError:
+        print("pandas table             skipped, pandas is not installed")
+    bench("page to_markdown", lambda page: page.to_markdown(context), pages)
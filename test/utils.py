@@ -1,7 +1,12 @@
+import asyncio
 import io
 import json
 import os
+import threading
+import time
 from contextlib import redirect_stdout
+from types import SimpleNamespace
+from typing import Dict, List
 
 ASSETS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "assets"))
 
@@ -21,3 +26,171 @@ def capture_cmd(fn):
         except SystemExit as e:
             code = e.code
     return code, f.getvalue()
+
+
+def block_json(
+    id: str,
+    type: str = "paragraph",
+    has_children: bool = False,
+    last_edited_time: str = None,
+) -> dict:
+    result = {
+        "object": "block",
+        "id": id,
+        "type": type,
+        "has_children": has_children,
+        type: {"text": []},
+    }
+    if last_edited_time:
+        result["last_edited_time"] = last_edited_time
+    return result
+
+
+class FakeNotionApi:
+    """
+    In-memory stand-in for the official notion client serving a fixed block tree
+    """
+
+    def __init__(
+        self, tree: Dict[str, List[dict]], page_size: int = 100, delay: float = 0.0
+    ):
+        self.tree = tree
+        self.page_size = page_size
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.appends = []
+        self.blocks = SimpleNamespace(
+            children=SimpleNamespace(
+                list=self.list_children, append=self.append_children
+            )
+        )
+
+    def _enter(self, block_id: str):
+        with self.lock:
+            self.calls.append(block_id)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def _children_page(
+        self, block_id: str, start_cursor: str = None, page_size: int = None
+    ):
+        children = self.tree.get(block_id, [])
+        start = int(start_cursor or 0)
+        end = start + min(page_size or self.page_size, self.page_size)
+        return {
+            "object": "list",
+            "results": children[start:end],
+            "next_cursor": str(end) if end < len(children) else None,
+            "has_more": end < len(children),
+        }
+
+    def list_children(self, block_id: str, **kwargs):
+        self._enter(block_id)
+        time.sleep(self.delay)
+        self._exit()
+        return self._children_page(block_id, **kwargs)
+
+    def _append(self, block_id: str, children: List[dict]):
+        with self.lock:
+            self.appends.append((block_id, len(children)))
+            created = self.tree.setdefault(block_id, [])
+            for child in children:
+                created.append(
+                    {
+                        **child,
+                        "id": f"{block_id}/{len(created)}",
+                        "has_children": False,
+                    }
+                )
+            return {
+                "object": "list",
+                "results": created[-len(children) :],
+                "next_cursor": None,
+                "has_more": False,
+            }
+
+    def append_children(self, block_id: str, children: List[dict]):
+        self._enter(block_id)
+        time.sleep(self.delay)
+        self._exit()
+        return self._append(block_id, children)
+
+
+class FakeAsyncNotionApi(FakeNotionApi):
+    """
+    Asyncio flavour of FakeNotionApi
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.blocks = SimpleNamespace(
+            children=SimpleNamespace(
+                list=self.alist_children, append=self.aappend_children
+            )
+        )
+
+    async def alist_children(self, block_id: str, **kwargs):
+        self._enter(block_id)
+        await asyncio.sleep(self.delay)
+        self._exit()
+        return self._children_page(block_id, **kwargs)
+
+    async def aappend_children(self, block_id: str, children: List[dict]):
+        self._enter(block_id)
+        await asyncio.sleep(self.delay)
+        self._exit()
+        return self._append(block_id, children)
+
+
+class FakeZotero:
+    """
+    In-memory stand-in for pyzotero serving the items and collections of a library
+    """
+
+    def __init__(self, items: List[dict], collections: List[dict], version: int = None):
+        self.items_raw = items
+        self.collections_raw = collections
+        self.deleted_raw = {"items": [], "collections": []}
+        self.version = version or max(x["version"] for x in items + collections)
+        self.calls = []
+        self.endpoint = "https://api.zotero.test"
+        self.library_type = "users"
+        self.library_id = "1"
+        self.backoffs = []
+
+    def default_headers(self):
+        return {"Zotero-API-Key": "test"}
+
+    def _check_backoff(self):
+        pass
+
+    def _set_backoff(self, duration):
+        self.backoffs.append(float(duration))
+
+    def _query(self, entities: List[dict], since=None, start=0, limit=100, **kwargs):
+        results = [x for x in entities if not since or x["version"] > int(since)]
+        self.request = SimpleNamespace(headers={"Total-Results": str(len(results))})
+        return results[start : start + limit]
+
+    def items(self, **kwargs):
+        self.calls.append(("items", kwargs))
+        return self._query(self.items_raw, **kwargs)
+
+    def collections(self, **kwargs):
+        self.calls.append(("collections", kwargs))
+        return self._query(self.collections_raw, **kwargs)
+
+    def last_modified_version(self):
+        self.calls.append(("version", {}))
+        return self.version
+
+    def deleted(self, since):
+        self.calls.append(("deleted", {"since": since}))
+        return self.deleted_raw